@@ -1,7 +1,29 @@
 import streamlit as st
-import random
+import logging
+import os
+import time
 import uuid
-import pandas as pd
+
+from zoology.rounds import LeitnerScheduler
+from zoology.fuzzy import TypoIndex
+from zoology.neighbors import PendingNeighborTable
+from contextlib import closing
+
+from zoology.storage import (
+    AnswerRow, AnswerWriter, CompletionRow, class_summary, connect, prune_snapshots, term_error_rates,
+)
+from zoology.engine import QuizEngine
+from zoology.loader import build_loaded_bank, format_stats
+from zoology.reload import LiveBank
+from zoology.metrics import PhaseMetrics
+from zoology.export import ExportCache
+from zoology.sessions import SessionStore
+from zoology.leaderboard import Leaderboards
+from zoology.views import ViewCache
+from zoology.shared_bank import attach as attach_shared_bank, shared_neighbor_table
+
+# 這次 script run 的起點（效能統計的 "run" 階段）
+RUN_T0 = time.perf_counter()
 
 # ====== App 基本設定 ======
 st.set_page_config(
@@ -137,95 +159,128 @@ div[data-testid="stVerticalBlock"] > div:has(> div[data-testid="stRadio"]) {
 """, unsafe_allow_html=True)
 
 
+# ===================== 效能統計 =====================
+# 每個階段的耗時直方圖，所有 session 共用；網址加 ?admin=1 在 sidebar 看，並定期寫成檔案
+METRICS_FILE = "zoology_metrics"      # 寫出 zoology_metrics.prom（Prometheus）與 zoology_metrics.json
+METRICS_EXPORT_EVERY = 15.0           # 幾秒寫一次
+
+
+@st.cache_resource
+def get_metrics():
+    metrics = PhaseMetrics()
+    metrics.start_export(METRICS_FILE, METRICS_EXPORT_EVERY)
+    return metrics
+
+METRICS = get_metrics()
+
+
 # ===================== 題庫載入（容錯版） =====================
-@st.cache_data
-def load_question_bank(xlsx_path="Zoology_Terms_Bilingual.xlsx"):
+# 題庫檔案：可列多個（例如一章一檔），會合併成一個題庫並依英文去除重複
+BANK_FILES = ("Zoology_Terms_Bilingual.xlsx",)
+# None = 每個檔案只讀第一張工作表；"all" = 合併所有工作表
+BANK_SHEETS = None
+# 多 process 部署：設了這個環境變數（loader 用 python -m zoology.shared_bank publish 發佈的檔案）就直接 mmap 掛上，
+# 不自己讀 Excel；這時題庫檔與工作表由 loader 那邊決定，上面兩個設定不用
+SHARED_BANK = os.environ.get("ZOOLOGY_SHARED_BANK", "")
+
+logger = logging.getLogger(__name__)
+
+
+@st.cache_resource
+def load_question_bank(xlsx_path=BANK_FILES, sheets=BANK_SHEETS):
     """
-    嘗試讀取 Excel 並自動對應「中文名欄」與「英文名欄」.
-    支援常見欄位名稱（不分大小寫）：
-      中文欄候選: Name, 中文, 名稱, Chinese, CN
-      英文欄候選: English, 英文, Term, 英文名, EN, English term
-    回傳 dict:
-    {
-      "ok": bool,
-      "error": str,
-      "bank": [ { "name":..., "english":...}, ... ],
-      "debug_cols": [...]
-    }
+    讀取題庫並建好索引；用 cache_resource 讓所有 session 共用同一個唯讀物件，
+    不必每次 rerun 都把整個題庫 pickle / unpickle 一遍。
+    回傳 LiveBank：題庫檔有變動時會在背景重新載入並整個換上新版（.current）。
+    欄位對應與錯誤訊息見 zoology.loader.read_question_bank。
     """
-    try:
-        df = pd.read_excel(xlsx_path)
-    except Exception as e:
-        return {
-            "ok": False,
-            "error": f"無法讀取題庫檔案 {xlsx_path} ：{e}",
-            "bank": [],
-            "debug_cols": []
-        }
-
-    def norm(s):
-        return str(s).strip().lower()
-
-    cols_norm = {norm(c): c for c in df.columns}
-
-    cn_candidates = ["name", "中文", "名稱", "chinese", "cn"]
-    en_candidates = ["english", "英文", "term", "英文名", "en", "english term"]
-
-    cn_col = None
-    en_col = None
-    for cand in cn_candidates:
-        if cand in cols_norm:
-            cn_col = cols_norm[cand]
-            break
-    for cand in en_candidates:
-        if cand in cols_norm:
-            en_col = cols_norm[cand]
-            break
-
-    if cn_col is None or en_col is None:
-        return {
-            "ok": False,
-            "error": (
-                "找不到必要欄位。\n"
-                f"目前檔案欄位是：{list(df.columns)}\n"
-                f"中文欄候選：{cn_candidates}\n"
-                f"英文欄候選：{en_candidates}\n"
-                "請把 Excel 兩欄名稱改成上述其中一個（例如：Name / English）。"
-            ),
-            "bank": [],
-            "debug_cols": list(df.columns)
-        }
-
-    def clean(x):
-        if pd.isna(x):
-            return ""
-        return str(x).strip()
-
-    bank_list = []
-    for _, row in df.iterrows():
-        cn_val = clean(row.get(cn_col, ""))
-        en_val = clean(row.get(en_col, ""))
-        if cn_val and en_val:
-            bank_list.append({
-                "name": cn_val,
-                "english": en_val,
-            })
-
-    return {
-        "ok": True,
-        "error": "",
-        "bank": bank_list,
-        "debug_cols": list(df.columns)
-    }
-
-loaded = load_question_bank()
-QUESTION_BANK = loaded["bank"]
-
-if not loaded["ok"] or not QUESTION_BANK:
+    def load():
+        bank = build_loaded_bank(xlsx_path, sheets=sheets)
+        logger.info("question bank loaded (%d terms)\n%s", len(bank.index), format_stats(bank.stats))
+        return bank
+
+    def attach():
+        bank = attach_shared_bank(SHARED_BANK)
+        logger.info("shared question bank attached: %s (%d terms)", SHARED_BANK, len(bank.index))
+        return bank
+
+    if SHARED_BANK:
+        # term ID 已由 loader 配好，換版時直接換上新檔，不再重新配發
+        return LiveBank(attach, SHARED_BANK, rebase=False)
+    return LiveBank(load, xlsx_path)
+
+with METRICS.time("load_question_bank"):
+    live_bank = load_question_bank()
+    live_bank.poll()
+# 這次 rerun 從頭到尾都用同一版題庫
+loaded = live_bank.current
+BANK_INDEX = loaded.index
+
+if not loaded.ok or not len(BANK_INDEX):
     st.error("⚠ 題庫讀取失敗或為空，請檢查 Excel 欄位。")
     st.stop()
 
 
+# ===================== 作答紀錄資料庫 =====================
+RESULTS_DB = "zoology_results.sqlite3"
+# 老師統計頁（網址加 ?view=teacher）與效能統計（?admin=1）要輸入這個通行碼；沒設定時兩者都不開放。
+# 只在本機試用、確定沒有學生連得到時，可設 ZOOLOGY_TEACHER_OPEN=1 不用通行碼（頁面上會顯示警告）
+TEACHER_PASSCODE = os.environ.get("ZOOLOGY_TEACHER_PASSCODE", "")
+TEACHER_OPEN = os.environ.get("ZOOLOGY_TEACHER_OPEN", "") == "1"
+
+
+def teacher_unlocked(key):
+    """老師頁 / 效能統計的通行碼檢查；回傳這次 rerun 可不可以顯示"""
+    if TEACHER_PASSCODE:
+        return st.text_input("通行碼", type="password", key=key) == TEACHER_PASSCODE
+    if TEACHER_OPEN:
+        st.warning("⚠ 沒有設定 ZOOLOGY_TEACHER_PASSCODE，任何拿到網址的人都看得到這一頁。")
+        return True
+    st.error("老師頁未開放：請先設定環境變數 ZOOLOGY_TEACHER_PASSCODE。")
+    return False
+
+
+@st.cache_resource
+def get_answer_writer(db_path=RESULTS_DB):
+    """所有 session 共用一個背景寫入器，作答紀錄批次寫進 SQLite"""
+    return AnswerWriter(db_path)
+
+
+# 斷線重連：網址上帶 ?sid=<session_id>，從 snapshot 接著玩；記憶體裡最多留 SESSION_MAX_LIVE 個、閒置 SESSION_TTL 秒就逐出
+SID_PARAM = "sid"
+SESSION_MAX_LIVE = 500
+SESSION_TTL = 30 * 60
+# snapshot 在資料庫裡留幾天
+SNAPSHOT_KEEP_DAYS = 7
+
+
+@st.cache_resource
+def get_session_store(db_path=RESULTS_DB):
+    """所有 session 共用：snapshot 存取 + 記憶體中 session 的 LRU / 閒置逐出"""
+    with closing(connect(db_path)) as conn:
+        prune_snapshots(conn, time.time() - SNAPSHOT_KEEP_DAYS * 86400)
+    return SessionStore(get_answer_writer(db_path), db_path, SESSION_MAX_LIVE, SESSION_TTL)
+
+
+# 各班即時排行榜（只在記憶體裡，重開 server 或老師按「重新計分」就歸零）；老師頁每 LEADERBOARD_REFRESH 秒自動更新
+LEADERBOARD_TOP_K = 20
+LEADERBOARD_REFRESH = 2.0
+
+
+@st.cache_resource
+def get_leaderboards():
+    return Leaderboards(LEADERBOARD_TOP_K)
+
+
+# 老師下載用的匯出檔：資料沒變就沿用上次建好的檔案
+EXPORT_DIR = "exports"
+
+
+@st.cache_resource
+def get_export_cache(out_dir=EXPORT_DIR):
+    return ExportCache(out_dir)
+
+
 # ===================== 常數 / 模式名稱 =====================
 MAX_ROUNDS = 3
 QUESTIONS_PER_ROUND = 10
@@ -236,62 +291,162 @@ MODE_3 = "模式三：中文 ➜ 手寫英文"
 
 ALL_MODES = [MODE_1, MODE_2, MODE_3]
 
+# 選擇題每題幾個選項（含正確答案），可設 2~6
+OPTIONS_PER_MODE = {
+    MODE_1: 2,
+    MODE_2: 2,
+}
+MIN_OPTIONS, MAX_OPTIONS = 2, 6
+
+
+# 模式三容錯：每 MODE3_CHARS_PER_EDIT 個字元允許 1 個拼字錯誤，最多 MODE3_MAX_EDITS 個（設 0 = 必須完全正確）
+MODE3_MAX_EDITS = 2
+MODE3_CHARS_PER_EDIT = 5
+
+
+@st.cache_resource(max_entries=2)
+def load_typo_index(_bank, version, max_edits=MODE3_MAX_EDITS, chars_per_edit=MODE3_CHARS_PER_EDIT):
+    """模式三容錯批改用的 TypoIndex（bigram 索引），每一版題庫建一次、所有 session 共用"""
+    return TypoIndex(_bank, max_edits, chars_per_edit)
+
+
+# 干擾選項優先從「字形最像」的前 HARD_DISTRACTOR_K 個詞裡挑（False = 完全隨機）
+HARD_DISTRACTORS = True
+HARD_DISTRACTOR_K = 8
+
+
+@st.cache_resource(max_entries=2)
+def load_neighbor_table(_bank, version, k=HARD_DISTRACTOR_K):
+    """字元 n-gram 相似詞表，每一版題庫在背景建一次、所有 session 共用（共用題庫有附就直接用）"""
+    return PendingNeighborTable(_bank, k, table=shared_neighbor_table(_bank, k))
+
+
+def option_count_for(mode_label):
+    """回傳該模式每題的選項數（夾在 MIN_OPTIONS~MAX_OPTIONS 之間）"""
+    n = OPTIONS_PER_MODE.get(mode_label, MIN_OPTIONS)
+    return max(MIN_OPTIONS, min(MAX_OPTIONS, n))
+
+
+@st.cache_resource(max_entries=2)
+def load_engine(_bank, version):
+    """出題 / 批改規則（zoology.engine.QuizEngine），每一版題庫建一次、所有 session 共用"""
+    return QuizEngine(
+        _bank,
+        typo_index=load_typo_index(_bank, version),
+        neighbors=load_neighbor_table(_bank, version) if HARD_DISTRACTORS else None,
+        options_per_mode={ALL_MODES.index(m): option_count_for(m) for m in (MODE_1, MODE_2)},
+        questions_per_round=QUESTIONS_PER_ROUND,
+        max_rounds=MAX_ROUNDS,
+    )
+
+ENGINE = load_engine(BANK_INDEX, BANK_INDEX.version)
+
+
+# 題目 / 提示 / 複習區 / 進度條的畫面片段：同一題同一組選項只組一次，所有 session 共用（最多 VIEW_CACHE_SIZE 筆）
+VIEW_CACHE_SIZE = 4096
+
+
+@st.cache_resource(max_entries=2)
+def load_view_cache(_bank, version, maxsize=VIEW_CACHE_SIZE):
+    return ViewCache(_bank, maxsize)
+
+VIEWS = load_view_cache(BANK_INDEX, BANK_INDEX.version)
+
 
 # ===================== Session State 初始化 & 工具 =====================
 def init_game_state():
-    """初始化遊戲用的狀態 (不包含 user_name 等資料)"""
-    st.session_state.round = 1                             # 第幾回合
-    st.session_state.used_pairs = set()                    # 用過的英文單字，避免重複
-    st.session_state.cur_round_qidx = []                   # 本回合抽到的題目 index
-    st.session_state.cur_idx_in_round = 0                  # 本回合目前第幾題
-    st.session_state.records = []                          # 紀錄：(round,prompt,chosen,correct_eng,correct_name,is_correct,opts)
-    st.session_state.score_this_round = 0
-    st.session_state.submitted = False                     # 目前這題是否已經交答案
-    st.session_state.last_feedback = ""                    # HTML feedback
-    st.session_state.answer_cache = ""                     # 模式三 text_input 暫存
-    st.session_state.options_cache = {}                    # (qidx, mode) → 選項(cache)
+    """
+    初始化遊戲用的狀態 (不包含 user_name 等資料)。
+    已選好模式就直接開新的一局（ENGINE.new_session 會抽好第一回合），否則 quiz 先留 None。
+    """
     if "session_id" not in st.session_state:
         st.session_state.session_id = str(uuid.uuid4())
+    had_quiz = st.session_state.get("quiz") is not None
+    if "scheduler" not in st.session_state:
+        # 間隔複習的進度跨局保留（同一個 session 內）
+        st.session_state.scheduler = LeitnerScheduler()
+    mode_label = st.session_state.get("chosen_mode_label")
+    st.session_state.quiz = (                              # zoology.engine.QuizSession：回合、題目、紀錄、分數
+        ENGINE.new_session(
+            ALL_MODES.index(mode_label),
+            st.session_state.get("spaced_repetition", False),
+            st.session_state.scheduler,
+        )
+        if mode_label else None
+    )
+    st.session_state.last_feedback = ""                    # HTML feedback
+    st.session_state.answer_cache = ""                     # 模式三 text_input 暫存
+    st.session_state.bank_version = BANK_INDEX.version     # 目前對應的題庫版本
+    if had_quiz or st.session_state.quiz is not None:
+        save_snapshot()
 
-def start_new_round():
-    """抽一個新回合的題目清單"""
-    available = [
-        i for i, it in enumerate(QUESTION_BANK)
-        if it["english"] not in st.session_state.used_pairs
-    ]
-    if len(available) == 0:
-        st.session_state.used_pairs = set()
-        available = list(range(len(QUESTION_BANK)))
 
-    if len(available) <= QUESTIONS_PER_ROUND:
-        chosen = available[:]
-        random.shuffle(chosen)
-    else:
-        chosen = random.sample(available, QUESTIONS_PER_ROUND)
+# ===================== 斷線續玩：snapshot / 逐出 =====================
+SNAPSHOT_META_KEYS = ("user_name", "user_class", "user_seat", "last_feedback", "answer_cache")
+# 只憑網址上的 sid 接續時不還原這幾個：拿到網址的人可以接著玩，但不會直接頂替那位學生的身分
+IDENTITY_KEYS = ("user_name", "user_class", "user_seat")
+
+
+def save_snapshot():
+    """quiz 每次改動後呼叫：存一份 snapshot（背景寫入）；回到模式選擇頁時存空的，重連就不會回到舊的一局"""
+    get_session_store().save(
+        st.session_state.session_id,
+        st.session_state.quiz,
+        BANK_INDEX,
+        {k: str(st.session_state.get(k, "")) for k in SNAPSHOT_META_KEYS},
+    )
+
+
+def restore_snapshot(sid, identity=True):
+    """
+    用 snapshot 還原整個遊戲狀態；找不到或對不上題庫時回傳 False。
+    identity=False（新的瀏覽器連線只帶著 ?sid=）時不還原姓名 / 班級 / 座號，請學生重新填寫。
+    """
+    out = get_session_store().restore(sid, BANK_INDEX)
+    if out is None:
+        return False
+    quiz, meta = out
+    st.session_state.session_id = sid
+    st.session_state.quiz = quiz
+    st.session_state.scheduler = quiz.scheduler
+    st.session_state.mode_locked = True
+    st.session_state.chosen_mode_label = ALL_MODES[quiz.mode]
+    st.session_state.spaced_repetition = quiz.spaced
+    st.session_state.bank_version = quiz.bank_version
+    for k in SNAPSHOT_META_KEYS:
+        if identity or k not in IDENTITY_KEYS:
+            st.session_state[k] = meta.get(k, "")
+    st.session_state.identity_pending = not identity
+    return True
+
+
+def track_session():
+    """
+    每次 rerun（含 fragment）開頭：先 checkout（這次跑完前不會被別的 session 逐出），
+    被逐出的 quiz 從 snapshot 還原，再標記這個 session 剛用過。回傳 sid，跑完時交給 get_session_store().checkin。
+    """
+    store = get_session_store()
+    sid = st.session_state.session_id
+    store.checkout(sid)
+    quiz = st.session_state.quiz
+    if quiz is not None and quiz.evicted:
+        if not restore_snapshot(sid):
+            init_game_state()
+    store.touch(sid, st.session_state.quiz)
+    return sid
 
-    st.session_state.cur_round_qidx = chosen
-    st.session_state.cur_idx_in_round = 0
-    st.session_state.score_this_round = 0
-    st.session_state.submitted = False
-    st.session_state.last_feedback = ""
-    st.session_state.answer_cache = ""
-    st.session_state.options_cache = {}
 
 def ensure_state_ready():
     """確保遊戲狀態存在且完整"""
     needed_keys = [
         "mode_locked",        # bool, 是否已經選定模式並進入遊戲
         "chosen_mode_label",  # str, 選到哪個模式
-        "round",
-        "used_pairs",
-        "cur_round_qidx",
-        "cur_idx_in_round",
-        "records",
-        "score_this_round",
-        "submitted",
+        "spaced_repetition",  # bool, 是否用間隔複習出題
+        "scheduler",          # LeitnerScheduler, 間隔複習排程
+        "quiz",               # QuizSession, 還沒選模式時是 None
         "last_feedback",
         "answer_cache",
-        "options_cache",
+        "bank_version",
         "session_id",
         "user_name",
         "user_class",
@@ -305,6 +460,8 @@ def ensure_state_ready():
             st.session_state.mode_locked = False
         if "chosen_mode_label" not in st.session_state:
             st.session_state.chosen_mode_label = None
+        if "spaced_repetition" not in st.session_state:
+            st.session_state.spaced_repetition = False
 
         if "user_name" not in st.session_state:
             st.session_state.user_name = ""
@@ -313,133 +470,69 @@ def ensure_state_ready():
         if "user_seat" not in st.session_state:
             st.session_state.user_seat = ""
 
-        # 初始化遊戲本體
-        init_game_state()
-        # 如果之後有 round 但沒題目，等會進頁面時會再 start_new_round()
-
-    # 如果 round 還有值、但題目列表是空的，補抽
-    if st.session_state.mode_locked and st.session_state.round and not st.session_state.cur_round_qidx:
-        start_new_round()
-
+        # 網址上有 sid（斷線重連 / 重新整理）就接著上次的進度，否則開新的
+        sid = st.query_params.get(SID_PARAM)
+        if not (sid and restore_snapshot(sid, identity=False)):
+            init_game_state()
+        st.query_params[SID_PARAM] = st.session_state.session_id
 
-ensure_state_ready()
+    return track_session()
 
 
-def get_options_for_q(qidx, mode_label):
+def sync_session_with_bank():
     """
-    產生/回傳兩個選項（模式一 & 模式二用）
-    回傳格式：
-    {
-      "display": [...兩個選項字串...],
-      "value":   [...一樣的...]
-    }
+    題庫熱更新後，把這個 session 的 term ID 對到新版題庫（規則見 QuizEngine.sync）。
+    正在看回饋的那題被刪掉時，回饋一起清掉；因此結束遊戲時補記完成紀錄。
     """
-    key = (qidx, mode_label)
-    if key in st.session_state.options_cache:
-        return st.session_state.options_cache[key]
-
-    item = QUESTION_BANK[qidx]
-    correct_name = item["name"].strip()
-    correct_eng  = item["english"].strip()
-
-    if mode_label == MODE_1:
-        # 干擾英文
-        pool = [
-            it["english"].strip()
-            for it in QUESTION_BANK
-            if it["english"].strip().lower() != correct_eng.lower()
-        ]
-        distractor = random.choice(pool) if pool else "???"
-        display_list = [correct_eng, distractor]
-
-    elif mode_label == MODE_2:
-        # 干擾中文
-        pool = [
-            it["name"].strip()
-            for it in QUESTION_BANK
-            if it["name"].strip() != correct_name
-        ]
-        distractor = random.choice(pool) if pool else "???"
-        display_list = [correct_name, distractor]
-    else:
-        display_list = []
+    if st.session_state.bank_version == BANK_INDEX.version:
+        return
+    st.session_state.bank_version = BANK_INDEX.version
+
+    quiz = st.session_state.quiz
+    if quiz is None:
+        st.session_state.scheduler.sync(BANK_INDEX)
+        return
+    was_playing = quiz.round is not None
+    ENGINE.sync(quiz)
+    if not quiz.submitted:
+        st.session_state.last_feedback = ""
+        st.session_state.answer_cache = ""
+    if was_playing and quiz.round is None:
+        record_completion()
+    save_snapshot()
+
 
-    random.shuffle(display_list)
-    payload = {
-        "display": display_list,
-        "value": display_list[:],
-    }
-    st.session_state.options_cache[key] = payload
-    return payload
+with METRICS.time("ensure_state_ready"):
+    ACTIVE_SID = ensure_state_ready()
 
 
 # ===================== 畫面元件：進度條卡 =====================
 def render_top_card():
-    r = st.session_state.round
-    i = st.session_state.cur_idx_in_round + 1
-    n = len(st.session_state.cur_round_qidx)
-    percent = int(i / n * 100) if n else 0
-
+    quiz = st.session_state.quiz
     st.markdown(
-        f"""
-        <div class="progress-card"
-             style='background-color:#f5f5f5;
-                    padding:9px 14px;
-                    border-radius:12px;'>
-            <div style='display:flex;
-                        align-items:center;
-                        justify-content:space-between;
-                        margin-bottom:4px;'>
-                <div style='font-size:18px;'>
-                    🎯 第 {r} 回合｜進度：{i} / {n}
-                </div>
-                <div style='font-size:16px; color:#555;'>{percent}%</div>
-            </div>
-            <progress value='{i}'
-                      max='{n if n else 1}'
-                      style='width:100%; height:14px;'></progress>
-        </div>
-        """,
+        VIEWS.progress(quiz.round, quiz.pos + 1, len(quiz.questions)),
         unsafe_allow_html=True
     )
 
 
 # ===================== 題目顯示（回傳 qidx, q, ("mc"/"text", user_answer, payload)） =====================
 def render_question():
-    cur_pos = st.session_state.cur_idx_in_round
-    qidx = st.session_state.cur_round_qidx[cur_pos]
-    q = QUESTION_BANK[qidx]
+    quiz = st.session_state.quiz
+    cur_pos = quiz.pos
+    term_id = quiz.questions[cur_pos]
+    qidx = ENGINE.current(quiz)
+    q = BANK_INDEX.item(qidx)
     mode_label = st.session_state.chosen_mode_label
 
-    if mode_label == MODE_1:
-        # 中文 -> 英文 (選擇題)
-        prompt = q["name"].strip()
-        st.markdown(
-            f"<h2>Q{cur_pos + 1}. 「{prompt}」的正確英文是？</h2>",
-            unsafe_allow_html=True
-        )
-        payload = get_options_for_q(qidx, MODE_1)
-        options_disp = payload["display"]
-        if not options_disp:
-            st.info("No options to select.")
-            user_choice_disp = None
-        else:
-            user_choice_disp = st.radio(
-                "",
-                options_disp,
-                key=f"mc_{qidx}",
-                label_visibility="collapsed"
-            )
-        return qidx, q, ("mc", user_choice_disp, payload)
-
-    elif mode_label == MODE_2:
-        # 英文 -> 中文 (選擇題)
-        prompt = q["english"].strip()
+    if mode_label in (MODE_1, MODE_2):
+        # 模式一：中文 -> 英文；模式二：英文 -> 中文（選擇題）
+        with METRICS.time("get_options"):
+            payload = ENGINE.options(quiz, qidx)
+        view = VIEWS.view(term_id, quiz.mode, payload["ids"])
         st.markdown(
-            f"<h2>Q{cur_pos + 1}. 「{prompt}」對應的正確中文是？</h2>",
+            f"<h2>Q{cur_pos + 1}. {view.prompt}</h2>",
             unsafe_allow_html=True
         )
-        payload = get_options_for_q(qidx, MODE_2)
         options_disp = payload["display"]
         if not options_disp:
             st.info("No options to select.")
@@ -448,91 +541,100 @@ def render_question():
             user_choice_disp = st.radio(
                 "",
                 options_disp,
-                key=f"mc_{qidx}",
+                key=f"mc_{term_id}",
                 label_visibility="collapsed"
             )
         return qidx, q, ("mc", user_choice_disp, payload)
 
     else:
-        # MODE_3: 中文 -> 英文(手寫)
-        prompt_name = q["name"].strip()
-        target_eng = q["english"].strip()
-        # 提示：首字 + … + 尾字
-        hint = ""
-        w = target_eng.strip()
-        if len(w) <= 2:
-            hint = w
-        else:
-            hint = f"{w[0]}…{w[-1]}"
-
-        st.markdown(
-            f"<h2>Q{cur_pos + 1}. 「{prompt_name}」的英文是？</h2>",
-            unsafe_allow_html=True
-        )
+        # MODE_3: 中文 -> 英文(手寫)，提示：首字 + … + 尾字
+        view = VIEWS.view(term_id, quiz.mode)
         st.markdown(
-            f"<div style='color:#555;font-size:18px;'>提示：{hint}</div>",
+            f"<h2>Q{cur_pos + 1}. {view.prompt}</h2>",
             unsafe_allow_html=True
         )
+        st.markdown(view.hint, unsafe_allow_html=True)
 
         ans = st.text_input(
             "請輸入英文術語：",
-            key=f"ti_{qidx}",
+            key=f"ti_{term_id}",
             value=st.session_state.answer_cache,
         )
         return qidx, q, ("text", ans, None)
 
 
 # ===================== 答案提交 / 下一題邏輯 =====================
-def handle_action(qidx, q, user_input):
-    mode_label = st.session_state.chosen_mode_label
-    correct_name = q["name"].strip()
-    correct_eng  = q["english"].strip()
-
-    ui_type, data, payload = user_input
+def on_action():
+    """
+    「送出答案」/「下一題」的 on_click：在作答區 fragment 重跑之前就把狀態改好，
+    按一下只重畫一次（不必處理完再 st.rerun 畫第二次）。遊戲結束時 fragment 開頭會改成整頁重跑。
+    """
+    sid = track_session()
+    try:
+        with METRICS.time("handle_action"):
+            handle_action()
+    finally:
+        get_session_store().checkin(sid)
 
-    # 判斷正確與否
-    if mode_label in (MODE_1, MODE_2):
-        chosen_disp = data
-        if chosen_disp is None:
-            st.warning("請先選擇一個選項。")
-            return
 
-        if mode_label == MODE_1:
-            # 中文 -> 英文
-            is_correct = (chosen_disp.strip().lower() == correct_eng.lower())
-            chosen_label = chosen_disp.strip()
-        else:
-            # 英文 -> 中文
-            is_correct = (chosen_disp.strip() == correct_name)
-            chosen_label = chosen_disp.strip()
+def handle_action():
+    quiz = st.session_state.quiz
+    if quiz is None or not quiz.round:
+        return
+    qidx = ENGINE.current(quiz)
+    term_id = quiz.questions[quiz.pos]
+    mode_label = st.session_state.chosen_mode_label
+    correct_name = BANK_INDEX.names[qidx]
+    correct_eng  = BANK_INDEX.englishes[qidx]
 
+    # 作答直接從這一題的 widget 值拿（on_click 時畫面還沒重跑）
+    if mode_label in (MODE_1, MODE_2):
+        data = st.session_state.get(f"mc_{term_id}")
     else:
-        # MODE_3：手寫英文
-        typed_ans = data or ""
-        chosen_label = typed_ans.strip()
-        is_correct = (chosen_label.lower() == correct_eng.lower())
+        data = st.session_state.get(f"ti_{term_id}", "")
 
     # 第一次按：送出答案
-    if not st.session_state.submitted:
-        st.session_state.submitted = True
-
-        # 紀錄一筆
-        st.session_state.records.append((
-            st.session_state.round,
-            (q["name"] if mode_label != MODE_2 else q["english"]),
-            chosen_label,
+    if not quiz.submitted:
+        if mode_label in (MODE_1, MODE_2) and data is None:
+            st.session_state.action_warning = "請先選擇一個選項。"
+            return
+
+        # 批改 + 紀錄（只存 ID，文字需要時再從題庫查）都在 ENGINE 裡
+        result = ENGINE.submit(quiz, data)
+
+        # 丟進背景寫入 queue，不等磁碟
+        get_answer_writer().submit(AnswerRow(
+            time.time(),
+            st.session_state.session_id,
+            st.session_state.get("user_name", ""),
+            st.session_state.get("user_class", ""),
+            st.session_state.get("user_seat", ""),
+            mode_label,
+            quiz.round,
             correct_eng,
             correct_name,
-            is_correct,
-            (payload["display"] if (payload and "display" in payload) else None)
+            result.chosen,
+            int(result.is_correct),
         ))
+        # 排行榜只更新自己這一筆（O(log n)），不重排全班
+        get_leaderboards().record(
+            st.session_state.get("user_class", ""),
+            st.session_state.session_id,
+            student_display_name(),
+            result.is_correct,
+        )
 
         # 產生回饋
-        if is_correct:
-            st.session_state.last_feedback = (
-                "<div class='feedback-small feedback-correct'>✅ 回答正確</div>"
-            )
-            st.session_state.score_this_round += 1
+        if result.is_correct:
+            if mode_label == MODE_3 and result.n_typos:
+                st.session_state.last_feedback = (
+                    "<div class='feedback-small feedback-correct'>✅ 回答正確（拼字小錯，正確拼法："
+                    f"{correct_eng}）</div>"
+                )
+            else:
+                st.session_state.last_feedback = (
+                    "<div class='feedback-small feedback-correct'>✅ 回答正確</div>"
+                )
         else:
             if mode_label == MODE_1:
                 st.session_state.last_feedback = (
@@ -549,44 +651,55 @@ def handle_action(qidx, q, user_input):
                     f"<div class='feedback-small feedback-wrong'>❌ Incorrect. 正確答案："
                     f"{correct_eng} ({correct_name})</div>"
                 )
+                # 你是不是想寫…：拼的字比較接近題庫裡的其他詞時提示出來
+                if result.suggestions:
+                    guesses = "、".join(
+                        f"{BANK_INDEX.englishes[j]}（{BANK_INDEX.names[j]}）" for j in result.suggestions
+                    )
+                    st.session_state.last_feedback += (
+                        f"<div class='feedback-small'>你是不是想寫：{guesses}？</div>"
+                    )
 
         # 對於模式三，保留剛剛輸入的字，讓學生看得到
         if mode_label == MODE_3:
-            st.session_state.answer_cache = chosen_label
+            st.session_state.answer_cache = result.chosen
 
-        st.rerun()
+        save_snapshot()
         return
 
     # 第二次按：下一題
     else:
-        # 避免該英文單字太快重複
-        st.session_state.used_pairs.add(correct_eng)
-
-        st.session_state.cur_idx_in_round += 1
-        st.session_state.submitted = False
         st.session_state.last_feedback = ""
         st.session_state.answer_cache = ""
 
-        # 檢查回合結束
-        if st.session_state.cur_idx_in_round >= len(st.session_state.cur_round_qidx):
-            # 判斷是否滿分 + 還有下一回合
-            full_score = (
-                st.session_state.score_this_round
-                == len(st.session_state.cur_round_qidx)
-            )
-            has_more_rounds = (st.session_state.round < MAX_ROUNDS)
-
-            if full_score and has_more_rounds:
-                st.session_state.round += 1
-                start_new_round()
-            else:
-                # 遊戲結束
-                st.session_state.round = None
+        # 回合做完時 ENGINE 會決定進下一回合或結束遊戲
+        if not ENGINE.advance(quiz):
+            record_completion()
 
-        st.rerun()
+        save_snapshot()
         return
 
 
+def student_display_name():
+    """排行榜上顯示的名字：座號 + 姓名"""
+    seat = st.session_state.get("user_seat", "").strip()
+    name = st.session_state.get("user_name", "").strip()
+    return " ".join(p for p in (f"{seat}號" if seat else "", name) if p) or "（未填）"
+
+
+def record_completion():
+    """遊戲結束：一局的完成紀錄丟進背景寫入 queue"""
+    quiz = st.session_state.quiz
+    get_answer_writer().submit(CompletionRow(
+        time.time(),
+        st.session_state.session_id,
+        st.session_state.get("user_class", ""),
+        st.session_state.chosen_mode_label,
+        len(quiz.records),
+        quiz.records.n_correct(),
+    ))
+
+
 # ===================== 畫面一：模式選擇頁（還沒鎖定模式時顯示） =====================
 def render_mode_select_page():
     st.markdown("## 選擇練習模式")
@@ -598,6 +711,10 @@ def render_mode_select_page():
         index=0,
         key="mode_pick_for_start"
     )
+    spaced = st.checkbox(
+        "間隔複習（答錯的詞會更快再出現）",
+        value=st.session_state.spaced_repetition,
+    )
 
     st.session_state.user_class = st.text_input(
         "班級", st.session_state.get("user_class", "")
@@ -609,20 +726,68 @@ def render_mode_select_page():
     if st.button("開始作答 ▶"):
         # 設定模式鎖定
         st.session_state.chosen_mode_label = chosen
+        st.session_state.spaced_repetition = spaced
         st.session_state.mode_locked = True
 
         # 重新初始化遊戲狀態（確保是乾淨第一回合）
         init_game_state()
-        start_new_round()
 
         st.rerun()
 
 
+# ===================== 作答區（fragment：送出 / 下一題只重跑這一塊） =====================
+@st.fragment
+@METRICS.timed("render_round")
+def render_round_fragment():
+    """
+    進度條、題目、回饋、按鈕與複習區。包在 st.fragment 裡，
+    按「送出答案」「下一題」時只重跑這個函式，不重跑 CSS、題庫載入、sidebar 等整頁內容。
+    """
+    # 只重跑 fragment 時不會經過 ensure_state_ready，這裡也要確認沒被逐出
+    sid = track_session()
+    try:
+        render_round_body()
+    finally:
+        get_session_store().checkin(sid)
+
+
+def render_round_body():
+    if not st.session_state.quiz.round:
+        st.rerun()
+    render_top_card()
+    render_question()
+
+    # 如果已經送出答案，顯示回饋
+    if st.session_state.quiz.submitted and st.session_state.last_feedback:
+        st.markdown(st.session_state.last_feedback, unsafe_allow_html=True)
+
+    # 主按鈕：沒交→送出答案；交完→下一題
+    action_label = "下一題" if st.session_state.quiz.submitted else "送出答案"
+    st.button(action_label, key="action_btn", on_click=on_action)
+    warning = st.session_state.pop("action_warning", "")
+    if warning:
+        st.warning(warning)
+
+    # 題目提交後的複習區（選項雙語對照）；選項直接用紀錄裡的 term ID，不再回題庫比對字串
+    records = st.session_state.quiz.records
+    if st.session_state.quiz.submitted and records:
+        view = VIEWS.view(records.term_ids[-1], records.modes[-1], records.option_ids(-1))
+        st.markdown("---")
+        st.markdown(view.answer)
+        if view.options:
+            st.markdown(view.options)
+
+
 # ===================== 畫面二：作答頁（模式已鎖定時顯示） =====================
 def render_quiz_page():
     # 側邊欄 (sidebar)
     with st.sidebar:
         st.markdown("### 你的資訊")
+        if st.session_state.get("identity_pending"):
+            if any(st.session_state.get(k, "").strip() for k in IDENTITY_KEYS):
+                st.session_state.identity_pending = False
+            else:
+                st.warning("已從網址接續上次的進度，請重新填寫姓名、班級、座號。")
         st.text_input(
             "姓名",
             st.session_state.get("user_name", ""),
@@ -642,6 +807,8 @@ def render_quiz_page():
         st.markdown("---")
         st.write("模式已鎖定：")
         st.write(st.session_state.chosen_mode_label)
+        if st.session_state.spaced_repetition:
+            st.write("間隔複習：開啟")
 
         # 重新開始整個遊戲（回到模式選擇頁）
         if st.button("🔄 重新開始（重新選模式）"):
@@ -652,69 +819,15 @@ def render_quiz_page():
             st.rerun()
 
     # ===== 主內容 =====
-    if st.session_state.round:
+    quiz = st.session_state.quiz
+    if quiz is not None and quiz.round:
         # 進行中
-        render_top_card()
-        qidx, q, user_input = render_question()
-
-        # 如果已經送出答案，顯示回饋
-        if st.session_state.submitted and st.session_state.last_feedback:
-            st.markdown(st.session_state.last_feedback, unsafe_allow_html=True)
-
-        # 主按鈕：沒交→送出答案；交完→下一題
-        action_label = "下一題" if st.session_state.submitted else "送出答案"
-        if st.button(action_label, key="action_btn"):
-            handle_action(qidx, q, user_input)
-
-        # 題目提交後的複習區（選項雙語對照）
-        if st.session_state.submitted and st.session_state.records:
-            last = st.session_state.records[-1]
-            # last = (round, prompt, chosen_label, correct_eng, correct_name, is_correct, opts_disp)
-            _, _, _, correct_eng, correct_name, _, opts_disp = last
-            mode_now = st.session_state.chosen_mode_label
-
-            st.markdown("---")
-
-            if mode_now == MODE_1:
-                st.markdown(
-                    f"**正確英文術語：{correct_eng}（{correct_name}）**"
-                )
-            elif mode_now == MODE_2:
-                st.markdown(
-                    f"**正確中文名稱：{correct_name}（{correct_eng}）**"
-                )
-            else:
-                st.markdown(
-                    f"**正確英文術語：{correct_eng}（{correct_name}）**"
-                )
-
-            if opts_disp:
-                st.markdown("**本題兩個選項：**")
-                bipairs = []
-                for opt in opts_disp:
-                    match_pair = None
-                    for it in QUESTION_BANK:
-                        n = it["name"].strip()
-                        e = it["english"].strip()
-                        if opt.strip().lower() == e.lower() or opt.strip() == n:
-                            match_pair = (n, e)
-                            break
-                    if match_pair:
-                        n, e = match_pair
-                        if mode_now == MODE_1:
-                            bipairs.append(f"{e}（{n}）")
-                        elif mode_now == MODE_2:
-                            bipairs.append(f"{n}（{e}）")
-                        else:
-                            bipairs.append(f"{e}（{n}）")
-                    else:
-                        bipairs.append(opt.strip())
-                st.markdown("、".join(bipairs))
+        render_round_fragment()
 
     else:
         # 回合都打完了，顯示總結畫面
-        total_answered = len(st.session_state.records)
-        total_correct = sum(1 for rec in st.session_state.records if rec[5])
+        total_answered = len(quiz.records) if quiz else 0
+        total_correct = quiz.records.n_correct() if quiz else 0
         acc = (total_correct / total_answered * 100) if total_answered else 0.0
 
         st.subheader("📊 總結")
@@ -734,7 +847,6 @@ def render_quiz_page():
         if st.button("🔄 再玩一次（同模式）"):
             # 同一個模式下再來一輪
             init_game_state()
-            start_new_round()
             st.rerun()
 
         if st.button("🧪 選別的模式"):
@@ -745,10 +857,195 @@ def render_quiz_page():
             st.rerun()
 
 
+# ===================== 畫面三：老師統計頁（?view=teacher） =====================
+def render_teacher_page():
+    st.markdown("## 老師統計")
+
+    if not teacher_unlocked("teacher_code"):
+        st.stop()
+
+    render_leaderboard()
+
+    # 只讀彙總表：不管累積多少作答紀錄，查詢量都只跟結果筆數有關
+    with closing(connect(RESULTS_DB)) as conn:
+        summary = class_summary(conn)
+        if not summary:
+            st.info("目前還沒有作答紀錄。")
+            return
+
+        st.markdown("### 各班正確率")
+        st.dataframe(
+            [
+                {
+                    "班級": c or "（未填）",
+                    "模式": m,
+                    "作答題數": answered,
+                    "答對題數": correct,
+                    "正確率": f"{correct / answered * 100:.1f}%" if answered else "-",
+                    "完成人次": completions,
+                }
+                for c, m, answered, correct, completions in summary
+            ],
+            hide_index=True,
+        )
+
+        st.markdown("### 錯誤率最高的詞")
+        pairs = [(c, m) for c, m, *_ in summary]
+        c, m = st.selectbox(
+            "班級 / 模式",
+            pairs,
+            format_func=lambda p: f"{p[0] or '（未填）'}｜{p[1]}",
+        )
+        rows = term_error_rates(conn, c, m, limit=30)
+        st.dataframe(
+            [
+                {
+                    "英文": e,
+                    "中文": n,
+                    "作答次數": answered,
+                    "錯誤率": f"{(answered - correct) / answered * 100:.1f}%",
+                }
+                for e, n, answered, correct in rows
+            ],
+            hide_index=True,
+        )
+
+    st.markdown("### 下載作答紀錄")
+    exports = get_export_cache()
+    col_x, col_c = st.columns(2)
+    with col_x:
+        st.download_button(
+            "Excel（每班一個工作表）",
+            data=lambda: read_export(exports, "xlsx"),
+            file_name="zoology_results.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+    with col_c:
+        st.download_button(
+            "CSV（全部班級）",
+            data=lambda: read_export(exports, "csv"),
+            file_name="zoology_results.csv",
+            mime="text/csv",
+        )
+
+
+def read_export(exports, fmt):
+    """
+    按下下載時才執行（另一個執行緒）：資料有變才重建匯出檔，讀出來給瀏覽器。
+    讀完馬上關檔，之後清掉舊版匯出檔時不會被還開著的檔案卡住（Streamlit 不論給什麼都會整份讀進記憶體）。
+    """
+    with closing(connect(RESULTS_DB)) as conn:
+        path = exports.get(conn, fmt)
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@st.fragment(run_every=LEADERBOARD_REFRESH)
+def render_leaderboard():
+    """即時排行榜：只讀每班已排好的前幾名，每隔幾秒自己重跑這一塊"""
+    boards = get_leaderboards()
+    classes = boards.classes()
+    st.markdown("### 即時排行榜")
+    if not classes:
+        st.caption("開始作答後這裡會即時顯示各班排名。")
+        return
+    c = st.selectbox("班級", classes, format_func=lambda x: x or "（未填）", key="leaderboard_class")
+    board = boards.board(c)
+    st.dataframe(
+        [
+            {
+                "名次": s.rank,
+                "學生": s.display,
+                "答對": s.correct,
+                "作答": s.answered,
+                "正確率": f"{s.accuracy * 100:.1f}%",
+            }
+            for s in board.top(10)
+        ],
+        hide_index=True,
+    )
+    st.caption(f"共 {len(board)} 人作答")
+    if st.button("重新計分（這個班）", key="leaderboard_reset"):
+        boards.reset(c)
+        st.rerun(scope="fragment")
+
+
+# ===================== 管理面板：效能統計（?admin=1） =====================
+PHASE_LABELS = {
+    "run": "整次 rerun",
+    "load_question_bank": "載入題庫",
+    "ensure_state_ready": "整理 session",
+    "sync_session_with_bank": "題庫換版同步",
+    "render": "畫面（含以下）",
+    "render_round": "作答區 fragment",
+    "get_options": "出選項",
+    "handle_action": "處理按鈕",
+}
+
+
+def render_admin_panel():
+    """sidebar 裡的效能統計：目前這版題庫的載入統計，以及最近一分鐘各階段的次數與延遲分位數"""
+    with st.sidebar.expander("⏱ 效能統計", expanded=True):
+        if not teacher_unlocked("admin_code"):
+            return
+        # 每張工作表的列數 / 保留 / 重複 / 耗時（logger.info 在 Streamlit 預設的 log 等級下看不到）
+        st.caption(f"題庫第 {BANK_INDEX.version} 版，共 {len(BANK_INDEX)} 題")
+        if loaded.stats:
+            st.code(format_stats(loaded.stats), language=None)
+
+        window = METRICS.window()
+        if not window:
+            st.write("還沒有資料。")
+            return
+
+        def ms(v):
+            return f"{v * 1000:.2f}" if v is not None else "-"
+
+        st.caption(f"最近 {METRICS.slots * METRICS.slot_seconds:.0f} 秒（毫秒）")
+        st.dataframe(
+            [
+                {
+                    "階段": PHASE_LABELS.get(phase, phase),
+                    "次數": w["count"],
+                    "平均": ms(w["mean"]),
+                    "p50": ms(w["p50"]),
+                    "p95": ms(w["p95"]),
+                    "p99": ms(w["p99"]),
+                }
+                for phase, w in sorted(window.items(), key=lambda kv: list(PHASE_LABELS).index(kv[0])
+                                       if kv[0] in PHASE_LABELS else len(PHASE_LABELS))
+            ],
+            hide_index=True,
+        )
+        st.download_button("下載 Prometheus 格式", METRICS.to_prometheus(), f"{METRICS_FILE}.prom")
+
+        views = VIEWS.stats()
+        st.caption(
+            f"畫面片段快取：命中率 {views['hit_rate']:.1%}（{views['hits']} / {views['hits'] + views['misses']}），"
+            f"{views['size']} / {views['maxsize']} 筆，逐出 {views['evictions']} 筆"
+        )
+
+
 # ===================== 頁面路由 =====================
-if not st.session_state.mode_locked:
-    # 還沒選模式 → 顯示模式選擇頁
-    render_mode_select_page()
-else:
-    # 已經選過模式 → 顯示正式答題頁
-    render_quiz_page()
+try:
+    # 題庫若剛熱更新過，先把這個 session 的題目對到新版
+    with METRICS.time("sync_session_with_bank"):
+        sync_session_with_bank()
+
+    if st.query_params.get("admin"):
+        render_admin_panel()
+
+    with METRICS.time("render"):
+        if st.query_params.get("view") == "teacher":
+            # 老師統計頁
+            render_teacher_page()
+        elif not st.session_state.mode_locked:
+            # 還沒選模式 → 顯示模式選擇頁
+            render_mode_select_page()
+        else:
+            # 已經選過模式 → 顯示正式答題頁
+            render_quiz_page()
+finally:
+    get_session_store().checkin(ACTIVE_SID)
+    # st.rerun / st.stop 中斷時也記一筆
+    METRICS.observe("run", time.perf_counter() - RUN_T0)
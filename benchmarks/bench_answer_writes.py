@@ -0,0 +1,77 @@
+"""
+作答紀錄寫入的吞吐量：多個模擬 session 同時作答，
+比較「每題直接 INSERT + commit」與 AnswerWriter（write-behind 批次寫入）。
+
+回報每次 submit 的延遲（也就是學生按鈕要等多久）與整體每秒寫入筆數。
+
+用法：
+    python benchmarks/bench_answer_writes.py --sessions 200 --answers 30
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from zoology.storage import INSERT_SQL, AnswerRow, AnswerWriter, connect  # noqa: E402
+
+
+def make_row(s, a):
+    return AnswerRow(time.time(), f"session-{s}", f"student{s}", "701", str(s % 40),
+                     "模式一：中文 ➜ 英文", a // 10 + 1, f"Term {a}", f"名稱{a}", f"Term {a}", a % 3 != 0)
+
+
+def run(label, submit, finish, sessions, answers):
+    latencies = [[] for _ in range(sessions)]
+
+    def student(s):
+        lat = latencies[s]
+        for a in range(answers):
+            t0 = time.perf_counter()
+            submit(make_row(s, a))
+            lat.append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=student, args=(s,)) for s in range(sessions)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    finish()
+    elapsed = time.perf_counter() - t0
+
+    flat = sorted(x for lat in latencies for x in lat)
+    q = statistics.quantiles(flat, n=100)
+    print(f"{label:14s} {len(flat) / elapsed:10.0f} rows/s   submit p50 {q[49] * 1e6:8.1f} us"
+          f"   p99 {q[98] * 1e6:8.1f} us   max {flat[-1] * 1e3:7.1f} ms")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--sessions", type=int, default=200)
+    ap.add_argument("--answers", type=int, default=30)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = connect(os.path.join(tmp, "sync.sqlite3"))
+        lock = threading.Lock()
+
+        def sync_submit(row):
+            with lock, conn:
+                conn.execute(INSERT_SQL, row)
+
+        print(f"sessions: {args.sessions}  answers/session: {args.answers}")
+        run("sync insert", sync_submit, lambda: None, args.sessions, args.answers)
+        conn.close()
+
+        writer = AnswerWriter(os.path.join(tmp, "behind.sqlite3"))
+        run("write-behind", writer.submit, writer.flush, args.sessions, args.answers)
+        writer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+zoology.api 的壓力測試：在本機起一個 uvicorn（子 process），用 asyncio 模擬 --clients 個學生同時打 API。
+
+每個虛擬學生用一條 keep-alive 連線：開局 → (取題目 → 送答案 → 下一題) 直到遊戲結束 → 再開一局，
+持續 --duration 秒。依 --accuracy 決定答對或答錯（選擇題挑正確 / 錯誤選項，模式三打正確英文或亂打）。
+回報每秒請求數與延遲 p50 / p95 / p99（延遲含 client 端排隊，client 與 server 在同一台機器上）。
+
+用法：
+    python benchmarks/bench_api.py --clients 50 --duration 10
+    python benchmarks/bench_api.py --clients 200 --duration 20 -o api.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from zoology.loader import build_loaded_bank  # noqa: E402
+
+BANK_FILE = "Zoology_Terms_Bilingual.xlsx"
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Client:
+    """一條 keep-alive 的 HTTP/1.1 連線（只處理有 Content-Length 的 JSON 回應）"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method, path, body=None):
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n\r\n".encode("ascii") + data
+        )
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        payload = json.loads(await self.reader.readexactly(length)) if length else None
+        return status, payload
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def student(n, host, port, answers_by_prompt, accuracy, deadline, samples, errors):
+    rng = random.Random(n)
+    mode = n % 3
+    client = Client(host, port)
+    await client.connect()
+    clock = time.perf_counter
+
+    async def call(method, path, body=None):
+        t0 = clock()
+        status, payload = await client.request(method, path, body)
+        samples.append(clock() - t0)
+        if status >= 400:
+            raise RuntimeError(f"{method} {path} -> {status} {payload}")
+        return payload
+
+    try:
+        while time.monotonic() < deadline:
+            q = await call("POST", "/api/sessions", {"mode": mode, "name": f"s{n}", "class": f"7{n % 5:02d}"})
+            sid = q["session_id"]
+            while not q["finished"] and time.monotonic() < deadline:
+                q = await call("GET", f"/api/sessions/{sid}/question")
+                right = answers_by_prompt[mode].get(q["prompt"], "")
+                if rng.random() >= accuracy:
+                    wrong = [o for o in q.get("options", ()) if o != right]
+                    right = rng.choice(wrong) if wrong else "xyz"
+                await call("POST", f"/api/sessions/{sid}/answer", {"answer": right})
+                q = await call("POST", f"/api/sessions/{sid}/next")
+            if q["finished"]:
+                await call("GET", f"/api/sessions/{sid}/summary")
+    except Exception as e:  # 壓測要跑完，單一學生出錯只記下來
+        errors.append(f"{type(e).__name__}: {e}")
+    finally:
+        client.close()
+
+
+def percentiles(samples):
+    q = statistics.quantiles(samples, n=100)
+    return {"p50_ms": round(q[49] * 1e3, 2), "p95_ms": round(q[94] * 1e3, 2),
+            "p99_ms": round(q[98] * 1e3, 2), "max_ms": round(max(samples) * 1e3, 2)}
+
+
+async def run(args, port, answers_by_prompt):
+    samples, errors = [], []
+    deadline = time.monotonic() + args.duration
+    t0 = time.perf_counter()
+    await asyncio.gather(*(
+        student(n, "127.0.0.1", port, answers_by_prompt, args.accuracy, deadline, samples, errors)
+        for n in range(args.clients)
+    ))
+    return time.perf_counter() - t0, samples, errors
+
+
+async def wait_ready(port, timeout=30):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        try:
+            c = Client("127.0.0.1", port)
+            await c.connect()
+            status, _ = await c.request("GET", "/api/health")
+            c.close()
+            if status == 200:
+                return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise SystemExit("API server did not start")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--clients", type=int, default=50, help="同時作答的虛擬學生數")
+    ap.add_argument("--duration", type=float, default=10.0, help="壓測秒數")
+    ap.add_argument("--accuracy", type=float, default=0.8)
+    ap.add_argument("--no-db", action="store_true", help="server 不寫作答紀錄")
+    ap.add_argument("-o", "--output", help="JSON 另存到這個檔案")
+    args = ap.parse_args()
+
+    bank = build_loaded_bank(os.path.join(ROOT, BANK_FILE)).index
+    # 題目 → 正確答案（模式一：中文 → 英文；模式二：英文 → 中文；模式三同模式一）
+    by_name = dict(zip(bank.names, bank.englishes))
+    answers_by_prompt = {0: by_name, 1: dict(zip(bank.englishes, bank.names)), 2: by_name}
+
+    workdir = tempfile.mkdtemp(prefix="zoology-api-")
+    shutil.copy(os.path.join(ROOT, BANK_FILE), workdir)
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "zoology.api", "--port", str(port), "--db", "" if args.no_db else "results.sqlite3"],
+        cwd=workdir, env={**os.environ, "PYTHONPATH": ROOT},
+    )
+    try:
+        asyncio.run(wait_ready(port))
+        elapsed, samples, errors = asyncio.run(run(args, port, answers_by_prompt))
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "config": {"clients": args.clients, "duration_s": args.duration, "accuracy": args.accuracy,
+                   "write_results": not args.no_db, "bank_terms": len(bank)},
+        "requests": len(samples),
+        "requests_per_s": round(len(samples) / elapsed, 1),
+        "latency": percentiles(samples) if len(samples) > 1 else None,
+        "errors": errors[:20],
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+多 worker 部署的題庫記憶體與啟動時間：同時開 --workers 個 process，每個各自取得題庫後做一輪查詢，
+比較
+  copy   : 每個 worker 自己 build_loaded_bank（snapshot 已建好的暖啟動，也就是目前最快的路徑）
+  shared : loader 先 publish 一次，worker 用 zoology.shared_bank.attach 掛上 mmap 檔
+回報每個 worker 的啟動秒數（取得題庫）、查詢秒數，以及所有 worker 加起來的 PSS（共用分頁按 process 數平分，
+加總就是實際用掉的記憶體）與每個 worker 的私有記憶體（USS）。記憶體扣掉只 import 模組、不載題庫的空 worker。
+需要 Linux 的 /proc/<pid>/smaps_rollup。
+
+用法：
+    python benchmarks/bench_bank_workers.py --synthetic 100000 --workers 1 2 4 8
+    python benchmarks/bench_bank_workers.py --xlsx Zoology_Terms_Bilingual.xlsx --workers 4
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+# worker 本體：python bench_bank_workers.py --worker <mode> <path> <lookups>
+WORKER_MODES = ("empty", "copy", "shared")
+
+
+def memory_kb():
+    out = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                out[parts[0].rstrip(":")] = int(parts[1])
+    return {"rss": out["Rss"], "pss": out["Pss"], "uss": out["Private_Clean"] + out["Private_Dirty"]}
+
+
+def worker(mode, path, lookups):
+    from zoology.bank import norm_english
+    from zoology.loader import build_loaded_bank
+    from zoology.shared_bank import attach
+
+    t0 = time.perf_counter()
+    if mode == "copy":
+        loaded = build_loaded_bank(path)
+    elif mode == "shared":
+        loaded = attach(path)
+    else:
+        loaded = None
+    startup = time.perf_counter() - t0
+
+    query = 0.0
+    if loaded is not None:
+        bank = loaded.index
+        rng = random.Random(0)
+        n = len(bank)
+        t0 = time.perf_counter()
+        for _ in range(lookups):
+            i = rng.randrange(n)
+            eng = bank.englishes[i]
+            assert bank.by_english.get(norm_english(eng)) is not None
+            bank.term(bank.term_ids[i])
+            bank.is_correct_name(i, bank.names[i])
+        query = time.perf_counter() - t0
+    print(json.dumps({"startup_s": startup, "query_s": query, **memory_kb()}), flush=True)
+    sys.stdin.read()   # 等所有 worker 都量完才結束，PSS 才是大家一起開著的值
+
+
+def run_workers(mode, path, count, lookups):
+    procs = [
+        subprocess.Popen([sys.executable, __file__, "--worker", mode, path, str(lookups)],
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(count)
+    ]
+    results = [json.loads(p.stdout.readline()) for p in procs]
+    for p in procs:
+        p.stdin.close()
+        p.wait()
+    return results
+
+
+def synthetic_xlsx(path, n):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(["name", "english"])
+    for i in range(n):
+        ws.append([f"動物名稱{i}", f"Zoological term number {i}"])
+    wb.save(path)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--worker", nargs=3, help=argparse.SUPPRESS)
+    ap.add_argument("--synthetic", type=int, default=100_000, help="產生 N 題的題庫（給 --xlsx 時不用）")
+    ap.add_argument("--xlsx", help="改用這個題庫檔")
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    ap.add_argument("--lookups", type=int, default=20_000, help="每個 worker 查幾題")
+    ap.add_argument("-k", type=int, default=0, help="共用檔附的相似詞表每列幾個（大題庫建表很久，預設不附）")
+    ap.add_argument("-o", "--output", help="JSON 另存到這個檔案")
+    args = ap.parse_args()
+
+    if args.worker:
+        mode, path, lookups = args.worker
+        worker(mode, path, int(lookups))
+        return
+
+    from zoology.loader import build_loaded_bank
+    from zoology.shared_bank import publish
+
+    workdir = tempfile.mkdtemp(prefix="zoology-workers-")
+    try:
+        xlsx = os.path.join(workdir, "bank.xlsx")
+        if args.xlsx:
+            shutil.copy(args.xlsx, xlsx)
+        else:
+            synthetic_xlsx(xlsx, args.synthetic)
+        t0 = time.perf_counter()
+        loaded = build_loaded_bank(xlsx)        # 順便建好 snapshot，copy 組量的是暖啟動
+        cold = time.perf_counter() - t0
+        shm_dir = "/dev/shm" if os.path.isdir("/dev/shm") else workdir
+        shared = os.path.join(shm_dir, f"zoology-bench-{os.getpid()}.zqb")
+        t0 = time.perf_counter()
+        size = publish(loaded, shared, args.k)
+        publish_s = time.perf_counter() - t0
+
+        report = {
+            "config": {"terms": len(loaded.index), "lookups": args.lookups, "k": args.k},
+            "cold_load_s": round(cold, 3),
+            "publish_s": round(publish_s, 3),
+            "shared_file_kb": round(size / 1024, 1),
+            "runs": [],
+        }
+        for count in args.workers:
+            base = run_workers("empty", xlsx, count, 0)
+            base_pss = sum(r["pss"] for r in base)
+            base_uss = sum(r["uss"] for r in base) / count
+            for mode, path in (("copy", xlsx), ("shared", shared)):
+                res = run_workers(mode, path, count, args.lookups)
+                report["runs"].append({
+                    "mode": mode,
+                    "workers": count,
+                    "startup_ms": round(1e3 * sum(r["startup_s"] for r in res) / count, 1),
+                    "query_ms": round(1e3 * sum(r["query_s"] for r in res) / count, 1),
+                    "total_pss_mb": round((sum(r["pss"] for r in res) - base_pss) / 1024, 1),
+                    "uss_per_worker_mb": round((sum(r["uss"] for r in res) / count - base_uss) / 1024, 1),
+                })
+        os.remove(shared)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+模式三批次批改（zoology.grading）的速度：產生 N 筆假作答（正確、拼字小錯、亂寫、空白、
+題庫外題目混在一起）的 CSV，比較 grade_sheets 與「每一列呼叫一次 TypoIndex.grade」的 Python 迴圈，
+並確認兩邊的對錯結果完全一致。
+
+用法：
+    python benchmarks/bench_batch_grading.py --answers 100000
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from zoology.fuzzy import TypoIndex  # noqa: E402
+from zoology.grading import grade_sheets  # noqa: E402
+from zoology.loader import build_loaded_bank  # noqa: E402
+
+
+def mutate(word, rng):
+    """隨機改 1~2 個字元"""
+    chars = list(word)
+    for _ in range(rng.randint(1, 2)):
+        i = rng.randrange(len(chars))
+        chars[i] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+    return "".join(chars)
+
+
+def make_answers(path, bank, n, students, rng):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["學號", "班級", "題目", "作答"])
+        for i in range(n):
+            q = rng.randrange(len(bank))
+            eng = bank.englishes[q]
+            r = rng.random()
+            if r < 0.6:
+                ans = eng if rng.random() < 0.5 else f"  {eng.upper()} "
+            elif r < 0.8:
+                ans = mutate(eng, rng)
+            elif r < 0.9:
+                ans = bank.englishes[rng.randrange(len(bank))]
+            elif r < 0.97:
+                ans = ""
+            else:
+                ans = "xyz"
+            prompt = bank.names[q] if rng.random() > 0.005 else "不在題庫裡的題目"
+            w.writerow([f"S{i % students:05d}", f"70{i % 9 + 1}", prompt, ans])
+
+
+def loop_grade(path, bank, typo_index):
+    correct = 0
+    with open(path, encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            q = bank.by_name.get(row["題目"].strip())
+            if q is not None and typo_index.grade(q, row["作答"])[0]:
+                correct += 1
+    return correct
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--xlsx", default=os.path.join(os.path.dirname(__file__), "..", "Zoology_Terms_Bilingual.xlsx"))
+    ap.add_argument("--answers", type=int, default=100_000)
+    ap.add_argument("--students", type=int, default=2_000)
+    args = ap.parse_args()
+
+    bank = build_loaded_bank(args.xlsx).index
+    typo_index = TypoIndex(bank)
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "answers.csv")
+        make_answers(src, bank, args.answers, args.students, random.Random(0))
+
+        t0 = time.perf_counter()
+        expected = loop_grade(src, bank, typo_index)
+        loop_s = time.perf_counter() - t0
+
+        print(f"answers: {args.answers}  bank size: {len(bank)}")
+        print(f"per-row loop            {loop_s:7.2f} s   correct {expected}   (no output files)")
+        for details in (False, True):
+            result = grade_sheets([src], bank, typo_index, os.path.join(tmp, "out"), details=details)
+            label = "grade_sheets + details" if details else "grade_sheets"
+            print(f"{label:23s} {result['seconds']:7.2f} s   correct {result['correct']}")
+            if result["correct"] != expected:
+                raise SystemExit("results differ")
+
+
+if __name__ == "__main__":
+    main()
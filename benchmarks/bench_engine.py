@@ -0,0 +1,93 @@
+"""
+不經過 Streamlit，直接用 zoology.engine 模擬大量學生作答，量出題 / 批改規則本身的吞吐量。
+
+每個模擬學生：開一局 → 每題取選項、送出（依 --accuracy 答對或答錯）、下一題，直到遊戲結束再開新局。
+回報各模式每分鐘可處理的作答數，以及 submit() 單次耗時。
+
+用法：
+    python benchmarks/bench_engine.py --answers 200000
+    python benchmarks/bench_engine.py --synthetic 5000 --spaced
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from zoology.bank import BankIndex  # noqa: E402
+from zoology.engine import MODE_EN, MODE_TYPED, MODE_ZH, QuizEngine  # noqa: E402
+from zoology.fuzzy import TypoIndex  # noqa: E402
+from zoology.loader import build_loaded_bank  # noqa: E402
+from zoology.neighbors import PendingNeighborTable  # noqa: E402
+
+MODE_NAMES = {MODE_EN: "mode1 (zh->en)", MODE_ZH: "mode2 (en->zh)", MODE_TYPED: "mode3 (typed)"}
+
+
+def synthetic_bank(n):
+    return [{"name": f"名稱{i}", "english": f"Term number {i}"} for i in range(n)]
+
+
+def simulate(engine, mode, answers, accuracy, spaced, rng):
+    """回傳 (總秒數, 花在 submit 的秒數, 遊戲局數)"""
+    bank = engine.bank
+    s = engine.new_session(mode, spaced)
+    games = 1
+    submit_time = 0.0
+    clock = time.perf_counter
+    t0 = clock()
+    for _ in range(answers):
+        qidx = engine.current(s)
+        right = rng.random() < accuracy
+        if mode == MODE_TYPED:
+            answer = bank.englishes[qidx] if right else bank.englishes[qidx][:-2] + "zz"
+        else:
+            display = engine.options(s, qidx)["display"]
+            correct = bank.englishes[qidx] if mode == MODE_EN else bank.names[qidx]
+            wrong = [d for d in display if d != correct]
+            answer = correct if right or not wrong else wrong[0]
+        t1 = clock()
+        engine.submit(s, answer)
+        submit_time += clock() - t1
+        if not engine.advance(s):
+            s = engine.new_session(mode, spaced, s.scheduler)
+            games += 1
+    return clock() - t0, submit_time, games
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--xlsx", default=os.path.join(os.path.dirname(__file__), "..", "Zoology_Terms_Bilingual.xlsx"))
+    ap.add_argument("--synthetic", type=int, default=0, help="改用 N 筆假資料")
+    ap.add_argument("--answers", type=int, default=200_000, help="每個模式模擬幾次作答")
+    ap.add_argument("--accuracy", type=float, default=0.8)
+    ap.add_argument("--spaced", action="store_true", help="用間隔複習出題")
+    ap.add_argument("--options", type=int, default=2, help="選擇題每題選項數")
+    args = ap.parse_args()
+
+    if args.synthetic:
+        bank = BankIndex(synthetic_bank(args.synthetic))
+    else:
+        bank = build_loaded_bank(args.xlsx).index
+
+    neighbors = PendingNeighborTable(bank)
+    neighbors.thread.join()
+    engine = QuizEngine(
+        bank,
+        typo_index=TypoIndex(bank),
+        neighbors=neighbors,
+        options_per_mode={MODE_EN: args.options, MODE_ZH: args.options},
+    )
+
+    print(f"bank size: {len(bank)}  answers/mode: {args.answers}  spaced: {args.spaced}")
+    for mode in (MODE_EN, MODE_ZH, MODE_TYPED):
+        elapsed, in_submit, games = simulate(
+            engine, mode, args.answers, args.accuracy, args.spaced, random.Random(mode)
+        )
+        print(f"{MODE_NAMES[mode]:16s} {args.answers / elapsed * 60 / 1e6:6.2f} M answers/min"
+              f"   submit {in_submit / args.answers * 1e6:6.2f} us   games {games}")
+
+
+if __name__ == "__main__":
+    main()
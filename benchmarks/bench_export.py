@@ -0,0 +1,105 @@
+"""
+老師下載作答紀錄：串流匯出（zoology.export）vs 先組 DataFrame 再 to_excel 的時間與記憶體。
+
+在暫存目錄建一個有 --rows 筆作答紀錄的 SQLite，分別量：
+  naive    : pd.read_sql 整張表 → 每班 to_excel（openpyxl 一般模式）
+  streamed : ExportCache.get()（write-only 工作表 / CSV，逐批 fetchmany）
+  cached   : 資料沒變時再按一次下載（只查資料版本）
+時間與記憶體分開跑兩次：tracemalloc 開著會讓時間慢好幾倍，記憶體是它量到的 Python 配置峰值。
+
+用法：
+    python benchmarks/bench_export.py --rows 200000
+    python benchmarks/bench_export.py --rows 1000000 --skip-naive
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import closing
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from zoology.export import ExportCache  # noqa: E402
+from zoology.storage import AnswerRow, apply_batch, connect  # noqa: E402
+
+
+def fill(conn, rows, classes, rng):
+    t0 = time.time()
+    batch = []
+    for i in range(rows):
+        english = f"Term {rng.randrange(400)}"
+        batch.append(AnswerRow(
+            t0 + i, f"s{i // 30}", f"學生{i // 30 % 40}", f"{7 + i % classes // 10}{i % classes % 10:02d}",
+            str(i // 30 % 40), "模式三：中文 ➜ 手寫英文", 1 + i % 3, english, "名稱", english, rng.random() < 0.7,
+        ))
+        if len(batch) == 10_000:
+            apply_batch(conn, batch)
+            batch = []
+    if batch:
+        apply_batch(conn, batch)
+
+
+def naive_xlsx(conn, path):
+    import pandas as pd
+    df = pd.read_sql("SELECT * FROM answers", conn)
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for c, part in df.groupby("user_class"):
+            part.to_excel(writer, sheet_name=c or "未填班級", index=False)
+
+
+def measure(fn):
+    """fn 每次要重建一樣的東西；回傳 (秒數, 配置峰值)"""
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rows", type=int, default=200_000)
+    ap.add_argument("--classes", type=int, default=20)
+    ap.add_argument("--skip-naive", action="store_true", help="不跑 DataFrame 版本（筆數很多時很慢）")
+    args = ap.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="zoology-export-")
+    try:
+        db = os.path.join(workdir, "results.sqlite3")
+        with closing(connect(db)) as conn:
+            fill(conn, args.rows, args.classes, random.Random(0))
+        print(f"rows: {args.rows}  classes: {args.classes}")
+
+        def report(label, elapsed, peak, path=None):
+            size = f"  file {os.path.getsize(path) / 2**20:6.1f} MB" if path else ""
+            print(f"{label:16s} {elapsed:7.2f} s   peak {peak / 2**20:7.1f} MB{size}")
+
+        if not args.skip_naive:
+            path = os.path.join(workdir, "naive.xlsx")
+            with closing(connect(db)) as conn:
+                report("naive xlsx", *measure(lambda: naive_xlsx(conn, path)), path)
+
+        for fmt in ("xlsx", "csv"):
+            with closing(connect(db)) as conn:
+                out = {}
+
+                def build():
+                    # 每次用新的匯出目錄，量到的是完整重建
+                    out["cache"] = ExportCache(tempfile.mkdtemp(dir=workdir))
+                    out["path"] = out["cache"].get(conn, fmt)
+
+                report(f"streamed {fmt}", *measure(build), out["path"])
+                report(f"cached {fmt}", *measure(lambda: out["cache"].get(conn, fmt)))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
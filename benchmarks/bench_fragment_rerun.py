@@ -0,0 +1,96 @@
+"""
+量「送出答案 / 下一題」每次點擊的來回延遲與 server CPU：
+  fragment : 照瀏覽器的行為，點擊帶 fragment_id，只重跑作答區
+  full     : 點擊不帶 fragment_id，每次整頁重跑一次（等同作答區不包 st.fragment）
+兩者的狀態都在按鈕的 on_click 裡改好，每次點擊只跑一次；一局結束那一下 fragment 會再整頁重跑一次（換總結畫面）。
+
+會自己起一個 headless streamlit server（Linux：server CPU 從 /proc 讀）。
+
+用法：
+    python benchmarks/bench_fragment_rerun.py --clicks 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from streamlit_ws_client import StreamlitClient  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+def proc_cpu_seconds(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def start_server(port):
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "Zoology_app.py",
+         "--server.headless", "true", "--server.port", str(port),
+         "--server.enableXsrfProtection", "false", "--browser.gatherUsageStats", "false"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f"http://localhost:{port}/_stcore/health", timeout=1)
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("streamlit server did not start")
+
+
+async def click_loop(url, clicks, use_fragment, pid):
+    c = StreamlitClient(url)
+    await c.connect()
+    await c.run()
+    await c.run(trigger=c.find("button", label="開始作答 ▶"))
+
+    latencies = []
+    cpu0 = proc_cpu_seconds(pid)
+    for _ in range(clicks):
+        radio = c.find("radio", "mc_")
+        if radio is not None:
+            c.set_value(radio, string_value=radio.options[0])
+        btn = c.find("button", "action_btn")
+        if btn is None:
+            # 一局結束：回到模式選擇頁重新開始
+            await c.run(trigger=c.find("button", label="🧪 選別的模式"))
+            await c.run(trigger=c.find("button", label="開始作答 ▶"))
+            continue
+        dt, _ = await c.run(trigger=btn, fragment_id=btn.fragment_id if use_fragment else None)
+        latencies.append(dt)
+    cpu = proc_cpu_seconds(pid) - cpu0
+    await c.close()
+    return latencies, cpu
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--clicks", type=int, default=200)
+    ap.add_argument("--port", type=int, default=8599)
+    args = ap.parse_args()
+
+    proc = start_server(args.port)
+    try:
+        url = f"ws://localhost:{args.port}"
+        for label, use_fragment in (("full rerun", False), ("fragment", True)):
+            lat, cpu = asyncio.run(click_loop(url, args.clicks, use_fragment, proc.pid))
+            q = statistics.quantiles(lat, n=100)
+            print(f"{label:11s} clicks {len(lat):4d}  server CPU {cpu / len(lat) * 1e3:6.2f} ms/click"
+                  f"  latency p50 {q[49] * 1e3:6.2f} ms  p95 {q[94] * 1e3:6.2f} ms")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+zoology.leaderboard 的壓力測試：--students 個學生執行緒同時作答（每人 --answers 題），
+另外 --readers 個執行緒一直看前 10 名（模擬多位老師 / 投影畫面的 fragment 每隔幾秒重畫）。
+
+比較兩種做法：
+  naive    : 一個 dict 記每個學生的分數，看排行榜時整班排序取前 10 名（讀的時候拿同一把鎖，才不會排序到一半被改）
+  skiplist : ClassBoard（寫入 O(log n)，讀前 k 名不拿鎖）
+回報寫入吞吐量、單次寫入與讀取延遲 p50 / p99（含等鎖）。
+
+用法：
+    python benchmarks/bench_leaderboard.py
+    python benchmarks/bench_leaderboard.py --students 1000 --answers 200 --readers 4 -o leaderboard.json
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from zoology.leaderboard import ClassBoard  # noqa: E402
+
+
+class NaiveBoard:
+    """對照組：每次看排行榜都把全班重排一次"""
+
+    def __init__(self):
+        self._scores = {}
+        self._lock = threading.Lock()
+
+    def record(self, student, display, is_correct):
+        with self._lock:
+            correct, answered = self._scores.get(student, (0, 0))
+            self._scores[student] = (correct + (1 if is_correct else 0), answered + 1)
+
+    def top(self, k):
+        with self._lock:
+            ranked = sorted(self._scores.items(), key=lambda kv: (-kv[1][0], kv[1][1]))
+        return ranked[:k]
+
+
+def run(board, args):
+    start = threading.Barrier(args.students + args.readers + 1)
+    writers_done = threading.Event()
+    latencies = [[] for _ in range(args.students)]
+    reads = [[] for _ in range(args.readers)]
+    clock = time.perf_counter
+
+    def student(n):
+        rng = random.Random(n)
+        out = latencies[n]
+        name = f"s{n:04d}"
+        start.wait()
+        for _ in range(args.answers):
+            t0 = clock()
+            board.record(name, name, rng.random() < args.accuracy)
+            out.append(clock() - t0)
+            if args.think:
+                time.sleep(rng.random() * args.think)
+
+    def reader(n):
+        out = reads[n]
+        start.wait()
+        while not writers_done.is_set():
+            t0 = clock()
+            board.top(10)
+            out.append(clock() - t0)
+            time.sleep(args.poll)
+
+    writers = [threading.Thread(target=student, args=(n,)) for n in range(args.students)]
+    readers = [threading.Thread(target=reader, args=(n,)) for n in range(args.readers)]
+    for t in writers + readers:
+        t.start()
+    start.wait()
+    t0 = clock()
+    for t in writers:
+        t.join()
+    elapsed = clock() - t0
+    writers_done.set()
+    for t in readers:
+        t.join()
+
+    samples = [x for per in latencies for x in per]
+    read_samples = [x for per in reads for x in per]
+    q = statistics.quantiles(samples, n=100)
+    rq = statistics.quantiles(read_samples, n=100)
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "updates": len(samples),
+        "updates_per_s": round(len(samples) / elapsed),
+        "update_p50_us": round(q[49] * 1e6, 1),
+        "update_p99_us": round(q[98] * 1e6, 1),
+        "reads": len(read_samples),
+        "read_p50_us": round(rq[49] * 1e6, 1),
+        "read_p99_us": round(rq[98] * 1e6, 1),
+    }
+
+
+def check(board, students):
+    """確認 skip list 版的前 10 名和整班重排的結果一樣"""
+    expect = sorted(
+        ((-e[2], e[3], e[0][2], s) for s, e in board._scores.items())
+    )[:10]
+    got = [(-st.correct, st.answered, board._scores[st.student][0][2], st.student) for st in board.top(10)]
+    assert got == expect, (got, expect)
+    assert len(board) == students
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--students", type=int, default=1000, help="同時作答的學生執行緒數（同一班）")
+    ap.add_argument("--answers", type=int, default=100, help="每個學生答幾題")
+    ap.add_argument("--readers", type=int, default=4, help="一直看排行榜的執行緒數")
+    ap.add_argument("--accuracy", type=float, default=0.7)
+    ap.add_argument("--think", type=float, default=0.0, help="每題之間最多停幾秒（0 = 不停，壓最大吞吐量）")
+    ap.add_argument("--poll", type=float, default=0.01,
+                    help="讀者每次讀完停幾秒（實際畫面是 2 秒；一直空轉讀會搶走 GIL，量到的就變成 GIL 排隊）")
+    ap.add_argument("-o", "--output", help="JSON 另存到這個檔案")
+    args = ap.parse_args()
+
+    report = {"config": vars(args).copy()}
+    report["config"].pop("output")
+    report["naive"] = run(NaiveBoard(), args)
+    board = ClassBoard(top_k=20)
+    report["skiplist"] = run(board, args)
+    check(board, args.students)
+    report["read_p50_speedup"] = round(report["naive"]["read_p50_us"] / max(0.1, report["skiplist"]["read_p50_us"]), 1)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+模擬 N 個學生同時作答的壓力測試（streamlit.testing.v1.AppTest，不需要起 server）。
+
+每個虛擬學生有自己的 AppTest（= 自己的 session）：
+  模式選擇頁選模式 → 開始作答 → 每題作答、送出、下一題，直到遊戲結束。
+三種模式輪流分配；同時作答人數用 --concurrency 控制，每次點擊前隨機停頓 --think 秒左右。
+
+AppTest.run 會改全域的 Runtime 與 config，不能在多個 thread 同時跑，所以所有 rerun 排隊輪流執行。
+量到的延遲 = 排隊 + 執行，相當於單一 server process 被 GIL 限制時學生按下按鈕要等的時間。
+
+輸出 JSON（可存檔後跨 commit 比較）：
+  每次 rerun 的延遲 p50 / p95 / p99（全部與各模式、各動作分開）、
+  peak RSS、每個 session 平均佔用的記憶體（所有 session 都還活著時的 RSS 增量 / 人數）。
+
+用法：
+    python benchmarks/bench_load_students.py --students 30 --concurrency 10 --think 0.2
+    python benchmarks/bench_load_students.py --students 60 -o load.json
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from zoology.loader import build_loaded_bank  # noqa: E402
+
+APP = os.path.join(ROOT, "Zoology_app.py")
+BANK_FILE = "Zoology_Terms_Bilingual.xlsx"
+MODE_KEYS = ("mode1", "mode2", "mode3")
+
+# 同一個 process 裡一次只能有一個 AppTest 在跑
+RUN_LOCK = threading.Lock()
+
+
+def rss_bytes():
+    """目前的 RSS（Linux 讀 /proc；其他平台退回 peak RSS）"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return peak_rss_bytes()
+
+
+def peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentiles(samples):
+    if len(samples) < 2:
+        v = samples[0] * 1e3 if samples else 0.0
+        return {"n": len(samples), "p50_ms": v, "p95_ms": v, "p99_ms": v, "max_ms": v}
+    q = statistics.quantiles(samples, n=100)
+    return {
+        "n": len(samples),
+        "p50_ms": round(q[49] * 1e3, 2),
+        "p95_ms": round(q[94] * 1e3, 2),
+        "p99_ms": round(q[98] * 1e3, 2),
+        "max_ms": round(max(samples) * 1e3, 2),
+    }
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class Student:
+    """一個虛擬學生：自己的 AppTest session，記錄每次 rerun 花的時間"""
+
+    def __init__(self, sid, mode_i, bank, think, accuracy, timeout):
+        self.sid = sid
+        self.mode_i = mode_i
+        self.bank = bank
+        self.think = think
+        self.accuracy = accuracy
+        self.rng = random.Random(sid)
+        self.at = AppTest.from_file(APP, default_timeout=timeout)
+        self.samples = []          # (動作, 秒)
+        self.error = None
+
+    def _run(self, action):
+        if self.think:
+            time.sleep(self.rng.uniform(0, 2 * self.think))
+        t0 = time.perf_counter()
+        with RUN_LOCK:
+            self.at.run()
+        self.samples.append((action, time.perf_counter() - t0))
+        if self.at.exception:
+            raise RuntimeError(self.at.exception[0].message)
+
+    def _answer(self):
+        """照 --accuracy 決定答對或答錯：選擇題選正確 / 錯誤選項，模式三打正確英文或亂打"""
+        at = self.at
+        quiz = at.session_state["quiz"]
+        term = self.bank.term(quiz.questions[quiz.pos])
+        right = term is not None and self.rng.random() < self.accuracy
+        if self.mode_i < 2:
+            radios = [r for r in at.radio if r.key and r.key.startswith("mc_")]
+            if radios:
+                answer = term[1] if self.mode_i == 0 else term[0]
+                wrong = [o for o in radios[0].options if o != answer]
+                radios[0].set_value(answer if right or not wrong else self.rng.choice(wrong))
+            return
+        inputs = [t for t in at.text_input if t.key and t.key.startswith("ti_")]
+        if inputs:
+            inputs[0].set_value(term[1] if right else "xyz")
+
+    def play(self):
+        try:
+            self._run("load")
+            radio = self.at.radio(key="mode_pick_for_start")
+            radio.set_value(radio.options[self.mode_i])
+            self.at.button[0].click()
+            self._run("start")
+            while True:
+                buttons = [b for b in self.at.button if b.key == "action_btn"]
+                if not buttons:
+                    break
+                submitting = buttons[0].label == "送出答案"
+                if submitting:
+                    self._answer()
+                buttons[0].click()
+                self._run("submit" if submitting else "next")
+        except Exception as e:  # 壓測要跑完，單一學生出錯只記下來
+            self.error = f"{type(e).__name__}: {e}"
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--students", type=int, default=30, help="虛擬學生人數")
+    ap.add_argument("--concurrency", type=int, default=10, help="同時作答人數")
+    ap.add_argument("--think", type=float, default=0.0, help="每次點擊前平均停頓秒數")
+    ap.add_argument("--accuracy", type=float, default=0.7, help="每題答對的機率（全對才進下一回合）")
+    ap.add_argument("--timeout", type=float, default=60.0, help="單次 rerun 逾時秒數")
+    ap.add_argument("-o", "--output", help="JSON 另存到這個檔案")
+    args = ap.parse_args()
+
+    # 在暫存目錄跑，作答紀錄 SQLite / 題庫 snapshot 不會寫進 repo
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="zoology-load-")
+    shutil.copy(os.path.join(ROOT, BANK_FILE), workdir)
+    os.chdir(workdir)
+    try:
+        bank = build_loaded_bank(BANK_FILE).index
+
+        # 先跑一個 session 暖機：題庫、相似詞表、typo index 等 cache_resource 都建好再開始量
+        warm = AppTest.from_file(APP, default_timeout=args.timeout).run()
+        if warm.exception:
+            raise SystemExit(warm.exception[0].message)
+        del warm
+        base_rss = rss_bytes()
+
+        students = [Student(s, s % 3, bank, args.think, args.accuracy, args.timeout)
+                    for s in range(args.students)]
+        peak = {"rss": base_rss}
+        done = threading.Event()
+
+        def sample_rss():
+            while not done.wait(0.2):
+                peak["rss"] = max(peak["rss"], rss_bytes())
+
+        sampler = threading.Thread(target=sample_rss, daemon=True)
+        sampler.start()
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(Student.play, students))
+        elapsed = time.perf_counter() - t0
+        done.set()
+        sampler.join()
+        # 所有 session 還留在記憶體裡時量，才算得出每個 session 的佔用
+        live_rss = rss_bytes()
+        peak["rss"] = max(peak["rss"], live_rss)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    all_samples = [sec for st_ in students for _, sec in st_.samples]
+    by_mode = {
+        MODE_KEYS[m]: percentiles([sec for st_ in students if st_.mode_i == m for _, sec in st_.samples])
+        for m in range(3)
+    }
+    by_action = {}
+    for st_ in students:
+        for action, sec in st_.samples:
+            by_action.setdefault(action, []).append(sec)
+
+    report = {
+        "commit": git_commit(),
+        "config": {
+            "students": args.students,
+            "concurrency": args.concurrency,
+            "think_s": args.think,
+            "accuracy": args.accuracy,
+            "bank_terms": len(bank),
+        },
+        "elapsed_s": round(elapsed, 2),
+        "reruns": len(all_samples),
+        "reruns_per_s": round(len(all_samples) / elapsed, 1) if elapsed else None,
+        "latency": percentiles(all_samples),
+        "latency_by_mode": by_mode,
+        "latency_by_action": {a: percentiles(v) for a, v in sorted(by_action.items())},
+        "peak_rss_mb": round(max(peak["rss"], peak_rss_bytes()) / 2**20, 1),
+        "rss_per_session_kb": round(max(0, live_rss - base_rss) / args.students / 1024, 1),
+        "errors": [{"student": st_.sid, "error": st_.error} for st_ in students if st_.error],
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+zoology.metrics 記錄一次耗時的成本：空的 with METRICS.time(...) 區塊，
+單執行緒與多執行緒（模擬多個 session 同時 rerun，搶同一把 lock）各跑一次。
+
+一次 rerun 大約記 6~8 個階段，乘起來就是每次 rerun 多花的時間。
+
+用法：
+    python benchmarks/bench_metrics_overhead.py --n 200000 --threads 8
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from zoology.metrics import PhaseMetrics  # noqa: E402
+
+PHASES = ("load_question_bank", "ensure_state_ready", "get_options", "render", "handle_action", "run")
+
+
+def run(metrics, n):
+    for i in range(n):
+        with metrics.time(PHASES[i % len(PHASES)]):
+            pass
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--n", type=int, default=200_000, help="每個執行緒記錄幾次")
+    ap.add_argument("--threads", type=int, default=8)
+    args = ap.parse_args()
+
+    metrics = PhaseMetrics()
+    t0 = time.perf_counter()
+    for _ in range(args.n):
+        pass
+    empty = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    run(metrics, args.n)
+    single = time.perf_counter() - t0 - empty
+    print(f"1 thread     {single / args.n * 1e6:6.2f} us/observation")
+
+    threads = [threading.Thread(target=run, args=(metrics, args.n)) for _ in range(args.threads)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    multi = time.perf_counter() - t0
+    total = args.n * args.threads
+    print(f"{args.threads} threads    {multi / total * 1e6:6.2f} us/observation (wall / total observations)")
+
+    t0 = time.perf_counter()
+    metrics.window()
+    text = metrics.to_prometheus()
+    metrics.to_json()
+    print(f"export       {(time.perf_counter() - t0) * 1e3:6.2f} ms ({len(text.splitlines())} Prometheus lines)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+用 tracemalloc 量每個 session 的作答紀錄佔多少記憶體：
+原本的 7-tuple list（含 prompt / 英文 / 中文字串與選項 list 副本）vs RecordStore。
+
+字串從 Excel 讀進來後每筆都是獨立物件，這裡用 "".join 複製一份來模擬。
+
+用法：
+    python benchmarks/bench_record_memory.py --sessions 300 --answers 30 --options 4
+"""
+import argparse
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from zoology.loader import build_loaded_bank  # noqa: E402
+from zoology.records import RecordStore  # noqa: E402
+
+
+def copy_str(s):
+    return "".join(list(s))
+
+
+def legacy_session(index, plan):
+    records = []
+    used_pairs = set()
+    for round_no, qidx, opts, ok in plan:
+        records.append((
+            round_no,
+            copy_str(index.names[qidx]),
+            copy_str(index.englishes[opts[0]]),
+            copy_str(index.englishes[qidx]),
+            copy_str(index.names[qidx]),
+            ok,
+            [copy_str(index.englishes[j]) for j in opts],
+        ))
+        used_pairs.add(copy_str(index.englishes[qidx]))
+    return records, used_pairs
+
+
+def compact_session(index, plan):
+    records = RecordStore()
+    used_pairs = set()
+    for round_no, qidx, opts, ok in plan:
+        tid = index.term_ids[qidx]
+        records.append(round_no, 0, tid, index.term_ids[opts[0]], ok, [index.term_ids[j] for j in opts])
+        used_pairs.add(tid)
+    return records, used_pairs
+
+
+def measure(build, index, plans):
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    keep = [build(index, plan) for plan in plans]
+    cur, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del keep
+    return (cur - base) / len(plans)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--xlsx", default=os.path.join(os.path.dirname(__file__), "..", "Zoology_Terms_Bilingual.xlsx"))
+    ap.add_argument("--sessions", type=int, default=300)
+    ap.add_argument("--answers", type=int, default=30, help="每個 session 作答題數")
+    ap.add_argument("--options", type=int, default=2)
+    args = ap.parse_args()
+
+    index = build_loaded_bank(args.xlsx).index
+    rng = random.Random(0)
+    n = len(index)
+    plans = [
+        [
+            (a // 10 + 1, q, [q] + rng.sample(range(n), args.options - 1), rng.random() < 0.7)
+            for a, q in enumerate(rng.sample(range(n), min(args.answers, n)))
+        ]
+        for _ in range(args.sessions)
+    ]
+
+    legacy = measure(legacy_session, index, plans)
+    compact = measure(compact_session, index, plans)
+    print(f"sessions: {args.sessions}  answers/session: {args.answers}  options: {args.options}")
+    print(f"tuples      {legacy:10.0f} bytes/session")
+    print(f"RecordStore {compact:10.0f} bytes/session  ({legacy / compact:.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
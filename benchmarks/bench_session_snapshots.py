@@ -0,0 +1,94 @@
+"""
+session snapshot（zoology.sessions）的大小、存 / 讀耗時，以及 LRU 逐出對記憶體的上限效果。
+
+  1. 模擬一個學生打完 --answers 題，量 dump_session / load_session 的耗時與 snapshot 大小
+  2. 開 --sessions 個各打了一局的 session，比較「全部留在記憶體」與 SessionStore(max_live=--max-live)
+     逐出後的 Python 配置量（tracemalloc）
+
+用法：
+    python benchmarks/bench_session_snapshots.py
+    python benchmarks/bench_session_snapshots.py --sessions 5000 --max-live 500 --spaced
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from zoology.bank import BankIndex  # noqa: E402
+from zoology.engine import MODE_TYPED, QuizEngine  # noqa: E402
+from zoology.loader import build_loaded_bank  # noqa: E402
+from zoology.sessions import SessionStore, bank_fingerprint, dump_session, load_session  # noqa: E402
+
+
+class NullWriter:
+    """不寫資料庫，只量記憶體與編碼"""
+
+    def submit(self, row):
+        pass
+
+
+def play(engine, answers, spaced, rng):
+    bank = engine.bank
+    s = engine.new_session(MODE_TYPED, spaced)
+    for _ in range(answers):
+        qidx = engine.current(s)
+        engine.submit(s, bank.englishes[qidx] if rng.random() < 0.9 else "xyz")
+        if not engine.advance(s):
+            s = engine.new_session(MODE_TYPED, spaced, s.scheduler)
+    return s
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--xlsx", default=os.path.join(os.path.dirname(__file__), "..", "Zoology_Terms_Bilingual.xlsx"))
+    ap.add_argument("--synthetic", type=int, default=0, help="改用 N 筆假資料")
+    ap.add_argument("--answers", type=int, default=30, help="每個 session 作答幾題")
+    ap.add_argument("--sessions", type=int, default=2000)
+    ap.add_argument("--max-live", type=int, default=200)
+    ap.add_argument("--spaced", action="store_true")
+    args = ap.parse_args()
+
+    if args.synthetic:
+        bank = BankIndex([{"name": f"名稱{i}", "english": f"Term number {i}"} for i in range(args.synthetic)])
+    else:
+        bank = build_loaded_bank(args.xlsx).index
+    engine = QuizEngine(bank)
+    fp = bank_fingerprint(bank)
+    rng = random.Random(0)
+
+    s = play(engine, args.answers, args.spaced, rng)
+    meta = {"user_name": "王小明", "user_class": "701", "user_seat": "12", "last_feedback": ""}
+    n = 2000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        data = dump_session(s, fp, meta)
+    t_dump = (time.perf_counter() - t0) / n
+    t0 = time.perf_counter()
+    for _ in range(n):
+        load_session(data, bank, fp)
+    t_load = (time.perf_counter() - t0) / n
+    print(f"bank {len(bank)} terms, {args.answers} answers/session, spaced={args.spaced}")
+    print(f"snapshot {len(data)} bytes   dump {t_dump * 1e6:.1f} us   load {t_load * 1e6:.1f} us")
+
+    for max_live in (None, args.max_live):
+        tracemalloc.start()
+        store = SessionStore(NullWriter(), ":memory:", max_live=max_live or args.sessions)
+        kept = []
+        for i in range(args.sessions):
+            q = play(engine, args.answers, args.spaced, rng)
+            store.save(str(i), q, bank, meta)
+            store.touch(str(i), q)
+            kept.append(q)          # Streamlit 的 session_state 仍然拿著 quiz
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        label = "no eviction" if max_live is None else f"max_live={max_live}"
+        print(f"{label:14s} {args.sessions} sessions  {used / 2**20:7.1f} MB  evicted {store.evicted}")
+        del kept, store
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+比較「每次 rerun 都從 cache_data 反序列化題庫」與「所有 session 共用 cache_resource 題庫」
+的每次 rerun 時間與記憶體配置量。
+
+st.cache_data 命中時會把存起來的 pickle 再 loads 一次，這裡直接用 pickle 模擬；
+共用版則是每次 rerun 拿到同一個 LoadedBank 物件。
+
+用法：
+    python benchmarks/bench_shared_bank.py                 # 用 repo 內的 Excel
+    python benchmarks/bench_shared_bank.py --synthetic 5000
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from zoology.bank import BankIndex, LoadedBank, norm_english  # noqa: E402
+from zoology.loader import build_loaded_bank  # noqa: E402
+
+
+def synthetic_bank(n):
+    return [{"name": f"名稱{i}", "english": f"Term number {i}"} for i in range(n)]
+
+
+def run_sessions(get_bank, sessions, reruns):
+    """
+    每個 session 各跑 reruns 次：取題庫 + 查一題。
+    回傳 (每次 rerun 秒數, 單次 rerun 的最大暫時配置 bytes)；計時與 tracemalloc 分開跑。
+    """
+    def one_rerun(s, r):
+        index = get_bank()
+        index.by_english.get(norm_english(index.englishes[(s * reruns + r) % len(index)]))
+
+    t0 = time.perf_counter()
+    for s in range(sessions):
+        for r in range(reruns):
+            one_rerun(s, r)
+    elapsed = time.perf_counter() - t0
+
+    tracemalloc.start()
+    worst = 0
+    for s in range(sessions):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        one_rerun(s, 0)
+        _, peak = tracemalloc.get_traced_memory()
+        worst = max(worst, peak - base)
+    tracemalloc.stop()
+    return elapsed / (sessions * reruns), worst
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--xlsx", default=os.path.join(os.path.dirname(__file__), "..", "Zoology_Terms_Bilingual.xlsx"))
+    ap.add_argument("--synthetic", type=int, default=0, help="改用 N 筆假資料")
+    ap.add_argument("--sessions", type=int, default=50)
+    ap.add_argument("--reruns", type=int, default=20)
+    args = ap.parse_args()
+
+    if args.synthetic:
+        bank_list = synthetic_bank(args.synthetic)
+        shared = LoadedBank(True, "", [], BankIndex(bank_list))
+    else:
+        shared = build_loaded_bank(args.xlsx)
+        bank_list = [shared.index.item(i) for i in range(len(shared.index))]
+
+    # 之前：cache_data 存的是 pickle，每次 rerun 命中時都 loads 一份 dict；
+    # BankIndex 那時已經在 cache_resource 裡只建一次，所以這裡也只建一次，不算進每次 rerun
+    payload = pickle.dumps({"ok": True, "error": "", "bank": bank_list, "debug_cols": []})
+    cached_index = BankIndex(bank_list)
+
+    def before():
+        pickle.loads(payload)
+        return cached_index
+
+    def after():
+        return shared.index
+
+    print(f"bank size: {len(shared.index)}  sessions: {args.sessions}  reruns/session: {args.reruns}")
+    for label, fn in (("before (cache_data)", before), ("after (cache_resource)", after)):
+        sec, alloc = run_sessions(fn, args.sessions, args.reruns)
+        print(f"{label:24s} {sec * 1e6:10.1f} us/rerun  {alloc / 1024:10.1f} KiB peak alloc per rerun")
+
+
+if __name__ == "__main__":
+    main()
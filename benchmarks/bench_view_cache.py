@@ -0,0 +1,128 @@
+"""
+zoology.views.ViewCache 的量測：模擬一堂課 --students 個學生用同一個模式各玩 --games 局，
+每題依畫面實際的次數要畫面片段（進度條 + 題目各 2 次：顯示題目、送出後；複習區 1 次）。
+
+比較：
+  uncached : 每次都重新組字串（原本的寫法；複習區把選項字串逐一比對回題庫）
+  cached   : 所有學生共用一個 ViewCache
+回報每次 rerun 組畫面片段的平均微秒數與快取命中率。
+
+用法：
+    python benchmarks/bench_view_cache.py
+    python benchmarks/bench_view_cache.py --students 60 --mode 1 -o views.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from zoology.bank import norm_english, norm_name  # noqa: E402
+from zoology.engine import QuizEngine  # noqa: E402
+from zoology.loader import build_loaded_bank  # noqa: E402
+from zoology.neighbors import PendingNeighborTable  # noqa: E402
+from zoology.views import ViewCache, build_progress, build_view  # noqa: E402
+
+BANK_FILE = "Zoology_Terms_Bilingual.xlsx"
+
+
+def find_option(bank, opt):
+    """原本 BankIndex.find_option：選項字串（英文或中文）對應的題目 idx，兩種都命中時取較前面的那一題"""
+    hits = [i for i in (bank.by_english.get(norm_english(opt)), bank.by_name.get(norm_name(opt))) if i is not None]
+    return min(hits) if hits else None
+
+
+def uncached_review(bank, mode, displays):
+    """原本複習區的做法：選項字串逐一 find_option 比對回題庫"""
+    pairs = []
+    for opt in displays:
+        j = find_option(bank, opt)
+        if j is None:
+            pairs.append(opt.strip())
+        elif mode == 1:
+            pairs.append(f"{bank.names[j]}（{bank.englishes[j]}）")
+        else:
+            pairs.append(f"{bank.englishes[j]}（{bank.names[j]}）")
+    return "、".join(pairs)
+
+
+def play(engine, bank, mode, students, games, render):
+    """讓每個學生玩完，回傳 (畫面片段花的秒數, rerun 次數)"""
+    spent = 0.0
+    reruns = 0
+    clock = time.perf_counter
+    for n in range(students):
+        rng = random.Random(n)
+        for _ in range(games):
+            s = engine.new_session(mode)
+            while s.round:
+                term_id = s.questions[s.pos]
+                qidx = engine.current(s)
+                payload = engine.options(s, qidx)
+                t0 = clock()
+                render(s, term_id, payload, False)
+                spent += clock() - t0
+                answer = bank.englishes[qidx] if rng.random() < 0.8 else "x"
+                if mode == 1:
+                    answer = bank.names[qidx] if answer != "x" else "x"
+                engine.submit(s, answer)
+                t0 = clock()
+                render(s, term_id, payload, True)
+                spent += clock() - t0
+                reruns += 2
+                engine.advance(s)
+    return spent, reruns
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--students", type=int, default=30)
+    ap.add_argument("--games", type=int, default=3, help="每個學生玩幾局")
+    ap.add_argument("--mode", type=int, default=0, choices=(0, 1, 2), help="模式代碼（0 / 1 / 2 = 模式一 / 二 / 三）")
+    ap.add_argument("--maxsize", type=int, default=4096)
+    ap.add_argument("-o", "--output", help="JSON 另存到這個檔案")
+    args = ap.parse_args()
+
+    bank = build_loaded_bank(os.path.join(ROOT, BANK_FILE)).index
+    neighbors = PendingNeighborTable(bank, 8)
+    neighbors.thread.join()
+
+    def make_engine():
+        return QuizEngine(bank, neighbors=neighbors, rng=random.Random(1))
+
+    def render_uncached(s, term_id, payload, submitted):
+        build_progress(s.round, s.pos + 1, len(s.questions))
+        view = build_view(bank, term_id, s.mode)
+        if submitted:
+            uncached_review(bank, s.mode, payload["display"])
+        return view
+
+    views = ViewCache(bank, args.maxsize)
+
+    def render_cached(s, term_id, payload, submitted):
+        views.progress(s.round, s.pos + 1, len(s.questions))
+        view = views.view(term_id, s.mode, payload["ids"])
+        if submitted:
+            view = views.view(term_id, s.mode, s.records.option_ids(-1))
+        return view
+
+    report = {"config": {k: v for k, v in vars(args).items() if k != "output"}, "bank_terms": len(bank)}
+    for label, render in (("uncached", render_uncached), ("cached", render_cached)):
+        spent, reruns = play(make_engine(), bank, args.mode, args.students, args.games, render)
+        report[label] = {"reruns": reruns, "us_per_rerun": round(spent / reruns * 1e6, 2)}
+    report["cache"] = views.stats()
+    report["cache"]["hit_rate"] = round(report["cache"]["hit_rate"], 4)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+極簡的 Streamlit websocket 客戶端（給 benchmark 用）：
+送 BackMsg.rerun_script、收 ForwardMsg 直到 script_finished，
+並記下畫面上的 widget（id / 種類 / 選項 / 所屬 fragment）以便模擬點擊。
+
+server 需以 --server.enableXsrfProtection false 啟動。
+"""
+import time
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+_WIDGET_TYPES = ("button", "radio", "text_input", "checkbox", "selectbox")
+_DONE = {
+    ForwardMsg.FINISHED_SUCCESSFULLY,
+    ForwardMsg.FINISHED_WITH_COMPILE_ERROR,
+    ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY,
+}
+
+
+class Widget:
+    __slots__ = ("id", "kind", "label", "options", "fragment_id")
+
+    def __init__(self, id, kind, label, options, fragment_id):
+        self.id = id
+        self.kind = kind
+        self.label = label
+        self.options = options
+        self.fragment_id = fragment_id
+
+
+class StreamlitClient:
+    def __init__(self, url):
+        self.url = url.rstrip("/") + "/_stcore/stream"
+        self.ws = None
+        self.widgets = {}      # id -> Widget（最近一次畫出來的）
+        self.values = {}       # id -> WidgetState（值型 widget 目前的值）
+        self.markdown = []     # 最近一次 run 畫出的 markdown 文字
+
+    async def connect(self):
+        self.ws = await websockets.connect(
+            self.url, subprotocols=["streamlit"], max_size=None, ping_interval=None
+        )
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    def find(self, kind, key_part=None, label=None):
+        for w in self.widgets.values():
+            if w.kind != kind:
+                continue
+            if key_part is not None and key_part not in w.id:
+                continue
+            if label is not None and w.label != label:
+                continue
+            return w
+        return None
+
+    def set_value(self, widget, **value):
+        ws = WidgetState(id=widget.id, **value)
+        self.values[widget.id] = ws
+
+    async def run(self, trigger=None, fragment_id=None):
+        """
+        觸發一次 rerun（trigger：要點的按鈕 Widget），等到 script 跑完。
+        回傳 (延遲秒數, 是否為 fragment run)
+        """
+        msg = BackMsg()
+        cs = msg.rerun_script
+        cs.query_string = ""
+        cs.page_script_hash = ""
+        if fragment_id:
+            cs.fragment_id = fragment_id
+        for ws in self.values.values():
+            cs.widget_states.widgets.append(ws)
+        if trigger is not None:
+            cs.widget_states.widgets.append(WidgetState(id=trigger.id, trigger_value=True))
+
+        self.markdown = []
+        t0 = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        while True:
+            fwd = ForwardMsg()
+            fwd.ParseFromString(await self.ws.recv())
+            kind = fwd.WhichOneof("type")
+            if kind == "new_session":
+                self._on_new_run(set(fwd.new_session.fragment_ids_this_run))
+            elif kind == "delta":
+                self._on_delta(fwd.delta)
+            elif kind == "script_finished" and fwd.script_finished in _DONE:
+                return (
+                    time.perf_counter() - t0,
+                    fwd.script_finished == ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY,
+                )
+
+    def _on_new_run(self, fragment_ids):
+        """每次 run 開始：這次會重畫的範圍內，舊的 widget 都作廢（按鈕換標籤時 id 也會變）"""
+        stale = [i for i, w in self.widgets.items() if not fragment_ids or w.fragment_id in fragment_ids]
+        for i in stale:
+            del self.widgets[i]
+            self.values.pop(i, None)
+        self.markdown = []
+
+    def _on_delta(self, delta):
+        if delta.WhichOneof("type") != "new_element":
+            return
+        el = delta.new_element
+        kind = el.WhichOneof("type")
+        if kind == "markdown":
+            self.markdown.append(el.markdown.body)
+        elif kind in _WIDGET_TYPES:
+            proto = getattr(el, kind)
+            self.widgets[proto.id] = Widget(
+                proto.id, kind, proto.label, list(getattr(proto, "options", [])), delta.fragment_id,
+            )
@@ -0,0 +1,3 @@
+"""
+Zoology Term Practice 的核心模組（與 Streamlit 畫面無關的部分）。
+"""
@@ -0,0 +1,402 @@
+"""
+給手機 App / LMS 串接用的 JSON API（純 ASGI，不依賴任何 web framework），
+出題、選項、批改、換回合全部走 zoology.engine.QuizEngine，規則與 Streamlit 畫面相同。
+
+  POST /api/sessions                   {"mode": 0|1|2, "spaced", "name", "class", "seat"} → 開新的一局，回傳第一題
+  GET  /api/sessions/{sid}/question    目前這題（題目、提示、選項）
+  POST /api/sessions/{sid}/answer      {"answer": "..."} → 批改結果
+  POST /api/sessions/{sid}/next        下一題（回合做完自動進下一回合或結束）
+  GET  /api/sessions/{sid}/summary     作答數、答對數、每題紀錄
+  GET  /api/health                     題庫版本、session 數
+
+每個請求只做幾微秒的純 Python 計算，直接在 event loop 裡跑、不開執行緒，
+所以同一個 session 的狀態不會被兩個請求同時改到。題庫換版時新的 QuizEngine（容錯索引、相似詞表）在背景執行緒建，
+建好前繼續用舊版，不會卡住正在處理的請求。session 放在有上限的 LRU 裡（超過人數或閒置太久就丟掉）。
+作答紀錄照樣丟進 AnswerWriter，老師統計頁看得到。
+
+用法：
+    python -m zoology.api --port 8001
+    uvicorn zoology.api:create_app --factory      （題庫等設定用環境變數，見 create_app）
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from .engine import ENGLISH_PROMPT_MODES, MODE_EN, MODE_LABELS, MODE_TYPED, MODE_ZH, QuizEngine
+from .fuzzy import TypoIndex
+from .loader import build_loaded_bank
+from .neighbors import PendingNeighborTable
+from .reload import LiveBank
+from .storage import AnswerRow, AnswerWriter, CompletionRow
+from .views import typed_hint
+
+MAX_BODY = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ApiSession:
+    __slots__ = ("quiz", "user_name", "user_class", "user_seat")
+
+    def __init__(self, quiz, user_name="", user_class="", user_seat=""):
+        self.quiz = quiz
+        self.user_name = user_name
+        self.user_class = user_class
+        self.user_seat = user_seat
+
+
+class BoundedSessions:
+    """sid -> ApiSession 的 LRU：最多 max_sessions 個，閒置超過 ttl 秒的在下次存取時丟掉"""
+
+    def __init__(self, max_sessions=10_000, ttl=60 * 60):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.evicted = 0
+        self._items = OrderedDict()   # sid -> (最後使用時間, ApiSession)
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, sid, sess):
+        self._items[sid] = (time.monotonic(), sess)
+        self._evict()
+
+    def get(self, sid):
+        item = self._items.get(sid)
+        if item is None:
+            return None
+        now = time.monotonic()
+        if now - item[0] > self.ttl:
+            del self._items[sid]
+            self.evicted += 1
+            return None
+        self._items[sid] = (now, item[1])
+        self._items.move_to_end(sid)
+        return item[1]
+
+    def _evict(self):
+        now = time.monotonic()
+        while self._items:
+            seen, _ = next(iter(self._items.values()))
+            if len(self._items) <= self.max_sessions and now - seen <= self.ttl:
+                break
+            self._items.popitem(last=False)
+            self.evicted += 1
+
+
+class QuizAPI:
+    """
+    ASGI app。
+      live_bank        : zoology.reload.LiveBank（題庫檔有變動時自動換版）
+      writer           : AnswerWriter；None = 不存作答紀錄
+      options_per_mode / questions_per_round / max_rounds / max_edits / chars_per_edit：同 Streamlit 版的設定
+    """
+
+    ROUTES = (
+        ("POST", re.compile(r"^/api/sessions/?$"), "start"),
+        ("GET", re.compile(r"^/api/sessions/([\w-]+)/question$"), "question"),
+        ("POST", re.compile(r"^/api/sessions/([\w-]+)/answer$"), "answer"),
+        ("POST", re.compile(r"^/api/sessions/([\w-]+)/next$"), "advance"),
+        ("GET", re.compile(r"^/api/sessions/([\w-]+)/summary$"), "summary"),
+        ("GET", re.compile(r"^/api/health$"), "health"),
+    )
+
+    def __init__(self, live_bank, writer=None, sessions=None, options_per_mode=None,
+                 questions_per_round=10, max_rounds=3, max_edits=2, chars_per_edit=5, hard_distractors=True):
+        self.live_bank = live_bank
+        self.writer = writer
+        self.sessions = sessions if sessions is not None else BoundedSessions()
+        self.options_per_mode = options_per_mode or {MODE_EN: 2, MODE_ZH: 2}
+        self.questions_per_round = questions_per_round
+        self.max_rounds = max_rounds
+        self.max_edits = max_edits
+        self.chars_per_edit = chars_per_edit
+        self.hard_distractors = hard_distractors
+        self._engine = None
+        self._pending = None      # 正在背景建 QuizEngine 的那一版題庫
+        self.requests = 0
+
+    # ---------- 題庫 / 規則 ----------
+    def engine(self):
+        """
+        目前用的 QuizEngine。第一次（啟動時）直接建；之後題庫換版就在背景執行緒建新的，
+        建好才換上，這段期間請求照樣用舊版處理。
+        """
+        self.live_bank.poll()
+        bank = self.live_bank.current.index
+        engine = self._engine
+        if engine is None:
+            engine = self._engine = self._build_engine(bank)
+        elif engine.bank is not bank and self._pending is not bank:
+            self._pending = bank
+            threading.Thread(target=self._swap_engine, args=(bank,), daemon=True).start()
+        return engine
+
+    def _build_engine(self, bank):
+        return QuizEngine(
+            bank,
+            typo_index=TypoIndex(bank, self.max_edits, self.chars_per_edit),
+            neighbors=PendingNeighborTable(bank) if self.hard_distractors else None,
+            options_per_mode=self.options_per_mode,
+            questions_per_round=self.questions_per_round,
+            max_rounds=self.max_rounds,
+        )
+
+    def _swap_engine(self, bank):
+        try:
+            engine = self._build_engine(bank)
+            # 建的期間題庫又換版的話，這一版就不用換上了，等下次 engine() 建最新的
+            if self.live_bank.current.index is bank:
+                self._engine = engine
+        except Exception:
+            logger.exception("rebuilding quiz engine for bank v%d failed", bank.version)
+        finally:
+            if self._pending is bank:
+                self._pending = None
+
+    def _session(self, sid, engine):
+        sess = self.sessions.get(sid)
+        if sess is None:
+            raise HTTPError(404, "unknown or expired session")
+        engine.sync(sess.quiz)
+        return sess
+
+    # ---------- 回傳內容 ----------
+    def _question(self, sid, sess, engine):
+        s = sess.quiz
+        if s.round is None:
+            return {"session_id": sid, "finished": True, "summary": self._summary_counts(s)}
+        qidx = engine.current(s)
+        bank = engine.bank
+        out = {
+            "session_id": sid,
+            "finished": False,
+            "mode": s.mode,
+            "round": s.round,
+            "position": s.pos + 1,
+            "total": len(s.questions),
+            "submitted": s.submitted,
+            "prompt": bank.englishes[qidx] if s.mode == MODE_ZH else bank.names[qidx],
+        }
+        if s.mode == MODE_TYPED:
+            out["hint"] = typed_hint(bank.englishes[qidx])
+        else:
+            out["options"] = engine.options(s, qidx)["display"]
+        return out
+
+    @staticmethod
+    def _summary_counts(s):
+        answered = len(s.records)
+        correct = s.records.n_correct()
+        return {"answered": answered, "correct": correct,
+                "accuracy": round(correct / answered, 4) if answered else 0.0}
+
+    # ---------- 各路由 ----------
+    def start(self, body):
+        mode = body.get("mode", MODE_EN)
+        # JSON 的 1.0 / true 也會 == 1，要先確定是整數
+        if type(mode) is not int or mode not in (MODE_EN, MODE_ZH, MODE_TYPED):
+            raise HTTPError(400, "mode must be 0, 1 or 2")
+        engine = self.engine()
+        sid = uuid.uuid4().hex
+        sess = ApiSession(
+            engine.new_session(mode, bool(body.get("spaced", False))),
+            str(body.get("name", ""))[:100], str(body.get("class", ""))[:100], str(body.get("seat", ""))[:100],
+        )
+        self.sessions.add(sid, sess)
+        return 201, self._question(sid, sess, engine)
+
+    def question(self, sid, body):
+        engine = self.engine()
+        return 200, self._question(sid, self._session(sid, engine), engine)
+
+    def answer(self, sid, body):
+        engine = self.engine()
+        sess = self._session(sid, engine)
+        s = sess.quiz
+        if s.round is None:
+            raise HTTPError(409, "game finished")
+        if s.submitted:
+            raise HTTPError(409, "already submitted; call next")
+        answer = body.get("answer")
+        if not isinstance(answer, str):
+            raise HTTPError(400, "answer must be a string")
+
+        result = engine.submit(s, answer)
+        bank = engine.bank
+        eng, name = bank.englishes[result.qidx], bank.names[result.qidx]
+        if self.writer is not None:
+            self.writer.submit(AnswerRow(
+                time.time(), sid, sess.user_name, sess.user_class, sess.user_seat,
+                MODE_LABELS[s.mode], s.round, eng, name, result.chosen, int(result.is_correct),
+            ))
+        return 200, {
+            "is_correct": result.is_correct,
+            "n_typos": result.n_typos,
+            "correct_english": eng,
+            "correct_name": name,
+            "suggestions": [{"english": bank.englishes[j], "name": bank.names[j]} for j in result.suggestions],
+            "round_score": s.score,
+        }
+
+    def advance(self, sid, body):
+        engine = self.engine()
+        sess = self._session(sid, engine)
+        s = sess.quiz
+        if s.round is None:
+            raise HTTPError(409, "game finished")
+        if not s.submitted:
+            raise HTTPError(409, "answer the current question first")
+        if not engine.advance(s) and self.writer is not None:
+            self.writer.submit(CompletionRow(
+                time.time(), sid, sess.user_class, MODE_LABELS[s.mode], len(s.records), s.records.n_correct(),
+            ))
+        return 200, self._question(sid, sess, engine)
+
+    def summary(self, sid, body):
+        engine = self.engine()
+        s = self._session(sid, engine).quiz
+        out = self._summary_counts(s)
+        out["finished"] = s.round is None
+        out["records"] = [
+            {"round": r.round, "prompt": r.prompt, "chosen": r.chosen, "correct_english": r.correct_eng,
+             "correct_name": r.correct_name, "is_correct": r.is_correct}
+            for r in (s.records.get(i, engine.bank, ENGLISH_PROMPT_MODES) for i in range(len(s.records)))
+        ]
+        return 200, out
+
+    def health(self, body):
+        return 200, {"bank_version": self.live_bank.current.index.version,
+                     "terms": len(self.live_bank.current.index),
+                     "sessions": len(self.sessions), "requests": self.requests}
+
+    # ---------- ASGI ----------
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        self.requests += 1
+        try:
+            status, payload = self._dispatch(scope["method"], scope["path"], await self._read_body(receive))
+        except HTTPError as e:
+            status, payload = e.status, {"error": e.message}
+        except RuntimeError as e:
+            # QuizEngine 拒絕的操作（例如這題已經送出過）
+            status, payload = 409, {"error": str(e)}
+        except Exception:
+            logger.exception("%s %s failed", scope["method"], scope["path"])
+            status, payload = 500, {"error": "internal error"}
+        data = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json; charset=utf-8"),
+                        (b"content-length", str(len(data)).encode("ascii"))],
+        })
+        await send({"type": "http.response.body", "body": data})
+
+    def _dispatch(self, method, path, raw):
+        for route_method, pattern, name in self.ROUTES:
+            m = pattern.match(path)
+            if m is None:
+                continue
+            if method != route_method:
+                raise HTTPError(405, "method not allowed")
+            body = {}
+            if raw:
+                try:
+                    body = json.loads(raw)
+                except ValueError:
+                    raise HTTPError(400, "invalid JSON") from None
+                if not isinstance(body, dict):
+                    raise HTTPError(400, "body must be a JSON object")
+            return getattr(self, name)(*m.groups(), body)
+        raise HTTPError(404, "not found")
+
+    @staticmethod
+    async def _read_body(receive):
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > MAX_BODY:
+                raise HTTPError(413, "body too large")
+            chunks.append(chunk)
+            if not message.get("more_body"):
+                break
+        return b"".join(chunks)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.engine()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.writer is not None:
+                    self.writer.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def create_app(bank=None, db_path=None, max_sessions=None, ttl=None):
+    """
+    建 QuizAPI；沒給的參數讀環境變數：
+      ZOOLOGY_BANK（題庫檔，逗號分隔多檔）、ZOOLOGY_RESULTS_DB（空字串 = 不存紀錄）、
+      ZOOLOGY_API_MAX_SESSIONS、ZOOLOGY_API_SESSION_TTL
+    """
+    bank = bank or os.environ.get("ZOOLOGY_BANK", "Zoology_Terms_Bilingual.xlsx").split(",")
+    paths = bank if len(bank) > 1 else bank[0]
+    if db_path is None:
+        db_path = os.environ.get("ZOOLOGY_RESULTS_DB", "zoology_results.sqlite3")
+    sessions = BoundedSessions(
+        max_sessions or int(os.environ.get("ZOOLOGY_API_MAX_SESSIONS", 10_000)),
+        ttl or float(os.environ.get("ZOOLOGY_API_SESSION_TTL", 3600)),
+    )
+    live_bank = LiveBank(lambda: build_loaded_bank(paths), paths)
+    if not live_bank.current.ok:
+        raise SystemExit(live_bank.current.error)
+    return QuizAPI(live_bank, AnswerWriter(db_path) if db_path else None, sessions)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="測驗 JSON API（ASGI，用 uvicorn 跑）")
+    ap.add_argument("--bank", nargs="+", default=["Zoology_Terms_Bilingual.xlsx"], help="題庫檔")
+    ap.add_argument("--db", default="zoology_results.sqlite3", help="作答紀錄資料庫（空字串 = 不存）")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8001)
+    ap.add_argument("--max-sessions", type=int, default=10_000)
+    ap.add_argument("--ttl", type=float, default=3600, help="閒置幾秒後丟掉 session")
+    args = ap.parse_args(argv)
+
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("需要 uvicorn：pip install uvicorn") from None
+    app = create_app(args.bank, args.db, args.max_sessions, args.ttl)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""
+題庫索引：題庫載入後只建一次，之後所有查詢都走這裡的雜湊表，
+不再每次 rerun 都把整個 QUESTION_BANK 掃一遍。
+"""
+import random
+from types import MappingProxyType
+
+
+def norm_english(s):
+    """英文術語比對用的 key：去頭尾空白 + casefold"""
+    return str(s).strip().casefold()
+
+
+def norm_name(s):
+    """中文名稱比對用的 key：去頭尾空白"""
+    return str(s).strip()
+
+
+class BankIndex:
+    """
+    不可變的題庫索引。
+      names / englishes       : 已 strip 過的中文 / 英文（依題庫順序）
+      english_keys            : norm_english 後的英文
+      by_english / by_name    : key -> 第一個出現的 idx
+      term_ids                : 每題的穩定 ID（題庫熱更新後同一個英文 key 保持同一個 ID）
+      by_term_id              : term ID -> idx
+      version                 : 第幾版題庫（每次熱更新 +1）
+      retired                 : 歷次熱更新被刪掉的題目 term ID -> (中文, 英文)，讓舊作答紀錄仍查得到
+    session 只存 term ID，要用時再用 idx_of() 換成這一版的位置。
+    """
+    __slots__ = (
+        "names", "englishes", "english_keys", "by_english", "by_name",
+        "term_ids", "by_term_id", "version", "retired",
+    )
+
+    def __init__(self, bank, term_ids=None, version=0, retired=None):
+        names = tuple(norm_name(it["name"]) for it in bank)
+        englishes = tuple(str(it["english"]).strip() for it in bank)
+        english_keys = tuple(e.casefold() for e in englishes)
+        term_ids = tuple(range(len(names))) if term_ids is None else tuple(term_ids)
+
+        by_english = {}
+        by_name = {}
+        for i, (n, k) in enumerate(zip(names, english_keys)):
+            by_english.setdefault(k, i)
+            by_name.setdefault(n, i)
+        by_term_id = {t: i for i, t in enumerate(term_ids)}
+
+        object.__setattr__(self, "names", names)
+        object.__setattr__(self, "englishes", englishes)
+        object.__setattr__(self, "english_keys", english_keys)
+        object.__setattr__(self, "by_english", MappingProxyType(by_english))
+        object.__setattr__(self, "by_name", MappingProxyType(by_name))
+        object.__setattr__(self, "term_ids", term_ids)
+        object.__setattr__(self, "by_term_id", MappingProxyType(by_term_id))
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "retired", MappingProxyType(dict(retired or {})))
+
+    def __setattr__(self, key, value):
+        raise AttributeError("BankIndex is read-only")
+
+    def __len__(self):
+        return len(self.names)
+
+    def item(self, idx):
+        """第 idx 題，格式同原本題庫的 {"name":..., "english":...}"""
+        return {"name": self.names[idx], "english": self.englishes[idx]}
+
+    def idx_of(self, term_id):
+        """term ID 在這一版題庫的位置；該題已被刪掉時回傳 None"""
+        return self.by_term_id.get(term_id)
+
+    def rebased_on(self, previous):
+        """
+        以 previous（上一版）為基準重新配發 term ID：英文 key 相同的沿用舊 ID，
+        新出現的從「用過的 ID」最大值往上配（含已刪除的 retired，刪掉的 ID 不再發給別的詞，
+        舊紀錄 / snapshot 才不會對到錯的題目），version +1。
+        """
+        next_id = max(max(previous.term_ids, default=-1), max(previous.retired, default=-1)) + 1
+        term_ids = []
+        for k in self.english_keys:
+            old = previous.by_english.get(k)
+            if old is None:
+                term_ids.append(next_id)
+                next_id += 1
+            else:
+                term_ids.append(previous.term_ids[old])
+        kept = set(term_ids)
+        retired = dict(previous.retired)
+        for t, n, e in zip(previous.term_ids, previous.names, previous.englishes):
+            if t not in kept:
+                retired[t] = (n, e)
+        bank = [{"name": n, "english": e} for n, e in zip(self.names, self.englishes)]
+        return BankIndex(bank, term_ids, previous.version + 1, retired)
+
+    def term(self, term_id):
+        """term ID -> (中文, 英文)；已被刪掉的題目從 retired 找，都沒有回傳 None"""
+        i = self.by_term_id.get(term_id)
+        if i is not None:
+            return self.names[i], self.englishes[i]
+        return self.retired.get(term_id)
+
+    def is_correct_english(self, idx, answer):
+        return norm_english(answer) == self.english_keys[idx]
+
+    def is_correct_name(self, idx, answer):
+        return norm_name(answer) == self.names[idx]
+
+    def sample_distractors(self, qidx, k, field="english", rng=random, exclude=()):
+        """
+        抽 k 個與正確答案不同、彼此也不重複的干擾選項，回傳 idx 串列。
+        以隨機 idx + 拒絕（key 相同就重抽）的方式抽，期望 O(k)，不掃整個題庫。
+        field: "english"（模式一）或 "name"（模式二）
+        exclude: 另外不能抽到的 key（例如已經挑好的選項）
+        """
+        if field == "english":
+            keys, distinct = self.english_keys, self.by_english
+        else:
+            keys, distinct = self.names, self.by_name
+
+        seen = {keys[qidx], *exclude}
+        k = max(0, min(k, len(distinct) - len(seen)))
+        picked = []
+        n = len(keys)
+        attempts = 0
+        max_attempts = 32 * (k + 1)
+        while len(picked) < k and attempts < max_attempts:
+            attempts += 1
+            j = rng.randrange(n)
+            if keys[j] in seen:
+                continue
+            seen.add(keys[j])
+            picked.append(j)
+
+        if len(picked) < k:
+            # 題庫重複項太多、拒絕次數過多時，才退回在不重複的 key 裡抽
+            rest = [j for key, j in distinct.items() if key not in seen]
+            picked.extend(rng.sample(rest, k - len(picked)))
+        return picked
+
+
+class LoadedBank:
+    """
+    load_question_bank 的結果：所有 session 共用同一份、唯讀。
+      ok / error / debug_cols 與原本 dict 版本相同
+      index                   : BankIndex
+      stats                   : 每張工作表的列數與載入耗時
+    """
+    __slots__ = ("ok", "error", "debug_cols", "index", "stats")
+
+    def __init__(self, ok, error, debug_cols, index, stats=()):
+        object.__setattr__(self, "ok", ok)
+        object.__setattr__(self, "error", error)
+        object.__setattr__(self, "debug_cols", tuple(debug_cols))
+        object.__setattr__(self, "index", index)
+        object.__setattr__(self, "stats", tuple(stats))
+
+    def __setattr__(self, key, value):
+        raise AttributeError("LoadedBank is read-only")
+
+
+def diff_banks(old, new):
+    """
+    依正規化後的英文 key 比對兩版題庫，回傳
+    {"added": [...], "removed": [...], "changed": [...]}（changed = 英文相同但中文改了）
+    """
+    added, changed = [], []
+    for k, i in new.by_english.items():
+        j = old.by_english.get(k)
+        if j is None:
+            added.append(new.englishes[i])
+        elif old.names[j] != new.names[i]:
+            changed.append(new.englishes[i])
+    removed = [old.englishes[j] for k, j in old.by_english.items() if k not in new.by_english]
+    return {"added": added, "removed": removed, "changed": changed}
@@ -0,0 +1,285 @@
+"""
+把題庫、三種模式與回合規則編譯成一個自給自足的靜態 HTML（含 JS），
+放在任何靜態檔案伺服器上就能作答：出題、選項、批改、換回合都在瀏覽器裡跑，伺服器不必替每個學生開 session。
+
+  build : 題庫（含相似詞表）以精簡 JSON 內嵌進 bundle_template.html，輸出 <out>/index.html
+  serve : 本機用的小伺服器：送出靜態檔案，另外接收瀏覽器批次上傳的作答紀錄（POST /results），
+          經 AnswerWriter 寫進同一個 SQLite，老師統計頁照常可以看。上傳是選用的（build 時給 --upload-url 才會送）。
+          上傳要帶 build 時給的 --upload-token（寫在頁面裡，等於全班共用的通關碼，只擋外人亂寫，不是帳號驗證）；
+          沒設 token 時只能聽 127.0.0.1 / localhost，要讓別台機器連就一定要設
+
+瀏覽器端的規則與 zoology.engine 相同：每回合抽 questions_per_round 題不放回、全對才進下一回合、
+選擇題干擾選項先從相似詞表挑、模式三依長度容許拼字錯誤（但剛好是另一個詞就不算）。
+英文比對用 Python 的 casefold：題庫的 key 直接內嵌，作答則用內嵌的對照表（casefold 與 lower 不同的字元，如 ß → ss）折疊；
+題目句與 zoology.views 用同一組 PROMPT_TEMPLATES。
+間隔複習需要跨局保存排程，靜態版不提供。
+
+用法：
+    python -m zoology.bundle build -o dist --upload-url /results --upload-token <通關碼>
+    python -m zoology.bundle serve dist --host 0.0.0.0 --port 8000 --token <通關碼>
+"""
+import argparse
+import hmac
+import json
+import math
+import os
+import sys
+import sys
+import time
+from functools import lru_cache, partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from .engine import MODE_LABELS
+from .loader import build_loaded_bank
+from .neighbors import NeighborTable
+from .storage import AnswerRow, AnswerWriter, CompletionRow
+from .views import PROMPT_TEMPLATES
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bundle_template.html")
+PLACEHOLDER = "/*__PAYLOAD__*/"
+PAYLOAD_VERSION = 2
+
+# 上傳的一批最多幾筆、每個字串欄位最長幾個字（擋掉異常的請求）
+MAX_UPLOAD_ROWS = 2000
+MAX_FIELD_CHARS = 200
+
+
+@lru_cache(maxsize=1)
+def casefold_table():
+    """casefold 結果與 lower 不同的字元 → casefold 結果（約 300 個）；其餘字元瀏覽器用 toLowerCase 即可"""
+    table = {}
+    for code in range(sys.maxunicode + 1):
+        if 0xD800 <= code <= 0xDFFF:
+            continue
+        c = chr(code)
+        folded = c.casefold()
+        if folded != c.lower():
+            table[c] = folded
+    return table
+
+
+def bundle_payload(bank, neighbors=None, questions_per_round=10, max_rounds=3, options=(2, 2),
+                   max_edits=2, chars_per_edit=5, upload_url="", upload_batch=10, upload_token=""):
+    """內嵌進 HTML 的資料：題庫、攤平的相似詞表與規則參數"""
+    k = 0
+    nb_e, nb_n = [], []
+    if neighbors is not None and len(bank):
+        k = neighbors.english.shape[1]
+        nb_e = neighbors.english.ravel().tolist()
+        nb_n = neighbors.name.ravel().tolist()
+    return {
+        "v": PAYLOAD_VERSION,
+        "n": list(bank.names),
+        "e": list(bank.englishes),
+        "ek": list(bank.english_keys),
+        "fold": casefold_table(),
+        "k": k,
+        "nb_e": nb_e,
+        "nb_n": nb_n,
+        "cfg": {
+            "modes": list(MODE_LABELS),
+            "prompts": [PROMPT_TEMPLATES[m] for m in range(len(MODE_LABELS))],
+            "questions_per_round": questions_per_round,
+            "max_rounds": max_rounds,
+            "options": list(options),
+            "max_edits": max_edits,
+            "chars_per_edit": chars_per_edit,
+            "upload_url": upload_url,
+            "upload_batch": upload_batch,
+            "upload_token": upload_token,
+        },
+    }
+
+
+def render_html(payload):
+    """把 payload 填進範本；JSON 放在 <script type="application/json"> 裡，所以 "</" 要跳脫"""
+    with open(TEMPLATE, encoding="utf-8") as f:
+        template = f.read()
+    data = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+    return template.replace(PLACEHOLDER, data, 1)
+
+
+def write_bundle(out_dir, bank, hard_distractors=True, k=8, **rules):
+    """輸出 <out_dir>/index.html，回傳路徑"""
+    neighbors = NeighborTable(bank, k) if hard_distractors and len(bank) > 1 else None
+    html = render_html(bundle_payload(bank, neighbors, **rules))
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, "index.html")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(html)
+    os.replace(tmp, path)
+    return path
+
+
+# ===================== 作答紀錄上傳 =====================
+def _text(v):
+    return str(v if v is not None else "")[:MAX_FIELD_CHARS]
+
+
+def _timestamp(v, now):
+    """瀏覽器的時間（秒）：必須是有限的數字；超過現在的改用收到的時間"""
+    if isinstance(v, bool) or not isinstance(v, (int, float)) or not math.isfinite(v) or v < 0:
+        raise ValueError(f"bad timestamp: {v!r}")
+    return min(float(v), now)
+
+
+def _count(v):
+    """回合 / 題數：非負整數"""
+    if isinstance(v, bool) or not isinstance(v, int) or v < 0:
+        raise ValueError(f"bad count: {v!r}")
+    return v
+
+
+def results_to_rows(payload, now=None):
+    """
+    瀏覽器上傳的一批 JSON → [AnswerRow / CompletionRow]。
+      {"session_id", "user": {"name", "class", "seat"},
+       "answers": [[ts, mode, round, english, name, chosen, is_correct], ...],
+       "completions": [[ts, mode, answered, correct], ...]}
+    ts 是瀏覽器的時間（有限的非負數字），超過現在的改用收到的時間；回合、題數是非負整數。
+    格式不對丟 ValueError（整批都不收，不會寫一半）。
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("payload must be an object")
+    answers = payload.get("answers") or []
+    completions = payload.get("completions") or []
+    if not isinstance(answers, list) or not isinstance(completions, list):
+        raise ValueError("answers / completions must be lists")
+    if len(answers) + len(completions) > MAX_UPLOAD_ROWS:
+        raise ValueError(f"too many rows (max {MAX_UPLOAD_ROWS})")
+    now = time.time() if now is None else now
+    sid = _text(payload.get("session_id"))
+    user = payload.get("user") or {}
+    if not sid or not isinstance(user, dict):
+        raise ValueError("missing session_id / user")
+    name, user_class, seat = _text(user.get("name")), _text(user.get("class")), _text(user.get("seat"))
+
+    rows = []
+    try:
+        for ts, mode, round_no, english, term_name, chosen, is_correct in answers:
+            if mode not in MODE_LABELS:
+                raise ValueError(f"unknown mode: {mode!r}")
+            rows.append(AnswerRow(
+                _timestamp(ts, now), sid, name, user_class, seat, mode, _count(round_no),
+                _text(english), _text(term_name), _text(chosen), 1 if is_correct else 0,
+            ))
+        for ts, mode, answered, correct in completions:
+            if mode not in MODE_LABELS:
+                raise ValueError(f"unknown mode: {mode!r}")
+            if _count(correct) > _count(answered):
+                raise ValueError("correct > answered")
+            rows.append(CompletionRow(_timestamp(ts, now), sid, user_class, mode, answered, correct))
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"bad row: {e}") from None
+    return rows
+
+
+class BundleHandler(SimpleHTTPRequestHandler):
+    """靜態檔案 + POST /results（token 對了才丟進 AnswerWriter，不等磁碟）"""
+    writer = None
+    token = ""
+    max_body = 1 << 20
+
+    def do_POST(self):
+        if self.path.split("?")[0] != "/results" or self.writer is None:
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if not 0 < length <= self.max_body:
+            self.send_error(413 if length else 400)
+            return
+        try:
+            payload = json.loads(self.rfile.read(length))
+        except ValueError:   # json.JSONDecodeError 也是 ValueError
+            self.send_error(400, "invalid JSON")
+            return
+        if self.token and not (
+            isinstance(payload, dict)
+            and hmac.compare_digest(str(payload.get("token") or "").encode("utf-8"), self.token.encode("utf-8"))
+        ):
+            self.send_error(403)
+            return
+        try:
+            rows = results_to_rows(payload)
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return
+        for row in rows:
+            self.writer.submit(row)
+        self.send_response(204)
+        self.end_headers()
+
+
+LOCAL_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+def serve(bundle_dir, db_path=None, host="127.0.0.1", port=8000, token=""):
+    """
+    送出 bundle；有 db_path 才接收上傳。上傳要帶 token（與 build 時的 --upload-token 相同）；
+    沒設 token 時只准聽本機，免得任何人都能把作答紀錄寫進老師看的資料庫。
+    """
+    if db_path and not token and host not in LOCAL_HOSTS:
+        raise SystemExit("accepting uploads on a non-local address requires --token")
+    writer = AnswerWriter(db_path) if db_path else None
+    handler = type("Handler", (BundleHandler,), {"writer": writer, "token": token})
+    httpd = ThreadingHTTPServer((host, port), partial(handler, directory=bundle_dir))
+    print(f"serving {bundle_dir} on http://{host}:{port}/" + (f" (results -> {db_path})" if writer else ""))
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        if writer is not None:
+            writer.close()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="把測驗編譯成靜態 HTML / JS（不需要 Streamlit）")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    b = sub.add_parser("build", help="輸出 <out>/index.html")
+    b.add_argument("--bank", nargs="+", default=["Zoology_Terms_Bilingual.xlsx"], help="題庫檔")
+    b.add_argument("-o", "--output", default="dist", help="輸出資料夾")
+    b.add_argument("--questions-per-round", type=int, default=10)
+    b.add_argument("--max-rounds", type=int, default=3)
+    b.add_argument("--options", type=int, nargs=2, default=(2, 2), metavar=("MODE1", "MODE2"),
+                   help="模式一、二每題選項數（含正確答案）")
+    b.add_argument("--max-edits", type=int, default=2, help="模式三最多容許幾個拼字錯誤（0 = 必須完全正確）")
+    b.add_argument("--chars-per-edit", type=int, default=5, help="模式三每幾個字元容許 1 個拼字錯誤")
+    b.add_argument("--random-distractors", action="store_true", help="干擾選項完全隨機（不內嵌相似詞表）")
+    b.add_argument("--upload-url", default="", help="作答紀錄批次上傳網址（例如 /results）；不給就不上傳")
+    b.add_argument("--upload-batch", type=int, default=10, help="累積幾題上傳一次（遊戲結束或離開頁面時也會送）")
+    b.add_argument("--upload-token", default="", help="上傳時附上的通關碼（serve 的 --token 要設一樣的）")
+
+    s = sub.add_parser("serve", help="本機送出 bundle 並接收上傳")
+    s.add_argument("dir", nargs="?", default="dist")
+    s.add_argument("--db", default="zoology_results.sqlite3", help="上傳的作答紀錄寫到這裡（空字串 = 不接收）")
+    s.add_argument("--host", default="127.0.0.1")
+    s.add_argument("--port", type=int, default=8000)
+    s.add_argument("--token", default=os.environ.get("ZOOLOGY_UPLOAD_TOKEN", ""),
+                   help="上傳必須帶的通關碼（預設讀 ZOOLOGY_UPLOAD_TOKEN）；不設時只能聽本機")
+    args = ap.parse_args(argv)
+
+    if args.command == "serve":
+        serve(args.dir, args.db or None, args.host, args.port, args.token)
+        return 0
+
+    loaded = build_loaded_bank(args.bank if len(args.bank) > 1 else args.bank[0])
+    if not loaded.ok:
+        print(loaded.error, file=sys.stderr)
+        return 1
+    path = write_bundle(
+        args.output, loaded.index, hard_distractors=not args.random_distractors,
+        questions_per_round=args.questions_per_round, max_rounds=args.max_rounds,
+        options=tuple(max(2, min(6, n)) for n in args.options),
+        max_edits=args.max_edits, chars_per_edit=args.chars_per_edit,
+        upload_url=args.upload_url, upload_batch=args.upload_batch, upload_token=args.upload_token,
+    )
+    print(f"{len(loaded.index)} terms -> {path} ({os.path.getsize(path) / 1024:.1f} KB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
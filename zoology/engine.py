@@ -0,0 +1,268 @@
+"""
+測驗規則核心：出題、選項、批改、換題，不依賴 Streamlit。
+QuizEngine 是一版題庫一份、所有 session 共用的唯讀規則；QuizSession 是每個學生自己的狀態。
+畫面那邊只把按鈕 / 輸入轉成 submit()、advance()，再把結果畫出來，
+所以規則可以直接在純 Python 裡大量模擬作答、量測效能。
+"""
+import random
+from collections import namedtuple
+
+from .records import NO_TERM, RecordStore
+from .rounds import LeitnerScheduler, TermPool
+
+# 模式代碼（與 RecordStore.modes 相同）
+MODE_EN = 0      # 中文 ➜ 英文（選擇題）
+MODE_ZH = 1      # 英文 ➜ 中文（選擇題）
+MODE_TYPED = 2   # 中文 ➜ 手寫英文
+CHOICE_MODES = (MODE_EN, MODE_ZH)
+ENGLISH_PROMPT_MODES = (MODE_ZH,)
+# 作答紀錄 / 老師統計頁用的模式名稱（與 Zoology_app.py 的 MODE_1 ~ MODE_3 相同）
+MODE_LABELS = ("模式一：中文 ➜ 英文", "模式二：英文 ➜ 中文", "模式三：中文 ➜ 手寫英文")
+
+# submit() 的結果
+#   qidx        : 這題在題庫的位置
+#   chosen      : 學生的答案（strip 過）
+#   chosen_id   : 選到的選項 term ID（手寫或 "???" 為 NO_TERM）
+#   n_typos     : 模式三算對時的拼字錯誤數
+#   suggestions : 模式三答錯時「你是不是想寫…」的題目 idx
+Answer = namedtuple("Answer", ["qidx", "is_correct", "chosen", "chosen_id", "n_typos", "suggestions"])
+
+
+class QuizSession:
+    """
+    一個學生一局的狀態。
+      mode / spaced     : 模式代碼 / 是否用間隔複習出題
+      round             : 第幾回合；None = 遊戲結束
+      pool / scheduler  : 還沒出過的 term ID（TermPool）/ 間隔複習排程（跨局沿用同一個）
+      questions / pos   : 本回合的題目 term ID / 目前第幾題
+      records / score   : 作答紀錄（RecordStore）/ 本回合答對題數
+      submitted / last  : 目前這題是否已送出 / 送出的結果（Answer）
+      options           : idx -> 選項 payload（同一題重畫時不重抽），換回合、換題庫版本時清空
+      bank_version      : 目前對應的題庫版本
+      evicted           : 已被 release() 清空（進度在 snapshot 裡，要先還原才能用）
+    """
+    __slots__ = (
+        "mode", "spaced", "round", "pool", "scheduler", "questions", "pos",
+        "records", "score", "submitted", "last", "options", "bank_version", "evicted",
+    )
+
+    def __init__(self, mode, spaced, pool, scheduler, bank_version):
+        self.mode = mode
+        self.spaced = spaced
+        self.round = 1
+        self.pool = pool
+        self.scheduler = scheduler
+        self.questions = []
+        self.pos = 0
+        self.records = RecordStore()
+        self.score = 0
+        self.submitted = False
+        self.last = None
+        self.options = {}
+        self.bank_version = bank_version
+        self.evicted = False
+
+    def release(self):
+        """閒置太久被逐出記憶體：丟掉紀錄、出題池、選項與排程（排程物件原地清空，共用它的地方一起釋放）"""
+        self.records = RecordStore()
+        self.pool = TermPool(())
+        self.options = {}
+        self.questions = []
+        self.last = None
+        self.scheduler.clear()
+        self.evicted = True
+
+
+class QuizEngine:
+    """
+    一版題庫的出題 / 批改規則。
+      bank                : BankIndex
+      typo_index          : 模式三容錯批改用的 TypoIndex；None = 必須完全正確
+      neighbors           : PendingNeighborTable；建好後干擾選項從相似詞裡挑，None = 完全隨機
+      options_per_mode    : 模式代碼 -> 每題選項數（含正確答案）
+      questions_per_round / max_rounds : 每回合題數 / 最多幾回合（全對才進下一回合）
+    """
+    __slots__ = ("bank", "typo_index", "neighbors", "options_per_mode",
+                 "questions_per_round", "max_rounds", "rng")
+
+    def __init__(self, bank, typo_index=None, neighbors=None, options_per_mode=None,
+                 questions_per_round=10, max_rounds=3, rng=random):
+        self.bank = bank
+        self.typo_index = typo_index
+        self.neighbors = neighbors
+        self.options_per_mode = dict(options_per_mode or {MODE_EN: 2, MODE_ZH: 2})
+        self.questions_per_round = questions_per_round
+        self.max_rounds = max_rounds
+        self.rng = rng
+
+    # ---------- 開局 / 出題 ----------
+    def new_session(self, mode, spaced=False, scheduler=None):
+        """開新的一局並抽好第一回合；scheduler 傳入舊的就沿用間隔複習進度"""
+        s = QuizSession(
+            mode, spaced, TermPool(self.bank.term_ids),
+            scheduler if scheduler is not None else LeitnerScheduler(),
+            self.bank.version,
+        )
+        self.start_round(s)
+        return s
+
+    def start_round(self, s):
+        """抽一個新回合的題目清單"""
+        if s.spaced:
+            # 間隔複習：到期的複習題優先，不夠再從出題池補新題
+            chosen = s.scheduler.next_round(self.questions_per_round, s.pool, self.rng)
+        else:
+            if not len(s.pool):
+                # 題庫全部出過一輪了，重新來過
+                s.pool = TermPool(self.bank.term_ids)
+            # 抽到就從池裡拿掉；剩不到一回合的量就全部出完
+            chosen = s.pool.draw(self.questions_per_round, self.rng)
+        s.questions = chosen
+        s.pos = 0
+        s.score = 0
+        s.submitted = False
+        s.last = None
+        s.options = {}
+
+    def current(self, s):
+        """目前這題在題庫的位置；遊戲結束或本回合沒有題目時回傳 None"""
+        if s.round is None or s.pos >= len(s.questions):
+            return None
+        return self.bank.idx_of(s.questions[s.pos])
+
+    def options(self, s, qidx=None):
+        """
+        選擇題的選項（同一題重畫時回傳同一份）：
+        {"display": [...選項字串...], "value": [...一樣的...], "ids": [...各選項的 term ID（"???" 為 NO_TERM）...]}
+        模式三回傳空的 payload。
+        """
+        if qidx is None:
+            qidx = self.current(s)
+        cached = s.options.get(qidx)
+        if cached is not None:
+            return cached
+
+        bank = self.bank
+        n_distractors = self.options_per_mode.get(s.mode, 1) - 1
+        if s.mode == MODE_EN:
+            picked = self._distractors(qidx, n_distractors, "english")
+            display = [bank.englishes[qidx]] + ([bank.englishes[j] for j in picked] or ["???"])
+        elif s.mode == MODE_ZH:
+            picked = self._distractors(qidx, n_distractors, "name")
+            display = [bank.names[qidx]] + ([bank.names[j] for j in picked] or ["???"])
+        else:
+            picked, display = [], []
+
+        # 選項與 term ID 一起洗牌
+        ids = [bank.term_ids[qidx]] + [bank.term_ids[j] for j in picked]
+        ids += [NO_TERM] * (len(display) - len(ids))
+        pairs = list(zip(display, ids))
+        self.rng.shuffle(pairs)
+        payload = {
+            "display": [d for d, _ in pairs],
+            "value": [d for d, _ in pairs],
+            "ids": [t for _, t in pairs],
+        }
+        s.options[qidx] = payload
+        return payload
+
+    def _distractors(self, qidx, k, field):
+        """相似詞表建好就從裡面挑，否則隨機"""
+        table = self.neighbors.table if self.neighbors is not None else None
+        source = table if table is not None else self.bank
+        return source.sample_distractors(qidx, k, field, self.rng)
+
+    # ---------- 作答 ----------
+    def grade(self, mode, qidx, answer):
+        """回傳 (是否算對, 拼字錯誤數)；選擇題比對正規化後的字串，模式三走容錯批改。答錯時拼字錯誤數為 0"""
+        if mode == MODE_EN:
+            return self.bank.is_correct_english(qidx, answer), 0
+        if mode == MODE_ZH:
+            return self.bank.is_correct_name(qidx, answer), 0
+        if self.typo_index is not None:
+            ok, n_typos = self.typo_index.grade(qidx, answer)
+            return ok, (n_typos if ok else 0)
+        return self.bank.is_correct_english(qidx, answer), 0
+
+    def submit(self, s, answer):
+        """送出目前這題的答案：批改、寫進紀錄與間隔複習排程，回傳 Answer"""
+        if s.submitted:
+            raise RuntimeError("this question has already been submitted")
+        qidx = self.current(s)
+        if qidx is None:
+            raise RuntimeError("no question to answer")
+        bank = self.bank
+        chosen = (answer or "").strip()
+        is_correct, n_typos = self.grade(s.mode, qidx, chosen)
+
+        # 紀錄一筆（只存 ID，文字需要時再從題庫查）
+        option_ids = []
+        chosen_id = NO_TERM
+        if s.mode in CHOICE_MODES:
+            payload = self.options(s, qidx)
+            option_ids = payload["ids"]
+            if answer in payload["display"]:
+                chosen_id = option_ids[payload["display"].index(answer)]
+        term_id = bank.term_ids[qidx]
+        s.records.append(
+            s.round, s.mode, term_id, chosen_id, is_correct, option_ids,
+            typed=(chosen if not bank.is_correct_english(qidx, chosen) else None),
+        )
+        if s.spaced:
+            s.scheduler.record(term_id, is_correct)
+        if is_correct:
+            s.score += 1
+
+        suggestions = ()
+        if s.mode == MODE_TYPED and not is_correct and self.typo_index is not None:
+            # 拼的字比較接近題庫裡的其他詞時提示出來
+            suggestions = tuple(j for j in self.typo_index.suggest(chosen) if j != qidx)
+
+        s.submitted = True
+        s.last = Answer(qidx, is_correct, chosen, chosen_id, n_typos, suggestions)
+        return s.last
+
+    def advance(self, s):
+        """到下一題；回合做完就結算。回傳遊戲是否還在進行"""
+        s.pos += 1
+        s.submitted = False
+        s.last = None
+        if s.pos >= len(s.questions):
+            self._finish_round(s)
+        return s.round is not None
+
+    def _finish_round(self, s):
+        """本回合題目都做完：滿分且還有回合就進下一回合，否則遊戲結束"""
+        if s.score >= len(s.questions) and s.round < self.max_rounds:
+            s.round += 1
+            self.start_round(s)
+        else:
+            s.round = None
+
+    # ---------- 題庫熱更新 ----------
+    def sync(self, s):
+        """
+        題庫熱更新後，把 session 的 term ID 對到這一版題庫：
+        已被刪除的題目從出題池與本回合尚未作答的題目中拿掉，新題目加進出題池，選項快取清空。
+        """
+        if s.bank_version == self.bank.version:
+            return
+        s.bank_version = self.bank.version
+        s.options = {}
+
+        alive = self.bank.by_term_id
+        s.pool.sync(self.bank)
+        s.scheduler.sync(self.bank)
+
+        cur, pos = s.questions, s.pos
+        if s.round is None or pos >= len(cur):
+            return
+        if cur[pos] not in alive and s.submitted:
+            # 正在看回饋的這題被刪了：當作已經按了下一題，這題的分數不算
+            if s.last is not None and s.last.is_correct:
+                s.score -= 1
+            s.submitted = False
+            s.last = None
+        s.questions = cur[:pos] + [t for t in cur[pos:] if t in alive]
+        if pos >= len(s.questions):
+            self._finish_round(s)
@@ -0,0 +1,169 @@
+"""
+把 answers 表匯出成 Excel（每班一個工作表）或 CSV，給老師統計頁下載。
+
+一學期的作答紀錄可能有上百萬筆，不先組 DataFrame 再 to_excel：
+游標依 (user_class, id) 順序一次 fetchmany 一批，直接寫進 openpyxl 的 write-only 工作表
+（一列寫完就序列化到暫存檔，不留在記憶體），記憶體只跟批次大小有關。
+
+answers 只會新增，所以 (MAX(id), COUNT(*)) 沒變就代表資料沒變：
+ExportCache 把上次的檔案留在磁碟上，資料沒變時直接沿用，不重建。
+"""
+import csv
+import os
+import re
+import threading
+import time
+
+FETCH_ROWS = 5000
+
+# CSV 用 utf-8-sig，Excel 直接開中文才不會亂碼（grading 的輸出也用這個）
+CSV_ENCODING = "utf-8-sig"
+
+COLUMNS = (
+    ("ts", "時間"),
+    ("user_class", "班級"),
+    ("user_seat", "座號"),
+    ("user_name", "姓名"),
+    ("session_id", "session"),
+    ("mode", "模式"),
+    ("round", "回合"),
+    ("english", "英文"),
+    ("name", "中文"),
+    ("chosen", "作答"),
+    ("is_correct", "是否答對"),
+)
+SELECT_SQL = (
+    f"SELECT {', '.join(c for c, _ in COLUMNS)} FROM answers ORDER BY user_class, id"
+)
+NO_CLASS = "未填班級"
+FORMATS = {"xlsx": ".xlsx", "csv": ".csv"}
+
+# 工作表名稱不能有這些字元，最長 31 字
+_BAD_TITLE = re.compile(r"[\[\]:*?/\\]")
+
+
+def data_version(conn):
+    """answers 只增不改：最大 id 與筆數一樣就是同一份資料"""
+    return tuple(conn.execute("SELECT COALESCE(MAX(id), 0), COUNT(*) FROM answers").fetchone())
+
+
+def iter_rows(conn, batch=FETCH_ROWS):
+    """依班級、作答順序逐批讀出 answers（ts 轉成本地時間字串）"""
+    cur = conn.execute(SELECT_SQL)
+    while True:
+        rows = cur.fetchmany(batch)
+        if not rows:
+            return
+        for ts, *rest in rows:
+            yield (_format_ts(ts), *rest)
+
+
+def _format_ts(ts):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+
+
+def sheet_title(user_class, used):
+    """班級名稱轉成合法且不重複的工作表名稱"""
+    base = _BAD_TITLE.sub("_", user_class or NO_CLASS).strip("'")[:31] or NO_CLASS
+    title, n = base, 2
+    while title.lower() in used:
+        suffix = f"~{n}"
+        title = base[:31 - len(suffix)] + suffix
+        n += 1
+    used.add(title.lower())
+    return title
+
+
+def write_xlsx(conn, path, batch=FETCH_ROWS):
+    """每班一個工作表的 write-only 活頁簿；回傳寫了幾筆"""
+    # 老師按下載 Excel 時才載 openpyxl，學生端啟動不用付這個 import
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    header = [label for _, label in COLUMNS]
+    used = set()
+    ws = None
+    current = None
+    n = 0
+    for row in iter_rows(conn, batch):
+        if ws is None or row[1] != current:
+            current = row[1]
+            ws = wb.create_sheet(sheet_title(current, used))
+            ws.append(header)
+        ws.append(row)
+        n += 1
+    if ws is None:
+        wb.create_sheet(NO_CLASS).append(header)
+    wb.save(path)
+    return n
+
+
+def write_csv(conn, path, batch=FETCH_ROWS):
+    """全部班級一個 CSV（有班級欄位；utf-8-sig 讓 Excel 直接開不亂碼）；回傳寫了幾筆"""
+    n = 0
+    with open(path, "w", encoding=CSV_ENCODING, newline="") as f:
+        w = csv.writer(f)
+        w.writerow([label for _, label in COLUMNS])
+        cur = conn.execute(SELECT_SQL)
+        while True:
+            rows = cur.fetchmany(batch)
+            if not rows:
+                return n
+            w.writerows((_format_ts(ts), *rest) for ts, *rest in rows)
+            n += len(rows)
+
+
+WRITERS = {"xlsx": write_xlsx, "csv": write_csv}
+
+
+class ExportCache:
+    """
+    匯出檔留在 out_dir，檔名帶資料版本：<stem>_<max id>_<筆數>.<ext>。
+    get() 發現同版本的檔案已經在就直接回傳路徑，否則重建並刪掉舊版本。
+    同一格式同時只有一個執行緒在建（多個老師同時按下載不會重複建）。
+    """
+
+    def __init__(self, out_dir, stem="class_results"):
+        self.out_dir = out_dir
+        self.stem = stem
+        self._locks = {fmt: threading.Lock() for fmt in FORMATS}
+        self.builds = 0
+        self.hits = 0
+
+    def path_for(self, version, fmt):
+        max_id, count = version
+        return os.path.join(self.out_dir, f"{self.stem}_{max_id}_{count}{FORMATS[fmt]}")
+
+    def get(self, conn, fmt="xlsx"):
+        """回傳目前資料版本的匯出檔路徑（必要時才重建）"""
+        with self._locks[fmt]:
+            # 版本與內容在同一個讀取交易裡：建檔途中寫進來的新紀錄不會混進這個版本
+            conn.execute("BEGIN")
+            try:
+                path = self.path_for(data_version(conn), fmt)
+                if os.path.exists(path):
+                    self.hits += 1
+                    return path
+                os.makedirs(self.out_dir, exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.tmp"
+                try:
+                    WRITERS[fmt](conn, tmp)
+                    os.replace(tmp, path)
+                finally:
+                    if os.path.exists(tmp):
+                        os.remove(tmp)
+            finally:
+                conn.execute("COMMIT")
+            self.builds += 1
+            self._remove_stale(path, fmt)
+            return path
+
+    def _remove_stale(self, keep, fmt):
+        prefix = self.stem + "_"
+        for fn in os.listdir(self.out_dir):
+            full = os.path.join(self.out_dir, fn)
+            if fn.startswith(prefix) and fn.endswith(FORMATS[fmt]) and full != keep:
+                try:
+                    os.remove(full)
+                except OSError:
+                    pass
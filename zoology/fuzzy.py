@@ -0,0 +1,202 @@
+"""
+模式三的容錯批改：允許少量拼字錯誤（例如 mitocondria → Mitochondria），
+並用 bigram 倒排索引找出「你是不是想寫…」的候選詞，不必每次送出都對整個題庫算編輯距離。
+"""
+
+
+def edit_distance(a, b, max_dist=None):
+    """
+    Levenshtein 距離。給 max_dist 時只算對角線附近 ±max_dist 的帶狀區域，
+    超過就提早回傳 max_dist + 1。內層迴圈只用區域變數比大小（不呼叫 min()）。
+    """
+    if a == b:
+        return 0
+    la, lb = len(a), len(b)
+    if la < lb:
+        a, b, la, lb = b, a, lb, la
+    if max_dist is None or max_dist > la:
+        max_dist = la
+    if la - lb > max_dist:
+        return max_dist + 1
+
+    big = max_dist + 1
+    prev = [j if j <= max_dist else big for j in range(lb + 1)]
+    for i in range(1, la + 1):
+        ca = a[i - 1]
+        lo = i - max_dist if i > max_dist else 1
+        hi = i + max_dist if i + max_dist < lb else lb
+        cur = [big] * (lb + 1)
+        left = i if i <= max_dist else big
+        cur[lo - 1] = left
+        diag = prev[lo - 1]
+        row_min = left
+        for j in range(lo, hi + 1):
+            up = prev[j]
+            v = diag if ca == b[j - 1] else diag + 1
+            if up + 1 < v:
+                v = up + 1
+            if left + 1 < v:
+                v = left + 1
+            cur[j] = left = v
+            diag = up
+            if v < row_min:
+                row_min = v
+        if row_min > max_dist:
+            return big
+        prev = cur
+    d = prev[lb]
+    return d if d <= max_dist else big
+
+
+def edit_distances(a, b):
+    """
+    一次算很多對字串 (a[i], b[i]) 的 Levenshtein 距離，回傳 int64 ndarray。
+    DP 表一格一格往下算，但每一格同時算所有配對（numpy），批次批改時不必每對各跑一次 Python 迴圈。
+    字串補齊到同長度，補的部分不影響：只讀每一對自己 (len(a), len(b)) 那一格。
+    """
+    import numpy as np
+
+    n = len(a)
+    la = np.fromiter(map(len, a), dtype=np.int64, count=n)
+    lb = np.fromiter(map(len, b), dtype=np.int64, count=n)
+    out = lb.copy()                      # len(a) == 0 時距離就是 len(b)
+    if not n or not la.max():
+        return out
+    ma, mb = int(la.max()), max(int(lb.max()), 1)
+    A = np.array(a, dtype=f"<U{ma}").view(np.uint32).reshape(n, ma)
+    B = np.array(b, dtype=f"<U{mb}").view(np.uint32).reshape(n, mb)
+
+    prev = np.tile(np.arange(mb + 1, dtype=np.int64), (n, 1))
+    cur = np.empty_like(prev)
+    for i in range(1, ma + 1):
+        # 取代 / 刪除只看上一列，可以整列一起算；插入要沿著 j 往右傳
+        best = np.minimum(prev[:, :-1] + (A[:, i - 1:i] != B), prev[:, 1:] + 1)
+        cur[:, 0] = i
+        for j in range(1, mb + 1):
+            np.minimum(best[:, j - 1], cur[:, j - 1] + 1, out=cur[:, j])
+        done = np.flatnonzero(la == i)
+        out[done] = cur[done, lb[done]]
+        prev, cur = cur, prev
+    return out
+
+
+class GramIndex:
+    """
+    以字元 bigram（前後補上邊界字元）建的倒排索引，找編輯距離 <= r 的詞。
+      words[i]     : 第 i 個詞
+      payload[i]   : 對應的值（這裡放題目 idx）
+      postings[g]  : [(詞編號, 這個詞裡 g 出現幾次), ...]
+      by_len[n]    : 長度 n 的詞編號（很短的詞 bigram 下限沒有作用，直接依長度列出）
+    q-gram 下限：補過邊界的字有 len + 1 個 bigram，每個編輯最多破壞 2 個，
+    所以距離 <= r 的兩個詞至少共有 max(長度) + 1 - 2r 個 bigram。查詢只數共有的 bigram，
+    長度與共有數都過關的少數候選才跑帶狀 DP，不必每個詞都算一次編輯距離。
+    """
+    __slots__ = ("words", "payload", "postings", "by_len")
+
+    def __init__(self, items=()):
+        self.words = []
+        self.payload = []
+        self.postings = {}
+        self.by_len = {}
+        for word, value in items:
+            self.add(word, value)
+
+    def __len__(self):
+        return len(self.words)
+
+    def add(self, word, value):
+        n = len(self.words)
+        self.words.append(word)
+        self.payload.append(value)
+        self.by_len.setdefault(len(word), []).append(n)
+        for g, c in _bigrams(word).items():
+            self.postings.setdefault(g, []).append((n, c))
+
+    def search(self, word, radius, limit=None):
+        """回傳距離 <= radius 的 [(距離, 字, 值), ...]，由近到遠"""
+        size = len(word)
+        shared = {}
+        for g, qc in _bigrams(word).items():
+            for n, c in self.postings.get(g, ()):
+                shared[n] = shared.get(n, 0) + (c if c < qc else qc)
+        # 兩個詞都很短時下限 <= 0，一個 bigram 都沒共有也可能在範圍內
+        for m in range(max(0, size - radius), size + radius + 1):
+            if max(m, size) + 1 - 2 * radius <= 0:
+                for n in self.by_len.get(m, ()):
+                    shared.setdefault(n, 0)
+
+        found = []
+        words = self.words
+        for n, common in shared.items():
+            w = words[n]
+            m = len(w)
+            if abs(m - size) > radius or common < max(m, size) + 1 - 2 * radius:
+                continue
+            d = edit_distance(word, w, radius)
+            if d <= radius:
+                found.append((d, w, self.payload[n]))
+        found.sort()
+        return found[:limit] if limit else found
+
+
+def _bigrams(word):
+    padded = f"\x02{word}\x03"
+    out = {}
+    for i in range(len(padded) - 1):
+        g = padded[i:i + 2]
+        out[g] = out.get(g, 0) + 1
+    return out
+
+
+class EditTolerance:
+    """
+    拼字容錯的門檻（不建索引，批次批改只需要這個）。
+      max_edits     : 最多允許幾個字元的錯誤
+      chars_per_edit: 每幾個字元才允許 1 個錯誤（短字不容錯，避免 cat/cut 這種情況）
+    """
+    __slots__ = ("max_edits", "chars_per_edit")
+
+    def __init__(self, max_edits=2, chars_per_edit=5):
+        self.max_edits = max_edits
+        self.chars_per_edit = chars_per_edit
+
+    def allowed_edits(self, target_key):
+        return min(self.max_edits, len(target_key) // self.chars_per_edit)
+
+
+class TypoIndex(EditTolerance):
+    """題庫英文的容錯索引：EditTolerance 的門檻 + 所有英文 key 的 GramIndex（線上批改與「你是不是想寫」用）"""
+    __slots__ = ("bank", "grams")
+
+    def __init__(self, bank, max_edits=2, chars_per_edit=5):
+        super().__init__(max_edits, chars_per_edit)
+        self.bank = bank
+        self.grams = GramIndex((k, i) for k, i in bank.by_english.items())
+
+    def grade(self, qidx, answer):
+        """
+        回傳 (是否算對, 編輯距離)。完全相同距離為 0；
+        拼字差在容許範圍內也算對，但若剛好是題庫裡「另一個」詞就不算。
+        """
+        key = answer.strip().casefold()
+        target = self.bank.english_keys[qidx]
+        if key == target:
+            return True, 0
+        if not key:
+            return False, len(target)
+        allowed = self.allowed_edits(target)
+        d = edit_distance(key, target, allowed)
+        if d > allowed:
+            return False, d
+        other = self.bank.by_english.get(key)
+        if other is not None and other != qidx:
+            return False, d
+        return True, d
+
+    def suggest(self, answer, limit=3):
+        """「你是不是想寫…」：回傳與作答最接近的題目 idx（不含完全相同的）"""
+        key = answer.strip().casefold()
+        if not key:
+            return []
+        radius = max(1, min(self.max_edits, len(key) // self.chars_per_edit))
+        return [i for d, _, i in self.grams.search(key, radius, limit=limit + 1) if d > 0][:limit]
@@ -0,0 +1,262 @@
+"""
+模式三紙本測驗的批次批改：整份答案卷（CSV / Excel：學號、中文題目、作答）一次改完，
+規則與線上模式三相同（完全相同算對；拼字差在容許範圍內也算對，但剛好是題庫裡另一個詞就不算）。
+
+題庫只載一次。題目對應與完全比對都是 pandas 的整欄運算 / merge，
+只有「不完全相同、長度差又在容許範圍內」的作答才需要算編輯距離：相同的 (作答, 題目) 只算一次，
+而且所有配對用 fuzzy.edit_distances 一次用 numpy 算完。
+大檔分 chunk 串流讀取，每個 chunk 改完就把每位學生 / 每個詞的統計累加上去。
+
+    python -m zoology.grading answers.csv --bank Zoology_Terms_Bilingual.xlsx -o graded/
+輸出：
+    students.csv  每位學生的作答數 / 答對數 / 正確率
+    terms.csv     每個詞的作答數 / 答對數 / 錯誤率（錯誤率高的在前）
+    answers.csv   （--details）逐題結果
+"""
+import argparse
+import os
+import sys
+import time
+
+from zoology.export import CSV_ENCODING
+from zoology.fuzzy import EditTolerance, edit_distances
+from zoology.loader import CHUNK_ROWS, iter_sheets, build_loaded_bank
+
+STUDENT_CANDIDATES = ["student", "student id", "student_id", "學號", "學生", "id"]
+PROMPT_CANDIDATES = ["prompt", "題目", "中文", "名稱", "name", "chinese", "cn"]
+ANSWER_CANDIDATES = ["answer", "作答", "答案", "英文", "english", "response"]
+CLASS_CANDIDATES = ["class", "班級"]
+
+# 逐題結果的 status
+STATUS_EXACT = "correct"
+STATUS_TYPO = "typo"               # 拼字小錯，算對
+STATUS_WRONG = "wrong"
+STATUS_BLANK = "blank"
+STATUS_UNKNOWN = "unknown_prompt"  # 題目不在題庫裡，不計分
+
+
+def _find_answer_columns(header):
+    """學號、題目、作答、班級欄的位置；班級欄可以沒有（None）"""
+    cols_norm = {}
+    for pos, c in enumerate(header):
+        cols_norm.setdefault(str(c).strip().lower(), pos)
+
+    def pick(candidates):
+        return next((cols_norm[c] for c in candidates if c in cols_norm), None)
+
+    return pick(STUDENT_CANDIDATES), pick(PROMPT_CANDIDATES), pick(ANSWER_CANDIDATES), pick(CLASS_CANDIDATES)
+
+
+def _iter_answer_frames(path, sheets):
+    """
+    逐 chunk 產生 (sheet 名稱, DataFrame)，每個 DataFrame 最多 CHUNK_ROWS 列，欄名同原檔。
+    CSV 直接用 pandas 分 chunk 讀；Excel 走 zoology.loader 的串流讀法（.xlsx 用 openpyxl read-only）。
+    """
+    import pandas as pd
+
+    if os.path.splitext(str(path))[1].lower() == ".csv":
+        reader = pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=CHUNK_ROWS)
+        for df in reader:
+            yield os.path.basename(str(path)), df
+        return
+    for sheet, header, chunks in iter_sheets(path, sheets):
+        width = len(header)
+        for rows in chunks:
+            rows = [tuple(r[:width]) + (None,) * (width - len(r)) for r in rows]
+            yield sheet, pd.DataFrame.from_records(rows, columns=range(width)).set_axis(header, axis=1)
+
+
+def _clean(col):
+    """缺值 → ""，其餘轉字串後 strip"""
+    return col.where(col.notna(), "").astype(str).str.strip()
+
+
+def bank_frame(bank, tolerance):
+    """
+    題庫的對照表（每個中文名稱一列，重複名稱取第一個出現的，與 BankIndex.by_name 相同）：
+    prompt / qidx / target_key（正規化後的英文）/ allowed（容許的拼字錯誤數）
+    """
+    import pandas as pd
+
+    qidx = list(bank.by_name.values())
+    targets = [bank.english_keys[i] for i in qidx]
+    return pd.DataFrame({
+        "prompt": list(bank.by_name.keys()),
+        "qidx": qidx,
+        "target_key": targets,
+        "allowed": [tolerance.allowed_edits(t) for t in targets],
+    })
+
+
+def grade_frame(df, bank, tolerance, table=None):
+    """
+    改一個 chunk。df 需有 student / class / prompt / answer 四欄（已 strip 的字串）。
+    回傳加上 qidx / english / is_correct / n_typos / status 欄的新 DataFrame（列順序不變）。
+    """
+    import numpy as np
+    import pandas as pd
+
+    if table is None:
+        table = bank_frame(bank, tolerance)
+
+    out = df.merge(table, how="left", on="prompt", sort=False)
+    known = out["qidx"].notna()
+    ans_key = out["answer"].str.casefold()
+    target = out["target_key"].fillna("")
+    blank = out["answer"] == ""
+    exact = known & (ans_key == target)
+
+    # 只有長度差在容許範圍內、又不是題庫裡別的詞的作答，才需要算編輯距離
+    other_term = ans_key.isin(bank.by_english.keys())
+    allowed = out["allowed"].fillna(0).astype(int)
+    close_len = (ans_key.str.len() - target.str.len()).abs() <= allowed
+    cand = known & ~exact & ~blank & ~other_term & (allowed > 0) & close_len
+
+    n_typos = np.zeros(len(out), dtype=np.int64)
+    if cand.any():
+        pairs = pd.DataFrame({"a": ans_key[cand], "t": target[cand]}).drop_duplicates()
+        pairs["d"] = edit_distances(pairs["a"].tolist(), pairs["t"].tolist())
+        d = (
+            pd.DataFrame({"a": ans_key[cand], "t": target[cand]})
+            .merge(pairs[["a", "t", "d"]], how="left", on=["a", "t"], sort=False)["d"]
+            .to_numpy()
+        )
+        typo_ok = d <= allowed[cand].to_numpy()
+        n_typos[np.flatnonzero(cand.to_numpy())[typo_ok]] = d[typo_ok]
+    typo = n_typos > 0
+
+    out["is_correct"] = exact.to_numpy() | typo
+    out["n_typos"] = n_typos
+    out["status"] = np.select(
+        [~known.to_numpy(), exact.to_numpy(), typo, blank.to_numpy()],
+        [STATUS_UNKNOWN, STATUS_EXACT, STATUS_TYPO, STATUS_BLANK],
+        default=STATUS_WRONG,
+    )
+    englishes = np.array(bank.englishes, dtype=object)
+    out["english"] = np.where(known, englishes[out["qidx"].fillna(0).astype(int)], "")
+    return out.drop(columns=["target_key", "allowed"])
+
+
+def _student_totals(graded):
+    scored = graded[graded["status"] != STATUS_UNKNOWN]
+    g = scored.assign(typos=scored["n_typos"] > 0).groupby(["student", "class"], sort=False)
+    return g.agg(answered=("is_correct", "size"), correct=("is_correct", "sum"), typos=("typos", "sum"))
+
+
+def _term_totals(graded):
+    scored = graded[graded["status"] != STATUS_UNKNOWN]
+    g = scored.assign(qidx=scored["qidx"].astype(int)).groupby("qidx", sort=False)
+    return g.agg(answered=("is_correct", "size"), correct=("is_correct", "sum"))
+
+
+def _accumulate(acc, part):
+    return part if acc is None else acc.add(part, fill_value=0)
+
+
+def grade_sheets(paths, bank, tolerance, out_dir, details=False, sheets=None):
+    """
+    依序改完每個答案檔（CSV 或 Excel；sheets 同 zoology.loader.iter_sheets），
+    統計寫到 out_dir 的 students.csv / terms.csv（details=True 時另寫逐題的 answers.csv）。
+    回傳 {"rows", "graded", "correct", "unknown_prompts", "seconds", "files": [...]}
+    """
+    import pandas as pd
+
+    t0 = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    table = bank_frame(bank, tolerance)
+    details_path = os.path.join(out_dir, "answers.csv")
+    if details and os.path.exists(details_path):
+        os.remove(details_path)
+
+    students = terms = None
+    n_rows = n_unknown = 0
+    for path in paths:
+        for sheet, chunk in _iter_answer_frames(path, sheets):
+            sid_pos, prompt_pos, ans_pos, class_pos = _find_answer_columns(chunk.columns)
+            if sid_pos is None or prompt_pos is None or ans_pos is None:
+                raise ValueError(
+                    f"{path} [{sheet}] 找不到必要欄位，目前欄位是：{list(chunk.columns)}\n"
+                    f"學號欄候選：{STUDENT_CANDIDATES}\n題目欄候選：{PROMPT_CANDIDATES}\n"
+                    f"作答欄候選：{ANSWER_CANDIDATES}"
+                )
+            cols = chunk.iloc
+            df = pd.DataFrame({
+                "student": _clean(cols[:, sid_pos]),
+                "class": _clean(cols[:, class_pos]) if class_pos is not None else "",
+                "prompt": _clean(cols[:, prompt_pos]),
+                "answer": _clean(cols[:, ans_pos]),
+            })
+            graded = grade_frame(df, bank, tolerance, table)
+            n_rows += len(graded)
+            n_unknown += int((graded["status"] == STATUS_UNKNOWN).sum())
+            students = _accumulate(students, _student_totals(graded))
+            terms = _accumulate(terms, _term_totals(graded))
+            if details:
+                graded.assign(source=os.path.basename(str(path))).to_csv(
+                    details_path, mode="a", index=False, encoding=CSV_ENCODING,
+                    header=not os.path.exists(details_path),
+                    columns=["source", "student", "class", "prompt", "answer", "english",
+                             "is_correct", "n_typos", "status"],
+                )
+
+    files = []
+    if students is not None:
+        students = students.astype(int).reset_index()
+        students["accuracy"] = (students["correct"] / students["answered"]).round(4)
+        path = os.path.join(out_dir, "students.csv")
+        students.to_csv(path, index=False, encoding=CSV_ENCODING)
+        files.append(path)
+    if terms is not None:
+        terms = terms.astype(int).reset_index()
+        terms.insert(1, "english", [bank.englishes[i] for i in terms["qidx"]])
+        terms.insert(2, "name", [bank.names[i] for i in terms["qidx"]])
+        terms["error_rate"] = (1 - terms["correct"] / terms["answered"]).round(4)
+        terms = terms.sort_values(["error_rate", "answered"], ascending=False).drop(columns="qidx")
+        path = os.path.join(out_dir, "terms.csv")
+        terms.to_csv(path, index=False, encoding=CSV_ENCODING)
+        files.append(path)
+    if details and os.path.exists(details_path):
+        files.append(details_path)
+
+    return {
+        "rows": n_rows,
+        "graded": n_rows - n_unknown,
+        "correct": int(students["correct"].sum()) if students is not None else 0,
+        "unknown_prompts": n_unknown,
+        "seconds": time.perf_counter() - t0,
+        "files": files,
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="模式三紙本答案卷批次批改")
+    ap.add_argument("answers", nargs="+", help="答案檔（CSV / Excel），欄位：學號、題目（中文）、作答，可另有班級")
+    ap.add_argument("--bank", nargs="+", default=["Zoology_Terms_Bilingual.xlsx"], help="題庫檔")
+    ap.add_argument("-o", "--output", default="graded", help="輸出資料夾")
+    ap.add_argument("--details", action="store_true", help="另外輸出逐題結果 answers.csv")
+    ap.add_argument("--all-sheets", action="store_true", help="讀取答案檔的所有工作表")
+    ap.add_argument("--max-edits", type=int, default=2, help="最多容許幾個拼字錯誤（0 = 必須完全正確）")
+    ap.add_argument("--chars-per-edit", type=int, default=5, help="每幾個字元容許 1 個拼字錯誤")
+    args = ap.parse_args(argv)
+
+    loaded = build_loaded_bank(args.bank if len(args.bank) > 1 else args.bank[0])
+    if not loaded.ok:
+        print(loaded.error, file=sys.stderr)
+        return 1
+    tolerance = EditTolerance(args.max_edits, args.chars_per_edit)
+    try:
+        result = grade_sheets(args.answers, loaded.index, tolerance, args.output,
+                              details=args.details, sheets="all" if args.all_sheets else None)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    print(f"{result['rows']} answers ({result['graded']} graded, {result['correct']} correct, "
+          f"{result['unknown_prompts']} unknown prompts) in {result['seconds']:.2f} s")
+    for path in result["files"]:
+        print(f"  -> {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
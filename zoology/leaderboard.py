@@ -0,0 +1,216 @@
+"""
+各班即時排行榜：學生每答一題就更新自己的分數，不必每次重畫時把全班的紀錄重排一次。
+
+每班一個 skip list，依 (-答對題數, 作答題數, 第一次上榜順序) 排序（答對多的在前，同分時答得少 = 正確率高的在前），
+每層記錄跨過幾個節點（span），所以插入、刪除、查名次都是期望 O(log n)。
+寫入（record）拿該班的鎖；改動碰到前 top_k 名時，順便把前 top_k 名重算成一個 tuple 換上去，
+看排行榜（top）只讀這個 tuple 的參照，不用拿鎖、也不會擋住正在作答的學生。
+"""
+import random
+import threading
+
+MAX_LEVEL = 24   # 期望可放 4^24 筆，遠超過一個班
+P_LEVEL = 0.25
+
+
+class _Node:
+    __slots__ = ("key", "value", "next", "span")
+
+    def __init__(self, key, value, level):
+        self.key = key
+        self.value = value
+        self.next = [None] * level
+        self.span = [0] * level
+
+
+class SkipList:
+    """
+    可依名次索引的有序 skip list（key 不可重複，呼叫端自己保證）。
+      insert(key, value) / remove(key) / rank(key)（0 起算）/ head(k) 前 k 筆 (key, value)
+    """
+
+    def __init__(self, rng=None):
+        self._head = _Node(None, None, MAX_LEVEL)
+        self._level = 1
+        self._len = 0
+        self._rng = rng or random.Random()
+
+    def __len__(self):
+        return self._len
+
+    def _random_level(self):
+        level = 1
+        while level < MAX_LEVEL and self._rng.random() < P_LEVEL:
+            level += 1
+        return level
+
+    def _path(self, key):
+        """每一層最後一個 key < 目標的節點，與它的名次（head 為 -1）"""
+        update = [None] * MAX_LEVEL
+        rank = [0] * MAX_LEVEL
+        node = self._head
+        pos = -1
+        for lv in range(self._level - 1, -1, -1):
+            nxt = node.next[lv]
+            while nxt is not None and nxt.key < key:
+                pos += node.span[lv]
+                node = nxt
+                nxt = node.next[lv]
+            update[lv] = node
+            rank[lv] = pos
+        return update, rank
+
+    def insert(self, key, value):
+        update, rank = self._path(key)
+        level = self._random_level()
+        if level > self._level:
+            for lv in range(self._level, level):
+                update[lv] = self._head
+                rank[lv] = -1
+                self._head.span[lv] = self._len
+            self._level = level
+        node = _Node(key, value, level)
+        pos = rank[0] + 1   # 新節點的名次
+        for lv in range(level):
+            prev = update[lv]
+            node.next[lv] = prev.next[lv]
+            prev.next[lv] = node
+            # prev 原本跨到下一個節點的距離，拆成 prev→node、node→下一個
+            node.span[lv] = prev.span[lv] - (pos - rank[lv]) + 1
+            prev.span[lv] = pos - rank[lv]
+        for lv in range(level, self._level):
+            update[lv].span[lv] += 1
+        self._len += 1
+        return pos
+
+    def remove(self, key):
+        update, _ = self._path(key)
+        node = update[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        for lv in range(self._level):
+            prev = update[lv]
+            if prev.next[lv] is node:
+                prev.span[lv] += node.span[lv] - 1
+                prev.next[lv] = node.next[lv]
+            else:
+                prev.span[lv] -= 1
+        while self._level > 1 and self._head.next[self._level - 1] is None:
+            self._level -= 1
+        self._len -= 1
+        return node.value
+
+    def rank(self, key):
+        """key 的名次（0 起算）；不存在時丟 KeyError"""
+        update, rank = self._path(key)
+        node = update[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        return rank[0] + 1
+
+    def head(self, k):
+        out = []
+        node = self._head.next[0]
+        while node is not None and len(out) < k:
+            out.append((node.key, node.value))
+            node = node.next[0]
+        return out
+
+
+class Standing:
+    """排行榜上的一筆（top() 回傳的是不會再變的 tuple，畫面可以放心拿去用）"""
+    __slots__ = ("rank", "student", "display", "correct", "answered")
+
+    def __init__(self, rank, student, display, correct, answered):
+        self.rank = rank
+        self.student = student
+        self.display = display
+        self.correct = correct
+        self.answered = answered
+
+    @property
+    def accuracy(self):
+        return self.correct / self.answered if self.answered else 0.0
+
+
+class ClassBoard:
+    """
+    一個班的排行榜。
+      record(student, display, is_correct) : 某學生答了一題（O(log n)；有擠進 / 擠出前 top_k 名時再加 O(top_k)）
+      top(k)                               : 前 k 名（k <= top_k；不拿鎖）
+      rank_of(student)                     : 某學生目前第幾名（1 起算；沒答過題回傳 None）
+    """
+
+    def __init__(self, top_k=20):
+        self.top_k = top_k
+        self._list = SkipList()
+        self._scores = {}      # student -> (key, display, correct, answered)
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._top = ()         # 前 top_k 名的 Standing，整個換掉，讀的人不必拿鎖
+
+    def __len__(self):
+        return len(self._scores)
+
+    def record(self, student, display, is_correct):
+        with self._lock:
+            old = self._scores.get(student)
+            if old is None:
+                self._seq += 1
+                seq, correct, answered = self._seq, 0, 0
+                touched_top = False
+            else:
+                old_key, _, correct, answered = old
+                seq = old_key[2]
+                touched_top = self._list.rank(old_key) < self.top_k
+                self._list.remove(old_key)
+            correct += 1 if is_correct else 0
+            answered += 1
+            key = (-correct, answered, seq)
+            pos = self._list.insert(key, student)
+            self._scores[student] = (key, display, correct, answered)
+            if touched_top or pos < self.top_k:
+                self._publish()
+
+    def _publish(self):
+        scores = self._scores
+        self._top = tuple(
+            Standing(i + 1, student, scores[student][1], scores[student][2], scores[student][3])
+            for i, (_, student) in enumerate(self._list.head(self.top_k))
+        )
+
+    def top(self, k=None):
+        top = self._top
+        return top if k is None else top[:k]
+
+    def rank_of(self, student):
+        with self._lock:
+            entry = self._scores.get(student)
+            return None if entry is None else self._list.rank(entry[0]) + 1
+
+
+class Leaderboards:
+    """所有班級的排行榜（所有 session 共用一個）"""
+
+    def __init__(self, top_k=20):
+        self.top_k = top_k
+        self._boards = {}
+        self._lock = threading.Lock()
+
+    def board(self, user_class):
+        board = self._boards.get(user_class)
+        if board is None:
+            with self._lock:
+                board = self._boards.setdefault(user_class, ClassBoard(self.top_k))
+        return board
+
+    def record(self, user_class, student, display, is_correct):
+        self.board(user_class).record(student, display, is_correct)
+
+    def classes(self):
+        return sorted(self._boards)
+
+    def reset(self, user_class):
+        """重新開始一場比賽：整班換成新的空排行榜"""
+        with self._lock:
+            self._boards[user_class] = ClassBoard(self.top_k)
@@ -0,0 +1,331 @@
+"""
+題庫載入：Excel → LoadedBank，外加編譯好的 snapshot 檔。
+
+snapshot 以 Excel 檔的 size / mtime / sha256 為 key；暖啟動時直接讀 snapshot，
+完全不 import pandas / openpyxl，只有 snapshot 過期或不存在時才重新解析 Excel。
+
+容器建置時可先產生 snapshot：
+    python -m zoology.loader Zoology_Terms_Bilingual.xlsx
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+from zoology.bank import BankIndex, LoadedBank
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SUFFIX = ".snapshot.json"
+
+
+# ===================== Excel 讀取（容錯版） =====================
+CN_CANDIDATES = ["name", "中文", "名稱", "chinese", "cn"]
+EN_CANDIDATES = ["english", "英文", "term", "英文名", "en", "english term"]
+
+# openpyxl read-only 模式一次轉成 DataFrame 的列數
+CHUNK_ROWS = 50_000
+
+
+def _find_columns(header):
+    """依候選名稱找出中文欄、英文欄的位置；找不到的回傳 None"""
+    cols_norm = {}
+    for pos, c in enumerate(header):
+        cols_norm.setdefault(str(c).strip().lower(), pos)
+
+    cn_pos = next((cols_norm[c] for c in CN_CANDIDATES if c in cols_norm), None)
+    en_pos = next((cols_norm[c] for c in EN_CANDIDATES if c in cols_norm), None)
+    return cn_pos, en_pos
+
+
+def _missing_columns_error(header):
+    return (
+        "找不到必要欄位。\n"
+        f"目前檔案欄位是：{list(header)}\n"
+        f"中文欄候選：{CN_CANDIDATES}\n"
+        f"英文欄候選：{EN_CANDIDATES}\n"
+        "請把 Excel 兩欄名稱改成上述其中一個（例如：Name / English）。"
+    )
+
+
+def iter_sheets(path, sheets):
+    """
+    逐張工作表產生 (sheet 名稱, 表頭, 資料列 chunk 的 iterator)。
+    .xlsx/.xlsm 用 openpyxl read-only iter_rows 串流讀取，其他格式（.xls/.csv）交給 pandas。
+    sheets: None = 只讀第一張；"all" = 全部；或指定名稱 list
+    """
+    import pandas as pd
+
+    ext = os.path.splitext(str(path))[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        from openpyxl import load_workbook
+
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            if sheets is None:
+                names = wb.sheetnames[:1]
+            elif sheets == "all":
+                names = wb.sheetnames
+            else:
+                names = list(sheets)
+            for name in names:
+                rows = wb[name].iter_rows(values_only=True)
+                header = list(next(rows, None) or [])
+                yield name, header, _chunked(rows, CHUNK_ROWS)
+        finally:
+            wb.close()
+        return
+
+    if ext == ".csv":
+        frames = {os.path.basename(str(path)): pd.read_csv(path, dtype=object)}
+    else:
+        frames = pd.read_excel(path, sheet_name=0 if sheets is None else (None if sheets == "all" else list(sheets)), dtype=object)
+        if not isinstance(frames, dict):
+            frames = {0: frames}
+    for name, df in frames.items():
+        yield name, list(df.columns), iter([df.itertuples(index=False, name=None)])
+
+
+def _chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _clean_column(values):
+    """整欄一次清理：缺值 → ""，其餘轉字串後 strip"""
+    import pandas as pd
+
+    s = pd.Series(values, dtype=object)
+    return s.where(s.notna(), "").astype(str).str.strip()
+
+
+def read_question_bank(xlsx_path="Zoology_Terms_Bilingual.xlsx", sheets=None):
+    """
+    嘗試讀取 Excel 並自動對應「中文名欄」與「英文名欄」.
+    支援常見欄位名稱（不分大小寫）：
+      中文欄候選: Name, 中文, 名稱, Chinese, CN
+      英文欄候選: English, 英文, Term, 英文名, EN, English term
+    xlsx_path 可以是單一路徑或多個檔案（例如一章一檔）；sheets 見 iter_sheets。
+    多張表 / 多個檔案會合併成一個題庫，英文（casefold 後）重複的只留第一筆。
+    回傳 dict:
+    {
+      "ok": bool,
+      "error": str,
+      "bank": [ { "name":..., "english":...}, ... ],
+      "debug_cols": [...],
+      "stats": [ {"file", "sheet", "rows", "kept", "duplicates", "seconds"}, ... ]
+    }
+    """
+    paths = [xlsx_path] if isinstance(xlsx_path, (str, os.PathLike)) else list(xlsx_path)
+
+    names, englishes, seen = [], [], set()
+    debug_cols, stats = [], []
+    first_error = ""
+
+    for path in paths:
+        try:
+            for sheet, header, chunks in iter_sheets(path, sheets):
+                t0 = time.perf_counter()
+                debug_cols = debug_cols or header
+                cn_pos, en_pos = _find_columns(header)
+                if cn_pos is None or en_pos is None:
+                    first_error = first_error or _missing_columns_error(header)
+                    stats.append({"file": str(path), "sheet": str(sheet), "rows": 0, "kept": 0,
+                                  "duplicates": 0, "seconds": time.perf_counter() - t0,
+                                  "error": "missing columns"})
+                    continue
+
+                n_rows = n_kept = n_dup = 0
+                for chunk in chunks:
+                    chunk = list(chunk)
+                    width = max(cn_pos, en_pos) + 1
+                    cn = _clean_column([r[cn_pos] if len(r) >= width else None for r in chunk])
+                    en = _clean_column([r[en_pos] if len(r) >= width else None for r in chunk])
+                    keep = (cn != "") & (en != "")
+                    cn, en = cn[keep], en[keep]
+
+                    keys = en.str.casefold()
+                    fresh = ~keys.duplicated() & ~keys.isin(seen)
+                    n_dup += int((~fresh).sum())
+
+                    seen.update(keys[fresh])
+                    names.extend(cn[fresh])
+                    englishes.extend(en[fresh])
+                    n_rows += len(chunk)
+                    n_kept += int(fresh.sum())
+
+                stats.append({"file": str(path), "sheet": str(sheet), "rows": n_rows, "kept": n_kept,
+                              "duplicates": n_dup, "seconds": time.perf_counter() - t0})
+        except Exception as e:
+            return {
+                "ok": False,
+                "error": f"無法讀取題庫檔案 {path} ：{e}",
+                "bank": [],
+                "debug_cols": [],
+                "stats": stats,
+            }
+
+    if not names and first_error:
+        return {
+            "ok": False,
+            "error": first_error,
+            "bank": [],
+            "debug_cols": debug_cols,
+            "stats": stats,
+        }
+
+    return {
+        "ok": True,
+        "error": "",
+        "bank": [{"name": n, "english": e} for n, e in zip(names, englishes)],
+        "debug_cols": debug_cols,
+        "stats": stats,
+    }
+
+
+# ===================== Snapshot =====================
+def _as_paths(xlsx_path):
+    return [xlsx_path] if isinstance(xlsx_path, (str, os.PathLike)) else list(xlsx_path)
+
+
+def _sheets_key(sheets):
+    """snapshot 記錄的 sheets：None / "all" 原樣，名稱清單一律轉成 list（JSON 讀回來也是 list，tuple 才比得上）"""
+    return sheets if sheets is None or sheets == "all" else list(sheets)
+
+
+def default_snapshot_path(xlsx_path):
+    return str(_as_paths(xlsx_path)[0]) + SNAPSHOT_SUFFIX
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def source_fingerprint(xlsx_path, with_hash=True):
+    st_ = os.stat(xlsx_path)
+    return {
+        "path": os.path.basename(str(xlsx_path)),
+        "size": st_.st_size,
+        "mtime_ns": st_.st_mtime_ns,
+        "sha256": file_sha256(xlsx_path) if with_hash else None,
+    }
+
+
+def write_snapshot(loaded, xlsx_path, snapshot_path=None, sheets=None):
+    """把 LoadedBank 存成 snapshot（先寫暫存檔再 rename，避免讀到寫一半的檔）"""
+    snapshot_path = snapshot_path or default_snapshot_path(xlsx_path)
+    data = {
+        "version": SNAPSHOT_VERSION,
+        "sources": [source_fingerprint(p) for p in _as_paths(xlsx_path)],
+        "sheets": _sheets_key(sheets),
+        "debug_cols": [str(c) for c in loaded.debug_cols],
+        "stats": list(loaded.stats),
+        "names": list(loaded.index.names),
+        "englishes": list(loaded.index.englishes),
+    }
+    tmp = f"{snapshot_path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, snapshot_path)
+    return snapshot_path
+
+
+def _source_matches(saved, path):
+    """size + mtime 相同直接採用；mtime 不同（例如 COPY 進容器）時再比對內容 hash"""
+    cur = source_fingerprint(path, with_hash=False)
+    if saved.get("path") != cur["path"] or saved.get("size") != cur["size"]:
+        return False
+    return saved.get("mtime_ns") == cur["mtime_ns"] or saved.get("sha256") == file_sha256(path)
+
+
+def read_snapshot(xlsx_path, snapshot_path=None, sheets=None):
+    """snapshot 仍有效就回傳 LoadedBank，否則回傳 None"""
+    snapshot_path = snapshot_path or default_snapshot_path(xlsx_path)
+    paths = _as_paths(xlsx_path)
+    try:
+        with open(snapshot_path, encoding="utf-8") as f:
+            data = json.load(f)
+        saved = data.get("sources", [])
+        if (
+            data.get("version") != SNAPSHOT_VERSION
+            or data.get("sheets") != _sheets_key(sheets)
+            or len(saved) != len(paths)
+            or not all(_source_matches(sv, p) for sv, p in zip(saved, paths))
+        ):
+            return None
+    except (OSError, ValueError):
+        return None
+
+    bank = [{"name": n, "english": e} for n, e in zip(data["names"], data["englishes"])]
+    return LoadedBank(True, "", data.get("debug_cols", []), BankIndex(bank), data.get("stats", []))
+
+
+def build_loaded_bank(xlsx_path, use_snapshot=True, snapshot_path=None, sheets=None):
+    """
+    讀題庫並轉成唯讀的 LoadedBank。xlsx_path / sheets 見 read_question_bank。
+    use_snapshot=True 時先試 snapshot，過期才讀 Excel，讀成功後順手更新 snapshot
+    （snapshot 寫不進去就算了，不影響這次載入）。
+    """
+    if use_snapshot:
+        cached = read_snapshot(xlsx_path, snapshot_path, sheets)
+        if cached is not None:
+            return cached
+
+    raw = read_question_bank(xlsx_path, sheets)
+    loaded = LoadedBank(raw["ok"], raw["error"], raw["debug_cols"], BankIndex(raw["bank"]), raw["stats"])
+
+    if use_snapshot and loaded.ok:
+        try:
+            write_snapshot(loaded, xlsx_path, snapshot_path, sheets)
+        except OSError:
+            pass
+    return loaded
+
+
+def format_stats(stats):
+    """每張表的列數 / 保留數 / 重複數 / 耗時，一行一張"""
+    lines = []
+    for st_ in stats:
+        line = (
+            f"{st_['file']} [{st_['sheet']}]: {st_['rows']} rows, {st_['kept']} kept, "
+            f"{st_['duplicates']} duplicates, {st_['seconds'] * 1000:.1f} ms"
+        )
+        if st_.get("error"):
+            line += f" ({st_['error']})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="預先把 Excel 題庫編譯成 snapshot")
+    ap.add_argument("xlsx", nargs="*", default=["Zoology_Terms_Bilingual.xlsx"],
+                    help="一個或多個題庫檔（例如一章一檔）")
+    ap.add_argument("-o", "--output", help="snapshot 路徑（預設：<第一個檔案>%s）" % SNAPSHOT_SUFFIX)
+    ap.add_argument("--all-sheets", action="store_true", help="讀取每個檔案的所有工作表")
+    args = ap.parse_args(argv)
+
+    sheets = "all" if args.all_sheets else None
+    paths = args.xlsx if len(args.xlsx) > 1 else args.xlsx[0]
+    loaded = build_loaded_bank(paths, use_snapshot=False, sheets=sheets)
+    print(format_stats(loaded.stats))
+    if not loaded.ok:
+        print(loaded.error, file=sys.stderr)
+        return 1
+    path = write_snapshot(loaded, paths, args.output, sheets)
+    print(f"{len(loaded.index)} terms -> {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""
+每次 rerun 各階段（載入題庫、整理 session、出選項、畫面、處理按鈕…）的耗時統計。
+
+所有 session 共用一個 PhaseMetrics：每個階段一組固定邊界的直方圖，
+記錄一次只是「bisect 找桶子 + 加一」，可以一直開著。
+  - 累計直方圖：從開機到現在，匯出成 Prometheus text format（_bucket / _sum / _count）
+  - 滾動視窗：最近 slots × slot_seconds 秒，用來估 p50 / p95 / p99 給管理面板看
+exporter 執行緒每隔幾秒把兩種格式寫到檔案（先寫暫存檔再 rename）。
+"""
+import atexit
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+
+# 桶子上界（秒），最後一個桶子是 +Inf
+BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class _Histogram:
+    """一個階段的累計直方圖 + 滾動視窗（環狀的 slots）"""
+    __slots__ = ("counts", "total", "sum", "slot_ids", "slot_counts", "slot_sums")
+
+    def __init__(self, n_slots):
+        width = len(BUCKETS) + 1
+        self.counts = [0] * width
+        self.total = 0
+        self.sum = 0.0
+        self.slot_ids = [-1] * n_slots
+        self.slot_counts = [[0] * width for _ in range(n_slots)]
+        self.slot_sums = [0.0] * n_slots
+
+
+class _Timer:
+    __slots__ = ("metrics", "phase", "t0")
+
+    def __init__(self, metrics, phase):
+        self.metrics = metrics
+        self.phase = phase
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        # 被 st.rerun / st.stop 的例外中斷時也照樣記錄
+        self.metrics.observe(self.phase, time.perf_counter() - self.t0)
+        return False
+
+
+def _quantile(counts, q):
+    """依桶子計數估第 q 分位（桶內線性內插，同 Prometheus histogram_quantile）"""
+    total = sum(counts)
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for i, c in enumerate(counts):
+        if seen + c >= rank and c:
+            lo = BUCKETS[i - 1] if i else 0.0
+            if i >= len(BUCKETS):
+                return lo
+            return lo + (BUCKETS[i] - lo) * (rank - seen) / c
+        seen += c
+    return BUCKETS[-1]
+
+
+class PhaseMetrics:
+    """
+    observe(phase, seconds) / time(phase) / timed(phase)：記錄一次耗時（thread-safe）
+    window()        : 最近視窗內每個階段的次數、平均、p50 / p95 / p99（秒）
+    to_prometheus() : Prometheus text format（累計）
+    to_json()       : 累計 + 視窗統計
+    start_export()  : 開背景執行緒定期寫檔
+    """
+
+    def __init__(self, slots=12, slot_seconds=5.0, prefix="zoology"):
+        self.slots = slots
+        self.slot_seconds = slot_seconds
+        self.prefix = prefix
+        self.started = time.time()
+        self._hists = {}
+        self._lock = threading.Lock()
+        self._export_thread = None
+        self._stop = threading.Event()
+
+    def time(self, phase):
+        return _Timer(self, phase)
+
+    def timed(self, phase):
+        """裝飾器版的 time()"""
+        def deco(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with _Timer(self, phase):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return deco
+
+    def observe(self, phase, seconds):
+        b = bisect.bisect_left(BUCKETS, seconds)
+        slot_id = int(time.monotonic() // self.slot_seconds)
+        i = slot_id % self.slots
+        with self._lock:
+            h = self._hists.get(phase)
+            if h is None:
+                h = self._hists[phase] = _Histogram(self.slots)
+            h.counts[b] += 1
+            h.total += 1
+            h.sum += seconds
+            if h.slot_ids[i] != slot_id:
+                # 這格已經是上一圈的資料：清掉重用
+                h.slot_ids[i] = slot_id
+                h.slot_counts[i] = [0] * len(h.counts)
+                h.slot_sums[i] = 0.0
+            h.slot_counts[i][b] += 1
+            h.slot_sums[i] += seconds
+
+    def window(self):
+        """{phase: {"count", "mean", "p50", "p95", "p99"}}（最近 slots × slot_seconds 秒）"""
+        oldest = int(time.monotonic() // self.slot_seconds) - self.slots + 1
+        out = {}
+        with self._lock:
+            for phase, h in self._hists.items():
+                counts = [0] * len(h.counts)
+                total_sum = 0.0
+                for sid, sc, ss in zip(h.slot_ids, h.slot_counts, h.slot_sums):
+                    if sid >= oldest:
+                        counts = [a + b for a, b in zip(counts, sc)]
+                        total_sum += ss
+                n = sum(counts)
+                out[phase] = {
+                    "count": n,
+                    "mean": total_sum / n if n else None,
+                    "p50": _quantile(counts, 0.50),
+                    "p95": _quantile(counts, 0.95),
+                    "p99": _quantile(counts, 0.99),
+                }
+        return out
+
+    def _cumulative(self):
+        with self._lock:
+            return {p: (list(h.counts), h.total, h.sum) for p, h in self._hists.items()}
+
+    def to_prometheus(self):
+        name = f"{self.prefix}_phase_seconds"
+        lines = [
+            f"# HELP {name} Time spent in each phase of a script run.",
+            f"# TYPE {name} histogram",
+        ]
+        for phase, (counts, total, total_sum) in sorted(self._cumulative().items()):
+            acc = 0
+            for le, c in zip(BUCKETS, counts):
+                acc += c
+                lines.append(f'{name}_bucket{{phase="{phase}",le="{le:g}"}} {acc}')
+            lines.append(f'{name}_bucket{{phase="{phase}",le="+Inf"}} {total}')
+            lines.append(f'{name}_sum{{phase="{phase}"}} {total_sum:.6f}')
+            lines.append(f'{name}_count{{phase="{phase}"}} {total}')
+        return "\n".join(lines) + "\n"
+
+    def to_json(self):
+        cumulative = {
+            p: {"count": total, "sum": total_sum, "buckets": dict(zip([*map(str, BUCKETS), "+Inf"], counts))}
+            for p, (counts, total, total_sum) in self._cumulative().items()
+        }
+        return json.dumps({
+            "ts": time.time(),
+            "started": self.started,
+            "window_seconds": self.slots * self.slot_seconds,
+            "window": self.window(),
+            "cumulative": cumulative,
+        }, ensure_ascii=False)
+
+    # ---------- 定期匯出 ----------
+    def start_export(self, path_prefix, every=15.0):
+        """每 every 秒寫 <path_prefix>.prom 與 <path_prefix>.json；重複呼叫不會開第二個執行緒"""
+        if self._export_thread is not None:
+            return
+        self._export_thread = threading.Thread(
+            target=self._export_loop, args=(path_prefix, every), name="metrics-export", daemon=True
+        )
+        self._export_thread.start()
+        atexit.register(self.stop_export)
+
+    def stop_export(self):
+        """停掉 exporter，結束前再寫最後一次"""
+        self._stop.set()
+        if self._export_thread is not None:
+            self._export_thread.join(timeout=5)
+
+    def _export_loop(self, path_prefix, every):
+        while not self._stop.wait(every):
+            self.write(path_prefix)
+        self.write(path_prefix)
+
+    def write(self, path_prefix):
+        for ext, text in ((".prom", self.to_prometheus()), (".json", self.to_json())):
+            path = path_prefix + ext
+            tmp = f"{path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(text)
+                os.replace(tmp, path)
+            except OSError:
+                pass
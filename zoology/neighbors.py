@@ -0,0 +1,110 @@
+"""
+「難的干擾選項」：先把每個英文 / 中文詞轉成字元 n-gram 向量，
+分塊做矩陣乘法找出每題最像的 K 個詞，存成 int32 的 N×K 表。
+出題時直接從該列挑干擾選項，O(1)，不用當場算相似度。
+"""
+import random
+import threading
+import zlib
+
+# 英文取 2~3 字元 n-gram，中文取單字 + 雙字
+ENGLISH_NGRAMS = (2, 3)
+NAME_NGRAMS = (1, 2)
+
+
+def _ngrams(text, sizes):
+    padded = f" {text} "
+    for n in sizes:
+        for i in range(len(padded) - n + 1):
+            yield padded[i:i + n]
+
+
+def ngram_matrix(strings, sizes, dim=256):
+    """feature hashing 成 N×dim 的 float32 矩陣，每列做 L2 正規化"""
+    import numpy as np
+
+    mat = np.zeros((len(strings), dim), dtype=np.float32)
+    for row, text in enumerate(strings):
+        for g in _ngrams(text, sizes):
+            mat[row, zlib.crc32(g.encode("utf-8")) % dim] += 1.0
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    mat /= norms
+    return mat
+
+
+def top_k_neighbors(strings, sizes, k=8, dim=256, block=512):
+    """
+    回傳 N×k 的 int32 陣列：第 i 列是與 strings[i] 最像的 k 個 idx（由像到不像），
+    不足 k 個時補 -1。完全相同的字串不算鄰居。
+    相似度矩陣分塊算（每次 block×N），記憶體不會隨 N² 成長。
+    """
+    import numpy as np
+
+    n = len(strings)
+    out = np.full((n, k), -1, dtype=np.int32)
+    if n < 2 or k <= 0:
+        return out
+
+    mat = ngram_matrix(strings, sizes, dim)
+    _, group = np.unique(np.asarray(strings, dtype=object).astype(str), return_inverse=True)
+    kk = min(k, n - 1)
+    for start in range(0, n, block):
+        stop = min(start + block, n)
+        sims = mat[start:stop] @ mat.T
+        sims[group[start:stop, None] == group[None, :]] = -np.inf
+
+        top = np.argpartition(-sims, kk - 1, axis=1)[:, :kk]
+        top_sims = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_sims, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top[np.take_along_axis(top_sims, order, axis=1) == -np.inf] = -1
+        out[start:stop, :kk] = top
+    return out
+
+
+class NeighborTable:
+    """
+    english / name : N×K int32 鄰居表（模式一用英文、模式二用中文）
+    出題時從前 K 個最像的詞裡隨機挑，不夠（題庫太小）再交給 BankIndex.sample_distractors 補。
+    """
+    __slots__ = ("bank", "english", "name")
+
+    def __init__(self, bank, k=8, dim=256):
+        self.bank = bank
+        self.english = top_k_neighbors(bank.english_keys, ENGLISH_NGRAMS, k, dim)
+        self.name = top_k_neighbors(bank.names, NAME_NGRAMS, k, dim)
+
+    def sample_distractors(self, qidx, k, field="english", rng=random):
+        table, keys = (self.english, self.bank.english_keys) if field == "english" else (self.name, self.bank.names)
+        seen = {keys[qidx]}
+        picked = []
+        row = [int(j) for j in table[qidx] if j >= 0]
+        for j in rng.sample(row, len(row)):
+            if len(picked) >= k:
+                break
+            if keys[j] not in seen:
+                seen.add(keys[j])
+                picked.append(j)
+        if len(picked) < k:
+            # 相似詞不夠（重複項或表裡的 -1），差的幾個從整個題庫補，已挑的不再抽
+            picked.extend(self.bank.sample_distractors(qidx, k - len(picked), field, rng, exclude=seen))
+        return picked
+
+
+class PendingNeighborTable:
+    """
+    在背景執行緒建 NeighborTable（題庫很大時要好幾秒），建好前 .table 是 None，
+    呼叫端這段期間先用一般的隨機干擾選項。已經有現成的表（table，例如共用題庫裡附的）就直接用，不開執行緒。
+    """
+    __slots__ = ("table", "thread")
+
+    def __init__(self, bank, k=8, dim=256, table=None):
+        self.table = table
+        self.thread = None
+        if table is None:
+            self.thread = threading.Thread(target=self._build, args=(bank, k, dim), daemon=True)
+            self.thread.start()
+
+    def _build(self, bank, k, dim):
+        self.table = NeighborTable(bank, k, dim)
@@ -0,0 +1,97 @@
+"""
+精簡的作答紀錄：每筆只存數字（回合、模式、term ID、選到的選項 ID、對錯），
+題目文字一律回題庫查，不在每個 session 裡重複存一份字串。
+"""
+from array import array
+from collections import namedtuple
+
+# 與原本 records 裡的 7-tuple 同順序
+Record = namedtuple(
+    "Record",
+    ["round", "prompt", "chosen", "correct_eng", "correct_name", "is_correct", "options"],
+)
+
+NO_TERM = -1  # 選項不是題庫裡的詞（例如 "???"），或模式三手寫答案
+
+
+class RecordStore:
+    """
+    以 array 欄位存的作答紀錄。
+      rounds / modes / term_ids / chosen_ids : 每筆一格
+      correct                                : 每筆一個 byte（0/1）
+      opt_offsets / opt_ids                  : 第 i 筆的選項 = opt_ids[opt_offsets[i]:opt_offsets[i+1]]
+      typed                                  : 只有與正確答案不完全相同的手寫作答（模式三答錯或拼字小錯）才存 {i: 文字}
+    """
+    __slots__ = ("rounds", "modes", "term_ids", "chosen_ids", "correct", "opt_offsets", "opt_ids", "typed")
+
+    def __init__(self):
+        self.rounds = array("H")
+        self.modes = array("B")
+        self.term_ids = array("i")
+        self.chosen_ids = array("i")
+        self.correct = bytearray()
+        self.opt_offsets = array("I", [0])
+        self.opt_ids = array("i")
+        self.typed = {}
+
+    def __len__(self):
+        return len(self.term_ids)
+
+    def append(self, round_no, mode_code, term_id, chosen_id, is_correct, option_ids=(), typed=None):
+        if typed is not None and chosen_id == NO_TERM:
+            self.typed[len(self.term_ids)] = typed
+        self.rounds.append(round_no)
+        self.modes.append(mode_code)
+        self.term_ids.append(term_id)
+        self.chosen_ids.append(chosen_id)
+        self.correct.append(1 if is_correct else 0)
+        self.opt_ids.extend(option_ids)
+        self.opt_offsets.append(len(self.opt_ids))
+
+    def is_correct(self, i):
+        return bool(self.correct[i])
+
+    def n_correct(self):
+        return sum(self.correct)
+
+    def option_ids(self, i):
+        i = range(len(self))[i]
+        return self.opt_ids[self.opt_offsets[i]:self.opt_offsets[i + 1]]
+
+    def get(self, i, bank, english_prompt_modes=()):
+        """
+        把第 i 筆還原成 Record（欄位同原本的 7-tuple）。
+        bank: BankIndex；english_prompt_modes: 題目是英文的模式代碼（模式二）
+        """
+        i = range(len(self))[i]
+        mode = self.modes[i]
+        name, eng = bank.term(self.term_ids[i]) or ("", "")
+
+        chosen_id = self.chosen_ids[i]
+        if chosen_id != NO_TERM:
+            c_name, c_eng = bank.term(chosen_id) or ("", "")
+            chosen = c_eng if mode not in english_prompt_modes else c_name
+        elif i in self.typed:
+            chosen = self.typed[i]
+        else:
+            chosen = eng if self.correct[i] else ""
+
+        options = None
+        if self.opt_offsets[i + 1] > self.opt_offsets[i]:
+            options = []
+            for t in self.option_ids(i):
+                pair = bank.term(t) if t != NO_TERM else None
+                if pair is None:
+                    options.append("???")
+                else:
+                    options.append(pair[0] if mode in english_prompt_modes else pair[1])
+
+        return Record(
+            self.rounds[i],
+            eng if mode in english_prompt_modes else name,
+            chosen,
+            eng,
+            name,
+            bool(self.correct[i]),
+            options,
+        )
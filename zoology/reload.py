@@ -0,0 +1,92 @@
+"""
+題庫熱更新：定期檢查題庫檔的 size / mtime，有變動就在背景執行緒重新載入，
+比對新舊題目後用一次參照替換（current）整個換上新版索引。
+
+正在作答的 session 只存 term ID，換版後仍可用 BankIndex.idx_of() 找到同一題。
+"""
+import logging
+import os
+import threading
+import time
+
+from zoology.bank import LoadedBank, diff_banks
+
+logger = logging.getLogger(__name__)
+
+
+class LiveBank:
+    """
+    load_fn()  : 回傳新的 LoadedBank
+    paths      : 要監看的題庫檔
+    poll_every : 最短檢查間隔（秒），rerun 很頻繁時也只會 stat 這麼多次
+    rebase     : 新版依舊版重新配發 term ID；load_fn 拿到的已經配好（例如掛上 loader 發佈的共用題庫）時設 False
+    """
+
+    def __init__(self, load_fn, paths, poll_every=2.0, rebase=True):
+        self._load_fn = load_fn
+        self._rebase = rebase
+        self._paths = [paths] if isinstance(paths, (str, os.PathLike)) else list(paths)
+        self._poll_every = poll_every
+        self._lock = threading.Lock()
+        self._reloading = False
+        self._next_check = 0.0
+        self._stamp = self._file_stamp()
+        self.current = load_fn()
+        self.last_diff = None
+
+    def _file_stamp(self):
+        stamp = []
+        for p in self._paths:
+            try:
+                st_ = os.stat(p)
+                stamp.append((st_.st_size, st_.st_mtime_ns))
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def poll(self, background=True):
+        """
+        每次 rerun 呼叫一次；間隔未到或已在重新載入時立即返回。
+        偵測到檔案變動就啟動重新載入（預設在背景，不讓觸發的那個學生等）。
+        """
+        now = time.monotonic()
+        if now < self._next_check or self._reloading:
+            return False
+        with self._lock:
+            if now < self._next_check or self._reloading:
+                return False
+            self._next_check = now + self._poll_every
+            stamp = self._file_stamp()
+            if stamp == self._stamp:
+                return False
+            self._reloading = True
+
+        if background:
+            threading.Thread(target=self._reload, args=(stamp,), daemon=True).start()
+        else:
+            self._reload(stamp)
+        return True
+
+    def _reload(self, stamp):
+        try:
+            fresh = self._load_fn()
+            if not fresh.ok or not len(fresh.index):
+                # 檔案可能還在存檔中或欄位壞了：保留舊版，下次變動再試
+                logger.warning("bank reload skipped: %s", fresh.error or "empty bank")
+                return
+            old = self.current
+            index = fresh.index.rebased_on(old.index) if self._rebase else fresh.index
+            diff = diff_banks(old.index, index)
+            self.last_diff = diff
+            # 單一參照指派是原子的：同一次 rerun 內拿到的永遠是完整的一版
+            self.current = LoadedBank(fresh.ok, fresh.error, fresh.debug_cols, index, fresh.stats)
+            logger.info(
+                "bank reloaded to v%d: +%d -%d ~%d",
+                index.version, len(diff["added"]), len(diff["removed"]), len(diff["changed"]),
+            )
+        except Exception:
+            logger.exception("bank reload failed")
+        finally:
+            with self._lock:
+                self._stamp = stamp
+                self._reloading = False
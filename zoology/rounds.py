@@ -0,0 +1,145 @@
+"""
+回合出題：每個 session 一個「還沒出過的 term ID」池，
+抽題用 swap-remove（隨機位置和尾端交換後 pop），抽 k 題只要 O(k)，不必每回合掃整個題庫。
+"""
+import heapq
+import random
+from array import array
+
+
+class TermPool:
+    """
+    ids    : 還沒出過的 term ID（順序無意義）
+    max_id : 建池時題庫裡最大的 term ID；熱更新後比它大的就是新加入的題目
+    """
+    __slots__ = ("ids", "max_id")
+
+    def __init__(self, term_ids):
+        self.ids = array("i", term_ids)
+        self.max_id = max(term_ids, default=-1)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def draw(self, k, rng=random):
+        """不放回地抽 min(k, 剩餘數) 個 term ID"""
+        ids = self.ids
+        picked = []
+        for _ in range(min(k, len(ids))):
+            i = rng.randrange(len(ids))
+            ids[i], ids[-1] = ids[-1], ids[i]
+            picked.append(ids.pop())
+        return picked
+
+    def sync(self, bank):
+        """
+        題庫熱更新後對到新版：拿掉已刪除的題目，把新加入的題目放進池裡。
+        O(N)，但只在換版時跑一次。
+        """
+        alive = bank.by_term_id
+        fresh = [t for t in bank.term_ids if t > self.max_id]
+        self.ids = array("i", [t for t in self.ids if t in alive] + fresh)
+        self.max_id = max(self.max_id, max(bank.term_ids, default=-1))
+
+
+# ===================== 間隔複習（Leitner） =====================
+# 第 n 個盒子的複習間隔（單位：回合）；答對往上一盒，答錯回到第 0 盒
+LEITNER_INTERVALS = (1, 2, 4, 8, 16, 32)
+
+
+class LeitnerScheduler:
+    """
+    每個學生一份的間隔複習排程。時間以「回合」計（clock 每出一回合 +1）。
+      box / due : term ID -> 盒子編號 / 到期回合
+      heap      : (到期回合, 序號, term ID)，更新時直接 push 新項目，舊項目在 pop 時略過（lazy deletion）
+    只有看過的題目會進 heap；沒看過的題目由 TermPool 隨機補上。
+    出一回合是 O(k log N)，不需要每回合對整個題庫評分。
+    """
+    __slots__ = ("box", "due", "heap", "clock", "_seq", "_entry")
+
+    def __init__(self):
+        self.box = {}
+        self.due = {}
+        self.heap = []
+        self.clock = 0
+        self._seq = 0
+        self._entry = {}   # term ID -> 目前有效的 heap 序號
+
+    def __len__(self):
+        return len(self.due)
+
+    def clear(self):
+        self.box.clear()
+        self.due.clear()
+        self.heap.clear()
+        self._entry.clear()
+
+    def _push(self, term_id, due):
+        self._seq += 1
+        self.due[term_id] = due
+        self._entry[term_id] = self._seq
+        heapq.heappush(self.heap, (due, self._seq, term_id))
+
+    def _pop_valid(self, max_due=None):
+        """pop 最早到期的有效項目；max_due 不為 None 時只接受 due <= max_due"""
+        heap = self.heap
+        while heap:
+            due, seq, term_id = heap[0]
+            if self._entry.get(term_id) != seq:
+                heapq.heappop(heap)
+                continue
+            if max_due is not None and due > max_due:
+                return None
+            heapq.heappop(heap)
+            return term_id
+        return None
+
+    def next_round(self, k, pool, rng=random):
+        """
+        出下一回合 k 題：先出已到期的複習題，不夠再從 pool 抽新題，
+        還不夠（題庫都看過了）就提早出最快到期的題目。
+        """
+        self.clock += 1
+        picked = []
+        while len(picked) < k:
+            term_id = self._pop_valid(max_due=self.clock)
+            if term_id is None:
+                break
+            picked.append(term_id)
+
+        while len(picked) < k and len(pool):
+            # pool 可能在重新開始時被重建，已在排程中的題目略過
+            picked.extend(t for t in pool.draw(k - len(picked), rng) if t not in self.due)
+
+        while len(picked) < k:
+            term_id = self._pop_valid()
+            if term_id is None:
+                break
+            picked.append(term_id)
+
+        # 先排到下一回合：若這回合沒作答到，下回合還會再出現
+        for term_id in picked:
+            self.box.setdefault(term_id, 0)
+            self._push(term_id, self.clock + 1)
+        rng.shuffle(picked)
+        return picked
+
+    def record(self, term_id, is_correct):
+        """依作答結果調整盒子並重新排定到期回合"""
+        box = self.box.get(term_id, 0)
+        box = min(box + 1, len(LEITNER_INTERVALS) - 1) if is_correct else 0
+        self.box[term_id] = box
+        self._push(term_id, self.clock + LEITNER_INTERVALS[box])
+
+        # 過期項目太多時整理一次 heap
+        if len(self.heap) > 4 * len(self.due) + 64:
+            self.heap = [e for e in self.heap if self._entry.get(e[2]) == e[1]]
+            heapq.heapify(self.heap)
+
+    def sync(self, bank):
+        """題庫熱更新後拿掉已刪除的題目（只在換版時跑）"""
+        alive = bank.by_term_id
+        for term_id in [t for t in self.due if t not in alive]:
+            del self.box[term_id], self.due[term_id], self._entry[term_id]
+        self.heap = [e for e in self.heap if self._entry.get(e[2]) == e[1]]
+        heapq.heapify(self.heap)
@@ -0,0 +1,313 @@
+"""
+可續玩的 session：每次作答後把 QuizSession 存成一小段二進位 snapshot，
+學生斷線重連（Streamlit 開了新的 session）時用網址上的 session_id 找回來接著玩。
+
+snapshot 只有數字陣列（term ID、回合、對錯…）加幾個短字串，一局大約幾百 bytes：
+  header : magic、格式版本、題庫 fingerprint、process epoch、模式 / 回合 / 進度 / 分數…
+  之後依序是 questions、出題池、作答紀錄各欄、手寫答案、間隔複習排程、上一題結果、附帶的 meta 字串
+array 直接 tobytes()，不經過 pickle（也不會在讀回時執行任何程式碼）。
+
+term ID 只在同一個 process（熱更新會延續 ID）或題庫內容完全相同時才對得上：
+snapshot 記下題庫 fingerprint 與 process epoch，兩者都對不上就當作沒有 snapshot。
+
+SessionStore 另外以 LRU + 閒置時間上限追蹤還在記憶體裡的 QuizSession，
+超過人數或閒置太久就 release()，之後那個 session 回來時從 snapshot 還原。
+正在跑 rerun 的 session（checkout 之後、checkin 之前）不會被逐出。
+"""
+import os
+import struct
+import threading
+import time
+import zlib
+from array import array
+from collections import OrderedDict
+from contextlib import closing
+
+from .engine import Answer, QuizSession
+from .records import RecordStore
+from .rounds import LeitnerScheduler, TermPool
+from .storage import SnapshotRow, connect, load_snapshot
+
+MAGIC = b"ZQS"
+FORMAT_VERSION = 1
+# 每個 process 一個隨機值：同一個 process 裡 term ID 一定對得上
+PROCESS_EPOCH = int.from_bytes(os.urandom(8), "little")
+
+#          magic ver  fp   epoch mode spaced round pos score submitted bank_version
+_HEADER = struct.Struct("<3sBIQBBHHHBI")
+_U32 = struct.Struct("<I")
+_I32 = struct.Struct("<i")
+
+
+def bank_fingerprint(bank):
+    """(term ID, 英文) 的 CRC32：不同 process 載入同一份題庫時相同"""
+    crc = 0
+    for t, e in zip(bank.term_ids, bank.englishes):
+        crc = zlib.crc32(f"{t}\x1f{e}\x1e".encode("utf-8"), crc)
+    return crc
+
+
+# ===================== 編碼 =====================
+class _Writer:
+    __slots__ = ("parts",)
+
+    def __init__(self):
+        self.parts = []
+
+    def u32(self, v):
+        self.parts.append(_U32.pack(v))
+
+    def i32(self, v):
+        self.parts.append(_I32.pack(v))
+
+    def array(self, a):
+        self.parts.append(a.typecode.encode("ascii"))
+        self.u32(len(a))
+        self.parts.append(a.tobytes())
+
+    def bytes(self, b):
+        self.u32(len(b))
+        self.parts.append(bytes(b))
+
+    def str(self, s):
+        self.bytes(s.encode("utf-8"))
+
+
+class _Reader:
+    __slots__ = ("buf", "pos")
+
+    def __init__(self, buf, pos=0):
+        self.buf = memoryview(buf)
+        self.pos = pos
+
+    def u32(self):
+        (v,) = _U32.unpack_from(self.buf, self.pos)
+        self.pos += 4
+        return v
+
+    def i32(self):
+        (v,) = _I32.unpack_from(self.buf, self.pos)
+        self.pos += 4
+        return v
+
+    def array(self):
+        typecode = chr(self.buf[self.pos])
+        self.pos += 1
+        n = self.u32()
+        a = array(typecode)
+        size = n * a.itemsize
+        a.frombytes(self.buf[self.pos:self.pos + size])
+        self.pos += size
+        return a
+
+    def bytes(self):
+        n = self.u32()
+        b = self.buf[self.pos:self.pos + n].tobytes()
+        self.pos += n
+        return b
+
+    def str(self):
+        return self.bytes().decode("utf-8")
+
+
+def dump_session(s, fingerprint, meta=None):
+    """QuizSession（+ 字串 meta）→ bytes"""
+    w = _Writer()
+    w.parts.append(_HEADER.pack(
+        MAGIC, FORMAT_VERSION, fingerprint, PROCESS_EPOCH,
+        s.mode, int(s.spaced), s.round or 0, s.pos, s.score, int(s.submitted), s.bank_version,
+    ))
+    w.array(array("i", s.questions))
+    w.array(s.pool.ids)
+    w.i32(s.pool.max_id)
+
+    r = s.records
+    for a in (r.rounds, r.modes, r.term_ids, r.chosen_ids, r.opt_offsets, r.opt_ids):
+        w.array(a)
+    w.bytes(r.correct)
+    w.u32(len(r.typed))
+    for i, text in r.typed.items():
+        w.u32(i)
+        w.str(text)
+
+    # 排程只存每個看過的詞的盒子與到期回合，heap 讀回時重建
+    sch = s.scheduler
+    ids = array("i", sch.due)
+    w.u32(sch.clock)
+    w.array(ids)
+    w.array(array("B", [sch.box[t] for t in ids]))
+    w.array(array("I", [sch.due[t] for t in ids]))
+
+    last = s.last
+    if last is None:
+        w.u32(0)
+    else:
+        w.u32(1)
+        w.u32(int(last.is_correct))
+        w.str(last.chosen)
+        w.i32(last.chosen_id)
+        w.u32(last.n_typos)
+        w.array(array("i", last.suggestions))
+
+    meta = meta or {}
+    w.u32(len(meta))
+    for k, v in meta.items():
+        w.str(k)
+        w.str(v)
+    return b"".join(w.parts)
+
+
+def load_session(data, bank, fingerprint):
+    """
+    bytes → (QuizSession, meta)；格式不對、或 term ID 對不上目前題庫時回傳 None。
+    題庫內容相同時 bank_version 直接對到目前這一版；同一個 process 換過版的照舊，交給 QuizEngine.sync。
+    """
+    if len(data) < _HEADER.size:
+        return None
+    (magic, ver, fp, epoch, mode, spaced, round_no, pos, score, submitted,
+     bank_version) = _HEADER.unpack_from(data)
+    if magic != MAGIC or ver != FORMAT_VERSION:
+        return None
+    if fp == fingerprint:
+        bank_version = bank.version
+    elif epoch != PROCESS_EPOCH:
+        return None
+
+    rd = _Reader(data, _HEADER.size)
+    questions = list(rd.array())
+    pool = TermPool(())
+    pool.ids = rd.array()
+    pool.max_id = rd.i32()
+
+    records = RecordStore()
+    (records.rounds, records.modes, records.term_ids, records.chosen_ids,
+     records.opt_offsets, records.opt_ids) = (rd.array() for _ in range(6))
+    records.correct = bytearray(rd.bytes())
+    for _ in range(rd.u32()):
+        i = rd.u32()
+        records.typed[i] = rd.str()
+
+    scheduler = LeitnerScheduler()
+    clock = rd.u32()
+    ids, boxes, dues = rd.array(), rd.array(), rd.array()
+    for t, b, d in sorted(zip(ids, boxes, dues), key=lambda x: x[2]):
+        scheduler.box[t] = b
+        scheduler._push(t, d)
+    scheduler.clock = clock
+
+    s = QuizSession(mode, bool(spaced), pool, scheduler, bank_version)
+    s.round = round_no or None
+    s.questions = questions
+    s.pos = pos
+    s.records = records
+    s.score = score
+    s.submitted = bool(submitted)
+
+    if rd.u32():
+        is_correct = bool(rd.u32())
+        chosen = rd.str()
+        chosen_id = rd.i32()
+        n_typos = rd.u32()
+        suggestions = tuple(rd.array())
+        qidx = bank.idx_of(questions[pos]) if pos < len(questions) else None
+        s.last = Answer(qidx, is_correct, chosen, chosen_id, n_typos, suggestions)
+
+    meta = {}
+    for _ in range(rd.u32()):
+        k = rd.str()
+        meta[k] = rd.str()
+    return s, meta
+
+
+# ===================== 記憶體中的 session：LRU + 閒置逐出 =====================
+class SessionStore:
+    """
+    所有 Streamlit session 共用一個。
+      save(sid, quiz, bank, meta) : 存 snapshot（交給 AnswerWriter 背景寫進 SQLite，最近的另外留在記憶體）
+      restore(sid, bank)          : 找回 snapshot 還原成 (QuizSession, meta)；沒有或對不上時回傳 None
+      checkout(sid) / checkin(sid): 一次 rerun（或 fragment）的開頭 / 結尾；中間這個 session 不會被逐出（可巢狀）
+      touch(sid, quiz)            : 這個 session 剛用過；順便逐出最久沒用、或閒置超過 ttl 秒、而且沒在使用中的 session
+    畫面那邊每次改動 quiz 都會 save()，所以逐出時直接 release()（清掉紀錄、出題池、選項、排程），
+    之後看到 quiz.evicted 就 restore()。逐出與 checkout 都在同一把鎖裡：
+    checkout 之後看到 quiz 沒被逐出，這次 rerun 結束前就不會被別的 session 逐出。
+    """
+
+    def __init__(self, writer, db_path, max_live=500, ttl=30 * 60, recent=2000):
+        self.writer = writer
+        self.db_path = db_path
+        self.max_live = max_live
+        self.ttl = ttl
+        self.recent = recent
+        self.evicted = 0
+        self.restored = 0
+        self._live = OrderedDict()           # sid -> (最後使用時間, QuizSession)
+        self._snapshots = OrderedDict()      # sid -> 最近的 snapshot bytes（還沒寫進資料庫也找得到）
+        self._busy = {}                      # sid -> 目前有幾個 rerun / fragment 在用
+        self._fingerprint = (None, 0)
+        self._lock = threading.Lock()
+
+    def fingerprint(self, bank):
+        version, fp = self._fingerprint
+        if version != bank.version:
+            fp = bank_fingerprint(bank)
+            self._fingerprint = (bank.version, fp)
+        return fp
+
+    def save(self, sid, quiz, bank, meta=None):
+        """quiz 為 None（回到模式選擇頁）時存空的 snapshot，重連時就不會回到舊的一局"""
+        data = dump_session(quiz, self.fingerprint(bank), meta) if quiz is not None else b""
+        with self._lock:
+            self._snapshots[sid] = data
+            self._snapshots.move_to_end(sid)
+            while len(self._snapshots) > self.recent:
+                self._snapshots.popitem(last=False)
+        self.writer.submit(SnapshotRow(sid, time.time(), data))
+        return len(data)
+
+    def restore(self, sid, bank):
+        with self._lock:
+            data = self._snapshots.get(sid)
+        if data is None:
+            with closing(connect(self.db_path)) as conn:
+                data = load_snapshot(conn, sid)
+        if data is None:
+            return None
+        try:
+            out = load_session(data, bank, self.fingerprint(bank))
+        except (struct.error, ValueError, IndexError, UnicodeDecodeError):
+            return None
+        if out is not None:
+            self.restored += 1
+        return out
+
+    def checkout(self, sid):
+        with self._lock:
+            self._busy[sid] = self._busy.get(sid, 0) + 1
+
+    def checkin(self, sid):
+        with self._lock:
+            n = self._busy.pop(sid, 0) - 1
+            if n > 0:
+                self._busy[sid] = n
+
+    def touch(self, sid, quiz):
+        now = time.monotonic()
+        with self._lock:
+            self._live[sid] = (now, quiz)
+            self._live.move_to_end(sid)
+            excess = len(self._live) - self.max_live
+            victims = []
+            for key, (seen, _) in self._live.items():
+                if excess <= 0 and now - seen <= self.ttl:
+                    break
+                if key not in self._busy:      # 正在 rerun 的跳過，等它下次閒下來
+                    victims.append(key)
+                    excess -= 1
+            for key in victims:
+                _, old_quiz = self._live.pop(key)
+                if old_quiz is not None and not old_quiz.evicted:
+                    old_quiz.release()
+                    self.evicted += 1
+
+    def __len__(self):
+        return len(self._live)
@@ -0,0 +1,405 @@
+"""
+多個 Streamlit server process 共用一份題庫：由一個 loader process 把編譯好的題庫寫成一個檔案
+（放在 /dev/shm 之類的 tmpfs 上就等於共用記憶體），每個 worker 用 mmap 唯讀掛上去，
+不必各自讀 Excel、各自建一份字串與雜湊表。同一個檔案的分頁在作業系統裡只有一份，加 worker 記憶體不會跟著長。
+
+檔案內容（little-endian，各段對齊 8 bytes）：
+  header                       : magic、格式版本、題庫版本、題數 n、雜湊表大小 cap、鄰居數 k、各段長度
+  term_ids                     : int32[n]
+  name / english / key offsets : uint32[n + 1]，指到最後的 UTF-8 字串區
+  by_english / by_name / by_id : int32[cap] 開放定址雜湊表（存題目 idx，-1 = 空），字串 key 用 crc32
+  neighbors                    : int32[n * k] 英文、中文各一份（k = 0 時沒有）
+  meta                         : JSON（retired、debug_cols、stats）
+  blob                         : 所有中文、英文、英文 key 的 UTF-8
+
+worker 端的 SharedBankIndex 與 BankIndex 介面相同，names[i] / by_english.get(key) 每次從 mmap 解碼，
+Python 物件只在用到的時候才產生。模式三容錯的 TypoIndex 仍由每個 worker 自己建。
+換版時 loader 寫暫存檔再 os.replace，worker 透過 LiveBank(rebase=False) 看到檔案變動後掛上新檔；
+舊檔案在最後一個參照消失前都還在，正在用舊版的 rerun 不受影響。
+
+用法：
+    python -m zoology.shared_bank publish -o /dev/shm/zoology_bank.zqb --watch
+    ZOOLOGY_SHARED_BANK=/dev/shm/zoology_bank.zqb streamlit run Zoology_app.py --server.port 8501
+    python -m zoology.shared_bank info /dev/shm/zoology_bank.zqb
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from collections.abc import Mapping, Sequence
+
+from .bank import BankIndex, LoadedBank
+from .loader import build_loaded_bank, format_stats
+from .neighbors import NeighborTable
+from .reload import LiveBank
+
+MAGIC = b"ZQB"
+FORMAT_VERSION = 1
+# magic, 格式版本, 題庫版本, n, cap, k, 不重複英文 key 數, 不重複中文數, meta bytes, blob bytes
+_HEADER = struct.Struct("<3sBIIIIIIII")
+EMPTY = -1
+
+
+def _align(n):
+    return (n + 7) & ~7
+
+
+def _str_hash(key):
+    return zlib.crc32(key)
+
+
+def _int_hash(t):
+    return (t * 2654435761) & 0xFFFFFFFF
+
+
+def _table_size(n):
+    cap = 8
+    while cap < 2 * n:
+        cap <<= 1
+    return cap
+
+
+def _build_table(keys, cap, hash_fn):
+    """keys 依 idx 順序；同一個 key 只記第一個 idx（與 BankIndex 的 setdefault 一致）"""
+    table = array("i", [EMPTY]) * cap
+    mask = cap - 1
+    distinct = 0
+    for i, key in enumerate(keys):
+        slot = hash_fn(key) & mask
+        while table[slot] != EMPTY:
+            if keys[table[slot]] == key:
+                break
+            slot = (slot + 1) & mask
+        else:
+            table[slot] = i
+            distinct += 1
+    return table, distinct
+
+
+# ===================== loader 端：寫檔 =====================
+def _offsets(strings):
+    offs = array("I", [0])
+    parts = []
+    pos = 0
+    for s in strings:
+        b = s.encode("utf-8")
+        parts.append(b)
+        pos += len(b)
+        offs.append(pos)
+    return offs, parts
+
+
+def encode_bank(loaded, k=8):
+    """LoadedBank → 共用檔案的 bytes；k > 0 時順便算好相似詞表（干擾選項）一起放進去"""
+    index = loaded.index
+    n = len(index)
+    cap = _table_size(n)
+
+    name_off, name_parts = _offsets(index.names)
+    eng_off, eng_parts = _offsets(index.englishes)
+    key_off, key_parts = _offsets(index.english_keys)
+    base = name_off[-1]
+    eng_off = array("I", (o + base for o in eng_off))
+    base += eng_off[-1] - eng_off[0]
+    key_off = array("I", (o + base for o in key_off))
+    blob = b"".join(name_parts + eng_parts + key_parts)
+
+    by_english, n_english = _build_table(key_parts, cap, _str_hash)
+    by_name, n_names = _build_table(name_parts, cap, _str_hash)
+    by_id, _ = _build_table(list(index.term_ids), cap, _int_hash)
+
+    neighbors = b""
+    if k > 0 and n > 1:
+        table = NeighborTable(index, k)
+        neighbors = table.english.astype("<i4").tobytes() + table.name.astype("<i4").tobytes()
+    else:
+        k = 0
+
+    meta = json.dumps({
+        "retired": [[t, n_, e] for t, (n_, e) in index.retired.items()],
+        "debug_cols": [str(c) for c in loaded.debug_cols],
+        "stats": list(loaded.stats),
+    }, ensure_ascii=False).encode("utf-8")
+
+    sections = [
+        array("i", index.term_ids).tobytes(),
+        name_off.tobytes(), eng_off.tobytes(), key_off.tobytes(),
+        by_english.tobytes(), by_name.tobytes(), by_id.tobytes(),
+        neighbors, meta, blob,
+    ]
+    out = bytearray(_HEADER.pack(
+        MAGIC, FORMAT_VERSION, index.version, n, cap, k, n_english, n_names, len(meta), len(blob),
+    ))
+    for sec in sections:
+        out += b"\0" * (_align(len(out)) - len(out))
+        out += sec
+    return bytes(out)
+
+
+def publish(loaded, path, k=8):
+    """寫到 path（先寫暫存檔再 os.replace，worker 不會掛到寫一半的檔），回傳 bytes 數"""
+    data = encode_bank(loaded, k)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return len(data)
+
+
+# ===================== worker 端：mmap 唯讀掛上 =====================
+class _Strings(Sequence):
+    """mmap 裡的一欄 UTF-8 字串，names[i] 時才解碼"""
+    __slots__ = ("_blob", "_off", "_n")
+
+    def __init__(self, blob, offsets):
+        self._blob = blob
+        self._off = offsets
+        self._n = len(offsets) - 1
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._n))]
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError(i)
+        return str(self._blob[self._off[i]:self._off[i + 1]], "utf-8")
+
+    def raw(self, i):
+        """第 i 個字串的 UTF-8（memoryview，不複製）"""
+        return self._blob[self._off[i]:self._off[i + 1]]
+
+    def __iter__(self):
+        blob, off = self._blob, self._off
+        for i in range(self._n):
+            yield str(blob[off[i]:off[i + 1]], "utf-8")
+
+
+class _StrTable(Mapping):
+    """字串 key → idx 的唯讀雜湊表（取代 BankIndex.by_english / by_name）"""
+    __slots__ = ("_table", "_mask", "_column", "_len")
+
+    def __init__(self, table, column, length):
+        self._table = table
+        self._mask = len(table) - 1
+        self._column = column
+        self._len = length
+
+    def get(self, key, default=None):
+        b = key.encode("utf-8")
+        table, column = self._table, self._column
+        slot = _str_hash(b) & self._mask
+        while True:
+            i = table[slot]
+            if i == EMPTY:
+                return default
+            if column.raw(i) == b:
+                return i
+            slot = (slot + 1) & self._mask
+
+    def __getitem__(self, key):
+        i = self.get(key, EMPTY)
+        if i == EMPTY:
+            raise KeyError(key)
+        return i
+
+    def __contains__(self, key):
+        return self.get(key, EMPTY) != EMPTY
+
+    def __len__(self):
+        return self._len
+
+    def _indices(self):
+        return sorted(i for i in self._table if i != EMPTY)
+
+    def __iter__(self):
+        column = self._column
+        return (column[i] for i in self._indices())
+
+    def values(self):
+        return self._indices()
+
+
+class _IdTable(Mapping):
+    """term ID → idx（取代 BankIndex.by_term_id）"""
+    __slots__ = ("_table", "_mask", "_ids")
+
+    def __init__(self, table, ids):
+        self._table = table
+        self._mask = len(table) - 1
+        self._ids = ids
+
+    def get(self, term_id, default=None):
+        if not isinstance(term_id, int):
+            return default
+        table, ids = self._table, self._ids
+        slot = _int_hash(term_id) & self._mask
+        while True:
+            i = table[slot]
+            if i == EMPTY:
+                return default
+            if ids[i] == term_id:
+                return i
+            slot = (slot + 1) & self._mask
+
+    def __getitem__(self, term_id):
+        i = self.get(term_id, EMPTY)
+        if i == EMPTY:
+            raise KeyError(term_id)
+        return i
+
+    def __contains__(self, term_id):
+        return self.get(term_id, EMPTY) != EMPTY
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __iter__(self):
+        return iter(self._ids)
+
+
+class SharedBankIndex(BankIndex):
+    """
+    掛在共用檔案上的 BankIndex：欄位是 mmap 的 view，方法沿用 BankIndex。
+      neighbor_k : 檔案裡附的相似詞表每列幾個（0 = 沒有）
+      path       : 掛上的檔案
+      meta       : debug_cols / stats（給 LoadedBank）
+    """
+    __slots__ = ("neighbor_k", "path", "meta", "_mm", "_neighbors")
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(mm)
+        magic, fmt, version, n, cap, k, n_english, n_names, meta_len, blob_len = _HEADER.unpack_from(buf)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            raise ValueError(f"not a shared bank file: {path}")
+
+        pos = _HEADER.size
+
+        def take(nbytes, fmt_=None):
+            nonlocal pos
+            pos = _align(pos)
+            view = buf[pos:pos + nbytes]
+            pos += nbytes
+            return view.cast(fmt_) if fmt_ else view
+
+        term_ids = take(4 * n, "i")
+        name_off = take(4 * (n + 1), "I")
+        eng_off = take(4 * (n + 1), "I")
+        key_off = take(4 * (n + 1), "I")
+        by_english = take(4 * cap, "i")
+        by_name = take(4 * cap, "i")
+        by_id = take(4 * cap, "i")
+        neighbors = take(8 * n * k)
+        meta = json.loads(bytes(take(meta_len)))
+        blob = take(blob_len)
+
+        names = _Strings(blob, name_off)
+        keys = _Strings(blob, key_off)
+        set_ = object.__setattr__
+        set_(self, "names", names)
+        set_(self, "englishes", _Strings(blob, eng_off))
+        set_(self, "english_keys", keys)
+        set_(self, "by_english", _StrTable(by_english, keys, n_english))
+        set_(self, "by_name", _StrTable(by_name, names, n_names))
+        set_(self, "term_ids", term_ids)
+        set_(self, "by_term_id", _IdTable(by_id, term_ids))
+        set_(self, "version", version)
+        set_(self, "retired", {t: (n_, e) for t, n_, e in meta["retired"]})
+        set_(self, "neighbor_k", k)
+        set_(self, "path", path)
+        set_(self, "_mm", mm)
+        set_(self, "_neighbors", neighbors)
+        set_(self, "meta", meta)
+
+    def neighbor_table(self):
+        """檔案裡附的相似詞表（numpy view，不複製）；沒有時回傳 None"""
+        k = self.neighbor_k
+        if not k:
+            return None
+        import numpy as np
+
+        n = len(self)
+        flat = np.frombuffer(self._neighbors, dtype="<i4")
+        table = NeighborTable.__new__(NeighborTable)
+        table.bank = self
+        table.english = flat[:n * k].reshape(n, k)
+        table.name = flat[n * k:].reshape(n, k)
+        return table
+
+
+def attach(path):
+    """掛上共用題庫，回傳 LoadedBank（取代 build_loaded_bank）；檔案不在或格式不對時 ok=False"""
+    try:
+        index = SharedBankIndex(path)
+    except (OSError, ValueError, struct.error) as e:
+        return LoadedBank(False, f"無法讀取共用題庫 {path}：{e}", (), BankIndex([]))
+    return LoadedBank(True, "", index.meta["debug_cols"], index, index.meta["stats"])
+
+
+def shared_neighbor_table(bank, k):
+    """bank 是掛上來的題庫、且附的相似詞表正好是 k 個一列時回傳它，否則回傳 None（照常自己建）"""
+    if isinstance(bank, SharedBankIndex) and bank.neighbor_k == k:
+        return bank.neighbor_table()
+    return None
+
+
+# ===================== 命令列 =====================
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="把題庫發佈成多個 worker 共用的 mmap 檔")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("publish", help="讀題庫並寫出共用檔")
+    p.add_argument("--bank", nargs="+", default=["Zoology_Terms_Bilingual.xlsx"], help="題庫檔")
+    p.add_argument("-o", "--output", default="/dev/shm/zoology_bank.zqb" if os.path.isdir("/dev/shm")
+                   else "zoology_bank.zqb", help="共用檔路徑（建議放在 tmpfs）")
+    p.add_argument("-k", type=int, default=8, help="一起放進去的相似詞表每列幾個（0 = 不放，worker 自己建）")
+    p.add_argument("--watch", type=float, nargs="?", const=2.0, default=None, metavar="SECONDS",
+                   help="持續監看題庫檔，有變動就重新發佈（term ID 沿用舊版）")
+
+    i = sub.add_parser("info", help="顯示共用檔內容摘要")
+    i.add_argument("path")
+    args = ap.parse_args(argv)
+
+    if args.command == "info":
+        loaded = attach(args.path)
+        if not loaded.ok:
+            print(loaded.error, file=sys.stderr)
+            return 1
+        index = loaded.index
+        print(f"{args.path}: v{index.version}, {len(index)} terms, neighbors k={index.neighbor_k}, "
+              f"{os.path.getsize(args.path) / 1024:.1f} KB")
+        print(format_stats(loaded.stats))
+        return 0
+
+    paths = args.bank if len(args.bank) > 1 else args.bank[0]
+    live = LiveBank(lambda: build_loaded_bank(paths), paths, poll_every=args.watch or 2.0)
+    published = None
+    while True:
+        loaded = live.current
+        if loaded is not published:
+            if not loaded.ok:
+                print(loaded.error, file=sys.stderr)
+                return 1
+            t0 = time.perf_counter()
+            size = publish(loaded, args.output, args.k)
+            print(f"v{loaded.index.version}: {len(loaded.index)} terms -> {args.output} "
+                  f"({size / 1024:.1f} KB, {time.perf_counter() - t0:.2f} s)", flush=True)
+            published = loaded
+        if args.watch is None:
+            return 0
+        time.sleep(args.watch)
+        live.poll(background=False)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,342 @@
+"""
+作答紀錄寫入 SQLite（WAL 模式）。
+
+handle_action 只把一筆資料丟進 queue 就回去畫畫面；背景執行緒把 queue 裡累積的資料
+一次批次 INSERT，學生按按鈕永遠不用等磁碟 I/O。程式結束時（atexit）會先把 queue 清空再關檔。
+
+老師統計頁用的彙總表（班級 × 模式、班級 × 模式 × 詞）在同一個批次交易裡累加更新，
+查詢時只讀彙總表，不必重掃整學期的 answers。
+"""
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter, namedtuple
+
+logger = logging.getLogger(__name__)
+
+AnswerRow = namedtuple(
+    "AnswerRow",
+    [
+        "ts", "session_id", "user_name", "user_class", "user_seat",
+        "mode", "round", "english", "name", "chosen", "is_correct",
+    ],
+)
+
+# 一局結束（回合打完）時送一筆，用來算完成人次
+CompletionRow = namedtuple(
+    "CompletionRow",
+    ["ts", "session_id", "user_class", "mode", "answered", "correct"],
+)
+
+# 可續玩的 session snapshot（zoology.sessions）；同一個 session 只留最新一份
+SnapshotRow = namedtuple("SnapshotRow", ["session_id", "ts", "data"])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    id          INTEGER PRIMARY KEY,
+    ts          REAL    NOT NULL,
+    session_id  TEXT    NOT NULL,
+    user_name   TEXT    NOT NULL DEFAULT '',
+    user_class  TEXT    NOT NULL DEFAULT '',
+    user_seat   TEXT    NOT NULL DEFAULT '',
+    mode        TEXT    NOT NULL,
+    round       INTEGER NOT NULL,
+    english     TEXT    NOT NULL,
+    name        TEXT    NOT NULL,
+    chosen      TEXT    NOT NULL DEFAULT '',
+    is_correct  INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS answers_session ON answers (session_id);
+-- 匯出時依班級順序掃描，不必整表排序
+CREATE INDEX IF NOT EXISTS answers_class ON answers (user_class);
+
+CREATE TABLE IF NOT EXISTS completions (
+    id          INTEGER PRIMARY KEY,
+    ts          REAL    NOT NULL,
+    session_id  TEXT    NOT NULL,
+    user_class  TEXT    NOT NULL DEFAULT '',
+    mode        TEXT    NOT NULL,
+    answered    INTEGER NOT NULL,
+    correct     INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    session_id  TEXT    PRIMARY KEY,
+    ts          REAL    NOT NULL,
+    data        BLOB    NOT NULL
+) WITHOUT ROWID;
+"""
+
+AGG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS agg_class (
+    user_class  TEXT    NOT NULL,
+    mode        TEXT    NOT NULL,
+    answered    INTEGER NOT NULL DEFAULT 0,
+    correct     INTEGER NOT NULL DEFAULT 0,
+    completions INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_class, mode)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS agg_class_term (
+    user_class  TEXT    NOT NULL,
+    mode        TEXT    NOT NULL,
+    english     TEXT    NOT NULL,
+    name        TEXT    NOT NULL,
+    answered    INTEGER NOT NULL DEFAULT 0,
+    correct     INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_class, mode, english)
+) WITHOUT ROWID;
+"""
+
+INSERT_SQL = (
+    "INSERT INTO answers (ts, session_id, user_name, user_class, user_seat, "
+    "mode, round, english, name, chosen, is_correct) VALUES (?,?,?,?,?,?,?,?,?,?,?)"
+)
+INSERT_COMPLETION_SQL = (
+    "INSERT INTO completions (ts, session_id, user_class, mode, answered, correct) "
+    "VALUES (?,?,?,?,?,?)"
+)
+UPSERT_SNAPSHOT_SQL = "INSERT OR REPLACE INTO snapshots (session_id, ts, data) VALUES (?,?,?)"
+UPSERT_CLASS_SQL = (
+    "INSERT INTO agg_class (user_class, mode, answered, correct, completions) VALUES (?,?,?,?,?) "
+    "ON CONFLICT (user_class, mode) DO UPDATE SET "
+    "answered = answered + excluded.answered, correct = correct + excluded.correct, "
+    "completions = completions + excluded.completions"
+)
+UPSERT_TERM_SQL = (
+    "INSERT INTO agg_class_term (user_class, mode, english, name, answered, correct) VALUES (?,?,?,?,?,?) "
+    "ON CONFLICT (user_class, mode, english) DO UPDATE SET "
+    "name = excluded.name, answered = answered + excluded.answered, correct = correct + excluded.correct"
+)
+
+
+# 這個 process 已經建好 / 檢查過資料表的資料庫檔（絕對路徑）
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
+
+def connect(db_path):
+    """
+    開一個 WAL 模式的連線（讀寫可同時進行，commit 不必每次 fsync 主檔）。
+    建表 / 升級每個檔案在每個 process 只做一次（老師頁每次 rerun 都會開連線）；檔案被刪掉時重做。
+    """
+    key = os.path.abspath(db_path) if db_path and db_path != ":memory:" else None
+    # 要在 sqlite3.connect 之前看：connect 會把不存在的檔案建成空的
+    ready = key in _schema_ready and os.path.exists(key)
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if ready:
+        return conn
+    with _schema_lock:
+        _ensure_schema(conn)
+        if key is not None:
+            _schema_ready.add(key)
+    return conn
+
+
+def _ensure_schema(conn):
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    has_agg = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='agg_class_term'"
+    ).fetchone()
+    conn.executescript(AGG_SCHEMA)
+    if not has_agg:
+        # 舊資料庫第一次升級：從既有紀錄補算一次彙總
+        with conn:
+            rebuild_aggregates(conn)
+
+
+def rebuild_aggregates(conn):
+    """從 answers / completions 全部重算彙總表（只在建表或修復時用）"""
+    conn.execute("DELETE FROM agg_class")
+    conn.execute("DELETE FROM agg_class_term")
+    conn.execute(
+        "INSERT INTO agg_class_term (user_class, mode, english, name, answered, correct) "
+        "SELECT user_class, mode, english, MAX(name), COUNT(*), SUM(is_correct) "
+        "FROM answers GROUP BY user_class, mode, english"
+    )
+    conn.execute(
+        "INSERT INTO agg_class (user_class, mode, answered, correct) "
+        "SELECT user_class, mode, SUM(answered), SUM(correct) FROM agg_class_term GROUP BY user_class, mode"
+    )
+    conn.executemany(
+        UPSERT_CLASS_SQL,
+        [(c, m, 0, 0, n) for c, m, n in conn.execute(
+            "SELECT user_class, mode, COUNT(*) FROM completions GROUP BY user_class, mode"
+        )],
+    )
+
+
+def apply_batch(conn, batch):
+    """一個交易內寫入原始紀錄並累加彙總表（彙總先在記憶體裡合併，每個 key 只 UPSERT 一次）"""
+    answers = [r for r in batch if isinstance(r, AnswerRow)]
+    completions = [r for r in batch if isinstance(r, CompletionRow)]
+    # 同一批裡同一個 session 的 snapshot 只寫最後一份
+    snapshots = {r.session_id: r for r in batch if isinstance(r, SnapshotRow)}
+
+    per_class = Counter()
+    per_term = Counter()
+    names = {}
+    for r in answers:
+        ck = (r.user_class, r.mode)
+        tk = (r.user_class, r.mode, r.english)
+        per_class[ck + ("answered",)] += 1
+        per_class[ck + ("correct",)] += int(r.is_correct)
+        per_term[tk + ("answered",)] += 1
+        per_term[tk + ("correct",)] += int(r.is_correct)
+        names[tk] = r.name
+    for r in completions:
+        per_class[(r.user_class, r.mode, "completions")] += 1
+
+    class_keys = {k[:2] for k in per_class}
+    with conn:
+        if answers:
+            conn.executemany(INSERT_SQL, answers)
+        if completions:
+            conn.executemany(INSERT_COMPLETION_SQL, completions)
+        if snapshots:
+            conn.executemany(UPSERT_SNAPSHOT_SQL, snapshots.values())
+        conn.executemany(UPSERT_CLASS_SQL, [
+            ck + (per_class[ck + ("answered",)], per_class[ck + ("correct",)], per_class[ck + ("completions",)])
+            for ck in class_keys
+        ])
+        conn.executemany(UPSERT_TERM_SQL, [
+            tk + (names[tk], per_term[tk + ("answered",)], per_term[tk + ("correct",)])
+            for tk in names
+        ])
+
+
+# ===================== 老師統計頁查詢（只讀彙總表） =====================
+def class_summary(conn):
+    """每個班級 × 模式的作答數、答對數、完成人次"""
+    return conn.execute(
+        "SELECT user_class, mode, answered, correct, completions FROM agg_class ORDER BY user_class, mode"
+    ).fetchall()
+
+
+def term_error_rates(conn, user_class, mode, limit=30, min_answered=1):
+    """某班某模式錯誤率最高的詞：[(english, name, answered, correct), ...]"""
+    return conn.execute(
+        "SELECT english, name, answered, correct FROM agg_class_term "
+        "WHERE user_class = ? AND mode = ? AND answered >= ? "
+        "ORDER BY CAST(answered - correct AS REAL) / answered DESC, answered DESC LIMIT ?",
+        (user_class, mode, min_answered, limit),
+    ).fetchall()
+
+
+def load_snapshot(conn, session_id):
+    """某個 session 最新的 snapshot bytes；沒有時回傳 None"""
+    row = conn.execute("SELECT data FROM snapshots WHERE session_id = ?", (session_id,)).fetchone()
+    return row[0] if row else None
+
+
+def prune_snapshots(conn, older_than):
+    """刪掉 ts 早於 older_than（epoch 秒）的 snapshot，回傳刪了幾筆"""
+    with conn:
+        return conn.execute("DELETE FROM snapshots WHERE ts < ?", (older_than,)).rowcount
+
+
+class AnswerWriter:
+    """
+    write-behind 寫入器。
+      submit(row)  : 非阻塞放入 queue（AnswerRow、CompletionRow 或 SnapshotRow）（queue 滿了就丟棄並記在 dropped，絕不卡住畫面）
+      flush()      : 等目前 queue 裡的資料都寫進資料庫
+      close()      : 寫完剩下的資料後關閉（已註冊 atexit）
+    batch_size / max_delay：累積到 batch_size 筆或等了 max_delay 秒就寫一批。
+    整批寫入失敗（例如某一筆違反 NOT NULL）時改成一筆一個交易重寫，只丟掉寫不進去的那幾筆（記在 failed），
+    同一批裡其他 session 的紀錄、彙總與 snapshot 照常寫入。
+    """
+
+    _STOP = object()
+
+    def __init__(self, db_path, batch_size=500, max_delay=0.5, max_queue=100_000):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self._conn = connect(db_path)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="answer-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, row):
+        try:
+            self.queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("answer queue full, dropped %d rows so far", self.dropped)
+
+    def flush(self):
+        self.queue.join()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.queue.put(self._STOP)
+        self._thread.join()
+        self._conn.close()
+
+    def _run(self):
+        stop = False
+        while not stop:
+            item = self.queue.get()
+            batch = []
+            n_items = 1
+            if item is self._STOP:
+                stop = True
+            else:
+                batch.append(item)
+            deadline = time.monotonic() + self.max_delay
+            while not stop and len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                n_items += 1
+                if item is self._STOP:
+                    stop = True
+                else:
+                    batch.append(item)
+            try:
+                if batch:
+                    self._write(batch)
+            except Exception:
+                logger.exception("failed to write %d answer rows", len(batch))
+            finally:
+                for _ in range(n_items):
+                    self.queue.task_done()
+
+    def _write(self, batch):
+        try:
+            apply_batch(self._conn, batch)
+        except Exception:
+            logger.warning("batch of %d rows failed, retrying one by one", len(batch), exc_info=True)
+            self._write_each(batch)
+            return
+        self.written += len(batch)
+
+    def _write_each(self, batch):
+        # 同一個 session 的 snapshot 只要寫最後一份
+        last_snapshot = {r.session_id: r for r in batch if isinstance(r, SnapshotRow)}
+        for row in batch:
+            if isinstance(row, SnapshotRow) and last_snapshot[row.session_id] is not row:
+                continue
+            try:
+                apply_batch(self._conn, [row])
+                self.written += 1
+            except Exception:
+                self.failed += 1
+                logger.exception("dropped unwritable row: %r", row)
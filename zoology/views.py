@@ -0,0 +1,147 @@
+"""
+題目畫面的 HTML / markdown 片段快取：同一題在同一個模式、同一組選項下，每個學生看到的題目、提示、
+複習區雙語對照都一樣，組一次之後所有 session 共用，不必每次 rerun 都重新拼字串、回題庫比對選項。
+
+  view(term_id, mode, option_ids) : TermView（key = (term ID, 模式代碼, 依顯示順序的選項 term ID)）
+  progress(round, pos, n)         : 進度條卡
+快取有上限（LRU），一版題庫一份（換版時整個換掉），hits / misses 給管理面板算命中率。
+"""
+import threading
+from collections import OrderedDict, namedtuple
+
+from .engine import MODE_EN, MODE_TYPED, MODE_ZH
+from .records import NO_TERM
+
+# 一題的畫面片段
+#   prompt  : 題目（<h2> 裡 "Q{n}. " 後面那段）
+#   hint    : 模式三的提示 <div>；其他模式為 ""
+#   answer  : 複習區的正確答案（markdown）
+#   options : 複習區的選項雙語對照（markdown，兩行）；模式三為 ""
+TermView = namedtuple("TermView", ["prompt", "hint", "answer", "options"])
+
+OPTION_COUNT_ZH = {2: "兩", 3: "三", 4: "四", 5: "五", 6: "六"}
+
+# 各模式的題目句（{name} / {english} 代入中文 / 英文）；靜態版 zoology.bundle 也用同一組
+PROMPT_TEMPLATES = {
+    MODE_EN: "「{name}」的正確英文是？",
+    MODE_ZH: "「{english}」對應的正確中文是？",
+    MODE_TYPED: "「{name}」的英文是？",
+}
+
+
+def typed_hint(english):
+    """模式三提示：首字 + … + 尾字（兩個字以內直接顯示）"""
+    w = english.strip()
+    return w if len(w) <= 2 else f"{w[0]}…{w[-1]}"
+
+
+def build_view(bank, term_id, mode, option_ids=()):
+    """不經快取直接組一題的 TermView"""
+    name, eng = bank.term(term_id) or ("", "")
+    prompt = PROMPT_TEMPLATES.get(mode, PROMPT_TEMPLATES[MODE_TYPED]).format(name=name, english=eng)
+    hint = ""
+    if mode == MODE_TYPED:
+        hint = f"<div style='color:#555;font-size:18px;'>提示：{typed_hint(eng)}</div>"
+    if mode == MODE_ZH:
+        answer = f"**正確中文名稱：{name}（{eng}）**"
+    else:
+        answer = f"**正確英文術語：{eng}（{name}）**"
+
+    options = ""
+    if option_ids:
+        pairs = []
+        for t in option_ids:
+            pair = bank.term(t) if t != NO_TERM else None
+            if pair is None:
+                pairs.append("???")
+            elif mode == MODE_ZH:
+                pairs.append(f"{pair[0]}（{pair[1]}）")
+            else:
+                pairs.append(f"{pair[1]}（{pair[0]}）")
+        n = len(option_ids)
+        options = f"**本題{OPTION_COUNT_ZH.get(n, n)}個選項：**\n\n" + "、".join(pairs)
+    return TermView(prompt, hint, answer, options)
+
+
+def build_progress(round_no, pos, n):
+    """進度條卡（pos 為 1 起算的第幾題）"""
+    percent = int(pos / n * 100) if n else 0
+    return f"""
+        <div class="progress-card"
+             style='background-color:#f5f5f5;
+                    padding:9px 14px;
+                    border-radius:12px;'>
+            <div style='display:flex;
+                        align-items:center;
+                        justify-content:space-between;
+                        margin-bottom:4px;'>
+                <div style='font-size:18px;'>
+                    🎯 第 {round_no} 回合｜進度：{pos} / {n}
+                </div>
+                <div style='font-size:16px; color:#555;'>{percent}%</div>
+            </div>
+            <progress value='{pos}'
+                      max='{n if n else 1}'
+                      style='width:100%; height:14px;'></progress>
+        </div>
+        """
+
+
+class ViewCache:
+    """
+    一版題庫一份、所有 session 共用的 LRU。
+    命中時不拿鎖（OrderedDict 的 get / move_to_end 在 GIL 下各自是一步完成的），只有放進新的一筆、逐出舊的時才拿鎖；
+    兩個 session 同時組同一題也只是多做一次。hits / misses 不拿鎖累加，多執行緒下可能少算幾次，只當命中率參考。
+    """
+
+    def __init__(self, bank, maxsize=4096):
+        self.bank = bank
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def _get(self, key, build, *args):
+        items = self._items
+        value = items.get(key)
+        if value is not None:
+            self.hits += 1
+            try:
+                items.move_to_end(key)
+            except KeyError:   # 剛好被別的執行緒逐出，這次照樣用
+                pass
+            return value
+        self.misses += 1
+        value = build(*args)
+        with self._lock:
+            self._items[key] = value
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def view(self, term_id, mode, option_ids=()):
+        option_ids = tuple(option_ids)
+        return self._get((term_id, mode, option_ids), build_view, self.bank, term_id, mode, option_ids)
+
+    def progress(self, round_no, pos, n):
+        return self._get(("progress", round_no, pos, n), build_progress, round_no, pos, n)
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {
+            "size": len(self._items),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate(),
+        }